@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_attribute_access.py
+
+Counts the accesses of the global attributes of a netCDF file while it is
+checked against the CMIP6 CVs and times the check. The former access pattern
+(`hasattr` and up to three `getattr` per checked attribute) is replayed for
+comparison with the current one (one snapshot via `ncattrs`/`getncattr` per
+dataset).
+
+usage: python benchmarks/bench_attribute_access.py [FILE.nc] [REPEAT]
+
+The package has to be installed (e.g. `pip install -e .`).
+'''
+
+import collections
+import os
+import sys
+import timeit
+import netCDF4 as nc
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__package_dir__ = os.path.join(os.path.dirname(__current_dir__),
+                               'cc_plugin_cmip6_cv')
+# use the CVs shipped with the package and do not update them
+os.environ.setdefault('CMIP6_JSON_PATH', os.path.join(__package_dir__, 'data'))
+
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck  # noqa: E402
+from cc_plugin_cmip6_cv.util import read_global_attributes  # noqa: E402
+
+# number of calls per method of `counting_dataset`; netCDF4.Dataset does not
+# allow to set Python attributes on instances
+__calls__ = collections.Counter()
+
+
+class counting_dataset(nc.Dataset):
+    """
+    netCDF4.Dataset which counts the calls that go into the netCDF library
+    for reading global attributes.
+    """
+
+    # `netCDF4.Dataset.__getattr__` reads existing attributes via
+    # `getncattr`; this method is only reached if an attribute is missing
+    def __getattr__(self, name):
+        if not name.startswith('__'):
+            __calls__['missing'] += 1
+        return super(counting_dataset, self).__getattr__(name)
+
+    def ncattrs(self):
+        __calls__['ncattrs'] += 1
+        return super(counting_dataset, self).ncattrs()
+
+    def getncattr(self, name, encoding='utf-8'):
+        __calls__['getncattr'] += 1
+        return super(counting_dataset, self).getncattr(name, encoding)
+
+
+def legacy_access(dataset, plan):
+    # access pattern of `iterate_cv_structure`/`iterate_cv_all` before the
+    # global attributes were snapshotted
+    for check in plan.checks:
+        if hasattr(dataset, check.attribute):
+            if check.predicate is None:
+                continue
+            value = getattr(dataset, check.attribute)
+            correct = check.predicate(value)
+            str(getattr(dataset, check.attribute))
+            if check.has_children() and correct:
+                child_plan = check.get_child_plan(getattr(dataset,
+                                                          check.attribute))
+                if child_plan is not None:
+                    legacy_access(dataset, child_plan)
+
+
+def snapshot_access(dataset, plan):
+    # access pattern of `execute_check_plan`; results are not created
+    attributes = read_global_attributes(dataset)
+    for check in plan.checks:
+        if check.attribute in attributes:
+            if check.predicate is None:
+                continue
+            value = attributes[check.attribute]
+            correct = check.predicate(value)
+            str(value)
+            if check.has_children() and correct:
+                child_plan = check.get_child_plan(value)
+                if child_plan is not None:
+                    snapshot_access(attributes, child_plan)
+
+
+def main(test_file, repeat):
+    checker = CMIP6CVBaseCheck()
+    plan = checker.prepare_check_plan()
+
+    with counting_dataset(test_file, 'r') as dataset:
+        __calls__.clear()
+        legacy_access(dataset, plan)
+        legacy_calls = dict(__calls__)
+        __calls__.clear()
+        checker.execute_check_plan([], dataset, plan)
+        snapshot_calls = dict(__calls__)
+
+    print('netCDF attribute calls per file (' + os.path.basename(test_file) +
+          ')')
+    print('  hasattr/getattr per attribute: ' + str(legacy_calls))
+    print('  one snapshot per dataset:      ' + str(snapshot_calls))
+
+    with nc.Dataset(test_file, 'r') as dataset:
+        t_legacy = timeit.timeit(lambda: legacy_access(dataset, plan),
+                                 number=repeat)
+        t_snapshot = timeit.timeit(lambda: snapshot_access(dataset, plan),
+                                   number=repeat)
+        t_check = timeit.timeit(
+            lambda: checker.execute_check_plan([], dataset, plan),
+            number=repeat)
+    print('time per file (mean of ' + str(repeat) + ' repetitions)')
+    print('  hasattr/getattr per attribute: %.1f us' %
+          (t_legacy / repeat * 1e6))
+    print('  one snapshot per dataset:      %.1f us' %
+          (t_snapshot / repeat * 1e6))
+    print('  execute_check_plan:            %.1f us (including results)' %
+          (t_check / repeat * 1e6))
+
+
+if __name__ == '__main__':
+    test_file = (sys.argv[1] if len(sys.argv) > 1 else
+                 os.path.join(__package_dir__, 'test', 'data',
+                              'example_file_cf_issue_212.nc'))
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    main(test_file, repeat)
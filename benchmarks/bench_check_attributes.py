@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_check_attributes.py
+
+Times `check_attributes` for records of global attributes given as `dict`
+(the global attributes of the test file of the package): with the verdict
+cache (all records have the same values of the checked attributes) and
+without it (see `check_plan.__verdict_cache_size__`). For comparison, the
+test file is checked via `netCDF4.Dataset` (`execute_check_plan` on the
+opened file).
+
+usage: python benchmarks/bench_check_attributes.py [RECORDS]
+
+The package has to be installed (e.g. `pip install -e .`).
+'''
+
+import os
+import sys
+import time
+import netCDF4 as nc
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__package_dir__ = os.path.join(os.path.dirname(__current_dir__),
+                               'cc_plugin_cmip6_cv')
+__test_file__ = os.path.join(__package_dir__, 'test', 'data',
+                             'example_file_cf_issue_212.nc')
+# use the CVs shipped with the package and do not update them
+os.environ.setdefault('CMIP6_JSON_PATH', os.path.join(__package_dir__, 'data'))
+
+import cc_plugin_cmip6_cv.check_plan as check_plan  # noqa: E402
+from cc_plugin_cmip6_cv import check_attributes  # noqa: E402
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck  # noqa: E402
+
+
+def run(count, fun, records):
+    t0 = time.perf_counter()
+    for i in range(count):
+        fun(records[i % len(records)])
+    return time.perf_counter() - t0
+
+
+def main(count):
+    with nc.Dataset(__test_file__) as dataset:
+        attributes = {name: dataset.getncattr(name)
+                      for name in dataset.ncattrs()}
+    # records differ in an attribute which is not checked
+    records = [dict(attributes, tracking_id='hdl:21.14100/%08d' % i)
+               for i in range(1000)]
+    # read and compile the CVs
+    check_attributes(attributes)
+
+    print('%d records' % count)
+    print('  %-28s %10s %14s %12s' % ('', 'total [s]', 'per record [us]',
+                                      'records/s'))
+    old_size = check_plan.__verdict_cache_size__
+    try:
+        for name, size in [('check_attributes (cached)', old_size),
+                           ('check_attributes (no cache)', 0)]:
+            check_plan.__verdict_cache_size__ = size
+            t = run(count, check_attributes, records)
+            print('  %-28s %10.3f %14.1f %12.0f' % (name, t, t / count * 1e6,
+                                                    count / t))
+
+        # open file, for comparison
+        checker = CMIP6CVBaseCheck()
+        plan = checker.prepare_check_plan()
+        check_plan.__verdict_cache_size__ = 0
+        with nc.Dataset(__test_file__) as dataset:
+            t = run(count, lambda record: checker.execute_check_plan(
+                [], dataset, plan), [None])
+        print('  %-28s %10.3f %14.1f %12.0f' % ('netCDF4.Dataset (no cache)',
+                                                t, t / count * 1e6,
+                                                count / t))
+    finally:
+        check_plan.__verdict_cache_size__ = old_size
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_check_table.py
+
+Times checking a table of global attributes (a `dict` of NumPy arrays with
+one row per file) with `check_table` and row by row with `check_attributes`
+(with the verdict cache). The rows are variations of the checked global
+attributes of the test file of the package with VALUES distinct values of
+`experiment_id`, `source_id`, `institution_id` and `tracking_id`. The row by
+row check is timed on at most 20000 rows and extrapolated.
+
+usage: python benchmarks/bench_check_table.py [ROWS] [VALUES]
+
+The package has to be installed (e.g. `pip install -e .`).
+'''
+
+import os
+import sys
+import time
+import netCDF4 as nc
+import numpy
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__package_dir__ = os.path.join(os.path.dirname(__current_dir__),
+                               'cc_plugin_cmip6_cv')
+__test_file__ = os.path.join(__package_dir__, 'test', 'data',
+                             'example_file_cf_issue_212.nc')
+# use the CVs shipped with the package and do not update them
+os.environ.setdefault('CMIP6_JSON_PATH', os.path.join(__package_dir__, 'data'))
+
+from cc_plugin_cmip6_cv import check_attributes, check_table  # noqa: E402
+from cc_plugin_cmip6_cv.cmip6_constants import \
+    __cmip6_cv_struct_dict__  # noqa: E402
+from cc_plugin_cmip6_cv.util import load_json_cv  # noqa: E402
+
+
+def build_table(count, distinct):
+    with nc.Dataset(__test_file__) as dataset:
+        attributes = {name: dataset.getncattr(name)
+                      for name in dataset.ncattrs()
+                      if name in __cmip6_cv_struct_dict__}
+    table = {name: numpy.array([value] * count)
+             for name, value in attributes.items()}
+    rng = numpy.random.default_rng(0)
+    for name in ['experiment_id', 'source_id', 'institution_id']:
+        values = list(load_json_cv(os.path.join(
+            __package_dir__, 'data', 'CMIP6_'+name+'.json')).cv[name])
+        values = numpy.array(values[:distinct] + ['not_in_cv'])
+        table[name] = values[rng.integers(0, len(values), count)]
+    table['tracking_id'] = numpy.array(['hdl:21.14100/%d' % i
+                                        for i in range(distinct)]
+                                       )[rng.integers(0, distinct, count)]
+    return table
+
+
+def main(count, distinct):
+    table = build_table(count, distinct)
+    print('%d rows, %d distinct values' % (count, distinct))
+    print('  %-28s %10s %14s' % ('', 'total [s]', 'rows/s'))
+
+    t0 = time.perf_counter()
+    result = check_table(table)
+    t = time.perf_counter() - t0
+    print('  %-28s %10.3f %14.0f' % ('check_table', t, count / t))
+    print('  %d checks, %.1f %% passed' % (len(result.checks), 100 *
+          result.passed.sum() / max(result.performed.sum(), 1)))
+
+    # rows as `dict`s of `str` (like read from files)
+    sample = min(count, 20000)
+    names = list(table)
+    rows = [dict(zip(names, values)) for values in
+            zip(*[table[name][:sample].tolist() for name in names])]
+    check_attributes(rows[0])
+    t0 = time.perf_counter()
+    for row in rows:
+        check_attributes(row)
+    t = (time.perf_counter() - t0) / sample * count
+    print('  %-28s %10.3f %14.0f (extrapolated)' % ('check_attributes', t,
+                                                     count / t))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 50)
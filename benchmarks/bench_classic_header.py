@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_classic_header.py
+
+Times reading the global attributes of many netCDF classic files with
+`netCDF4.Dataset` (open, `util.read_global_attributes`, close) and with the
+header parser `nc_header.read_classic_global_attributes`. The files are
+written into a temporary directory; each holds the global attributes of the
+test file of the package, one record variable and some data.
+
+usage: python benchmarks/bench_classic_header.py [FILES] [FORMAT]
+
+FORMAT is one of NETCDF3_CLASSIC (default), NETCDF3_64BIT_OFFSET and
+NETCDF3_64BIT_DATA. The package has to be installed (e.g.
+`pip install -e .`).
+'''
+
+import os
+import sys
+import tempfile
+import time
+import netCDF4 as nc
+import numpy
+
+from cc_plugin_cmip6_cv.nc_header import read_classic_global_attributes
+from cc_plugin_cmip6_cv.util import read_global_attributes
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = os.path.join(os.path.dirname(__current_dir__),
+                             'cc_plugin_cmip6_cv', 'test', 'data',
+                             'example_file_cf_issue_212.nc')
+
+
+def write_files(tmp_dir, count, file_format):
+    with nc.Dataset(__test_file__) as dataset:
+        attributes = read_global_attributes(dataset)
+    paths = []
+    for i in range(count):
+        path = os.path.join(tmp_dir, 'file_%05d.nc' % i)
+        with nc.Dataset(path, 'w', format=file_format) as dataset:
+            dataset.setncatts(attributes)
+            dataset.createDimension('time', None)
+            dataset.createDimension('x', 100)
+            tas = dataset.createVariable('tas', 'f4', ('time', 'x'))
+            tas[0:10, :] = numpy.ones((10, 100))
+        paths.append(path)
+    return paths
+
+
+def read_with_netcdf4(path):
+    dataset = nc.Dataset(path, 'r')
+    try:
+        return read_global_attributes(dataset)
+    finally:
+        dataset.close()
+
+
+def main(count, file_format):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_files(tmp_dir, count, file_format)
+        print('%d files (%s)' % (count, file_format))
+        print('  %-32s %10s %14s' % ('', 'total [s]', 'per file [us]'))
+        for name, fun in [('netCDF4.Dataset', read_with_netcdf4),
+                          ('read_classic_global_attributes',
+                           read_classic_global_attributes)]:
+            # warm up the page cache
+            for path in paths:
+                fun(path)
+            t0 = time.perf_counter()
+            for path in paths:
+                fun(path)
+            t = time.perf_counter() - t0
+            print('  %-32s %10.3f %14.1f' % (name, t, t / count * 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         sys.argv[2] if len(sys.argv) > 2 else 'NETCDF3_CLASSIC')
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_cold_start.py
+
+Measures the cold start of a new process, i.e. the time until the first
+check plan is available (`CMIP6CVBaseCheck.prepare_check_plan`): the JSON CV
+files are found, validated, read and compacted and the plan is compiled.
+Each run is a new Python process; the CV files are copied into a temporary
+directory that is used via `CMIP6_JSON_PATH`.
+
+usage: python benchmarks/bench_cold_start.py [RUNS]
+
+The package has to be installed (e.g. `pip install -e .`).
+'''
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import cc_plugin_cmip6_cv
+
+
+child_code = '''
+import time
+t0 = time.perf_counter()
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
+t1 = time.perf_counter()
+CMIP6CVBaseCheck().prepare_check_plan()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+'''
+
+
+def run_child(env):
+    output = subprocess.run([sys.executable, '-c', child_code], env=env,
+                            check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    return [float(t) for t in output.split()]
+
+
+def main(runs):
+    data_dir = os.path.dirname(cc_plugin_cmip6_cv.__file__) + '/data'
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cv_dir = tmp_dir + '/cvs'
+        shutil.copytree(data_dir, cv_dir)
+        env = dict(os.environ, CMIP6_JSON_PATH=cv_dir)
+        timings = [run_child(env) for i in range(runs)]
+
+    print('median of %d runs' % runs)
+    print('  import:     %6.1f ms' %
+          (statistics.median(t[0] for t in timings) * 1e3))
+    print('  check plan: %6.1f ms' %
+          (statistics.median(t[1] for t in timings) * 1e3))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
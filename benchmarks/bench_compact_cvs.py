@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_compact_cvs.py
+
+Measures the memory held by the CMIP6 CVs with all entries parsed, before
+and after compacting them (see `util.compact_cvs`): fields in
+`__cmip6_cv_ignore__` are dropped, strings are interned and lists within
+the entries are converted into tuples. The memory is measured with
+`tracemalloc`; the JSON texts of the lazily loaded CVs are not counted.
+
+usage: python benchmarks/bench_compact_cvs.py
+
+The package has to be installed (e.g. `pip install -e .`).
+'''
+
+import gc
+import json
+import os
+import tracemalloc
+
+import cc_plugin_cmip6_cv
+from cc_plugin_cmip6_cv.cmip6_constants import __cmip6_cv_struct_dict__, \
+                                               __cmip6_cv_ignore__
+from cc_plugin_cmip6_cv.util import compact_cvs, lazy_cv
+
+
+def load_cvs(data_dir, cv_names):
+    cvs = {}
+    for name in cv_names:
+        with open(data_dir+'/CMIP6_'+name+'.json') as f:
+            content = json.load(f)
+        content['version_metadata/'+name] = content.pop('version_metadata')
+        cvs.update(content)
+    return cvs
+
+
+def materialize(cvs):
+    # parse all entries of lazily loaded CVs
+    return {name: dict(cv) if isinstance(cv, lazy_cv) else cv
+            for name, cv in cvs.items()}
+
+
+def measure(fun):
+    gc.collect()
+    tracemalloc.start()
+    result = fun()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    data_dir = os.path.dirname(cc_plugin_cmip6_cv.__file__) + '/data'
+    cv_names = sorted(set(d[1] for d in __cmip6_cv_struct_dict__.values()
+                          if os.path.isfile(data_dir+'/CMIP6_'+d[1]+'.json')))
+
+    plain, size_plain = measure(lambda: load_cvs(data_dir, cv_names))
+    _, size_compact = measure(lambda: materialize(
+        compact_cvs(load_cvs(data_dir, cv_names), __cmip6_cv_ignore__)))
+
+    print('CVs: ' + ', '.join(cv_names))
+    print('  %-10s %12s' % ('', 'size [KiB]'))
+    print('  %-10s %12.1f' % ('parsed', size_plain / 1024))
+    print('  %-10s %12.1f' % ('compacted', size_compact / 1024))
+    for name in ['experiment_id', 'source_id']:
+        if name in plain:
+            _, size_plain = measure(lambda: load_cvs(data_dir, [name]))
+            _, size_compact = measure(lambda: materialize(
+                compact_cvs(load_cvs(data_dir, [name]),
+                            __cmip6_cv_ignore__)))
+            print('  %-10s %12.1f -> %.1f' % (name, size_plain / 1024,
+                                              size_compact / 1024))
+
+
+if __name__ == '__main__':
+    main()
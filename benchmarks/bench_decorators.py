@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_decorators.py
+
+Measures the per-call overhead of the decorators `util.accepts` and
+`cv_structure.validate_argument_attribute` for the validation levels 'full'
+and 'off' (see `util.set_validation_level`). The cost of
+`inspect.signature`, which was called on each call of a function decorated
+by `validate_argument_attribute` before, is given for comparison.
+
+usage: python benchmarks/bench_decorators.py [REPEAT]
+
+The package has to be installed (e.g. `pip install -e .`). Run it with the
+environment variable `CC_PLUGIN_CMIP6_CV_VALIDATION=off` to measure the
+undecorated functions.
+'''
+
+import inspect
+import sys
+import timeit
+
+from cc_plugin_cmip6_cv.cv_structure import cv_structure, \
+    validate_argument_attribute
+from cc_plugin_cmip6_cv.util import accepts, set_validation_level, \
+    get_validation_level
+
+
+dummy_cv = {'cv01': {'DKRZ': 'Deutsches Klimarechenzentrum'},
+            'cv02': ['red', 'green', 'blue']}
+dummy_cv_struct = cv_structure({'attr01': ['in', 'cv01', None, 'keys',
+                                           False],
+                                'attr02': ['in', 'cv02', None, '', False]})
+
+
+def bare_fun(cv_struct, attribute, cvs):
+    return attribute
+
+
+@accepts(None, str, dict)
+def accepts_fun(cv_struct, attribute, cvs):
+    return attribute
+
+
+@validate_argument_attribute(None)
+def validated_fun(cv_struct, attribute, cvs):
+    return attribute
+
+
+def time_per_call(fun, repeat):
+    t = timeit.timeit(lambda: fun(dummy_cv_struct, 'attr01', dummy_cv),
+                      number=repeat)
+    return t / repeat * 1e9
+
+
+def main(repeat):
+    print('validation level at import: ' + get_validation_level())
+    t_bare = time_per_call(bare_fun, repeat)
+    print('  %-40s %8.0f ns' % ('undecorated function', t_bare))
+    print('  %-40s %8.0f ns' % ('inspect.signature',
+          timeit.timeit(lambda: inspect.signature(bare_fun),
+                        number=repeat) / repeat * 1e9))
+
+    level = get_validation_level()
+    for new_level in ['full', 'off']:
+        set_validation_level(new_level)
+        print('validation level: ' + new_level)
+        for (name, fun) in [('accepts', accepts_fun),
+                            ('validate_argument_attribute', validated_fun),
+                            ('cv_structure.check_cv',
+                             lambda cv_struct, attribute, cvs:
+                                 cv_struct.check_cv(attribute, cvs, 'DKRZ',
+                                                    False))]:
+            t = time_per_call(fun, repeat)
+            print('  %-40s %8.0f ns (%+.0f ns)' % (name, t, t - t_bare))
+    set_validation_level(level)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_hdf5_attributes.py
+
+Times reading the global attributes of many netCDF4/HDF5 files with
+`netCDF4.Dataset` (open, `util.read_global_attributes`, close) and with the
+low-level HDF5 reader `nc_header.read_hdf5_global_attributes` (h5py). The
+files are written into a temporary directory; each holds the global
+attributes of the test file of the package and VARIABLES variables.
+
+usage: python benchmarks/bench_hdf5_attributes.py [FILES] [VARIABLES]
+
+The package and h5py have to be installed (e.g. `pip install -e .` and
+`pip install h5py`).
+'''
+
+import os
+import sys
+import tempfile
+import time
+import netCDF4 as nc
+import numpy
+
+from cc_plugin_cmip6_cv.nc_header import read_hdf5_global_attributes
+from cc_plugin_cmip6_cv.util import read_global_attributes
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = os.path.join(os.path.dirname(__current_dir__),
+                             'cc_plugin_cmip6_cv', 'test', 'data',
+                             'example_file_cf_issue_212.nc')
+
+
+def write_files(tmp_dir, count, variables):
+    with nc.Dataset(__test_file__) as dataset:
+        attributes = read_global_attributes(dataset)
+    paths = []
+    for i in range(count):
+        path = os.path.join(tmp_dir, 'file_%05d.nc' % i)
+        with nc.Dataset(path, 'w', format='NETCDF4') as dataset:
+            dataset.setncatts(attributes)
+            dataset.createDimension('time', None)
+            dataset.createDimension('x', 100)
+            for j in range(variables):
+                var = dataset.createVariable('var_%03d' % j, 'f4',
+                                             ('time', 'x'))
+                var.units = 'K'
+                var[0:10, :] = numpy.ones((10, 100))
+        paths.append(path)
+    return paths
+
+
+def read_with_netcdf4(path):
+    dataset = nc.Dataset(path, 'r')
+    try:
+        return read_global_attributes(dataset)
+    finally:
+        dataset.close()
+
+
+def main(count, variables):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_files(tmp_dir, count, variables)
+        print('%d files (NETCDF4, %d variables)' % (count, variables))
+        print('  %-32s %10s %14s' % ('', 'total [s]', 'per file [us]'))
+        for name, fun in [('netCDF4.Dataset', read_with_netcdf4),
+                          ('read_hdf5_global_attributes',
+                           read_hdf5_global_attributes)]:
+            # warm up the page cache
+            for path in paths:
+                fun(path)
+            t0 = time.perf_counter()
+            for path in paths:
+                fun(path)
+            t = time.perf_counter() - t0
+            print('  %-32s %10.3f %14.1f' % (name, t, t / count * 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1)
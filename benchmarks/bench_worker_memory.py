@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_worker_memory.py
+
+Measures the memory of the worker processes of `batch.check_many` with and
+without freezing the objects of the calling process (`gc.freeze`) before
+the workers are forked. Each worker checks all entries of `experiment_id`
+and `source_id` and runs a full garbage collection, as a long-running
+worker eventually does. The sum of the proportional set sizes (PSS, read
+from `/proc/<pid>/smaps_rollup`) of the workers is printed; pages shared
+copy-on-write with the calling process and the other workers are counted
+proportionally.
+
+usage: python benchmarks/bench_worker_memory.py [WORKERS]
+
+Linux only; the workers have to be forked. The package has to be installed
+(e.g. `pip install -e .`).
+'''
+
+import gc
+import sys
+import time
+
+from cc_plugin_cmip6_cv import batch
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
+
+
+def get_pss():
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1])
+
+
+def check_all(experiment_ids, source_ids):
+    checker = batch.__worker_state__['checker']
+    plan = batch.__worker_state__['plan']
+    for experiment_id, source_id in zip(experiment_ids, source_ids):
+        checker.execute_check_plan([], {'activity_id': 'CMIP',
+                                        'experiment_id': experiment_id,
+                                        'source_id': source_id}, plan)
+    gc.collect()
+    # wait until all workers are busy; each worker gets one task
+    time.sleep(0.5)
+    return get_pss()
+
+
+def measure(workers, plan, freeze):
+    cvs = {c.attribute: c.child_cvs for c in plan.checks
+           if c.attribute in ('experiment_id', 'source_id')}
+    experiment_ids = list(cvs['experiment_id'].keys())
+    source_ids = list(cvs['source_id'].keys())
+    source_ids = (source_ids * len(experiment_ids))[:len(experiment_ids)]
+    if freeze:
+        gc.freeze()
+    executor = batch._new_pool(workers, plan)
+    try:
+        futures = [executor.submit(check_all, experiment_ids, source_ids)
+                   for i in range(workers)]
+        return sum(f.result() for f in futures)
+    finally:
+        executor.shutdown()
+        gc.unfreeze()
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    plan = CMIP6CVBaseCheck().prepare_check_plan()
+    print('workers: %d' % workers)
+    print('  %-16s %12s' % ('', 'PSS [MiB]'))
+    for freeze in [False, True]:
+        pss = measure(workers, plan, freeze)
+        print('  %-16s %12.1f' % ('gc.freeze' if freeze else 'no gc.freeze',
+                                  pss / 1024))
+
+
+if __name__ == '__main__':
+    main()
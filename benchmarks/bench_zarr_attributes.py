@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+benchmarks/bench_zarr_attributes.py
+
+Times reading the global attributes of many Zarr stores with
+`zarr_header.read_zarr_global_attributes` (one JSON file), with
+`zarr.open_group` and with `xarray.open_zarr`. The stores are written into a
+temporary directory with consolidated metadata; each holds the global
+attributes of the test file of the package and VARIABLES variables.
+
+usage: python benchmarks/bench_zarr_attributes.py [STORES] [VARIABLES]
+                                                  [ZARR_FORMAT]
+
+The package, zarr and xarray have to be installed (e.g. `pip install -e .`
+and `pip install zarr xarray`).
+'''
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+import netCDF4 as nc
+import numpy
+import xarray
+import zarr
+
+from cc_plugin_cmip6_cv.zarr_header import read_zarr_global_attributes
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = os.path.join(os.path.dirname(__current_dir__),
+                             'cc_plugin_cmip6_cv', 'test', 'data',
+                             'example_file_cf_issue_212.nc')
+
+
+def write_stores(tmp_dir, count, variables, zarr_format):
+    with nc.Dataset(__test_file__) as dataset:
+        attributes = {name: dataset.getncattr(name)
+                      for name in dataset.ncattrs()}
+    attributes = {name: value.tolist() if hasattr(value, 'tolist') else value
+                  for name, value in attributes.items()}
+    paths = []
+    for i in range(count):
+        path = os.path.join(tmp_dir, 'store_%05d.zarr' % i)
+        group = zarr.open_group(path, mode='w', zarr_format=zarr_format)
+        group.attrs.update(attributes)
+        for j in range(variables):
+            array = group.create_array('var_%03d' % j, shape=(10, 100),
+                                       dtype='f4',
+                                       dimension_names=['time', 'x']
+                                       if zarr_format == 3 else None)
+            if zarr_format == 2:
+                array.attrs['_ARRAY_DIMENSIONS'] = ['time', 'x']
+            array.attrs['units'] = 'K'
+            array[:] = numpy.ones((10, 100))
+        zarr.consolidate_metadata(path)
+        paths.append(path)
+    return paths
+
+
+def read_with_zarr(path):
+    return dict(zarr.open_group(path, mode='r').attrs)
+
+
+def read_with_xarray(path):
+    with xarray.open_zarr(path) as dataset:
+        return dict(dataset.attrs)
+
+
+def main(count, variables, zarr_format):
+    warnings.simplefilter('ignore')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_stores(tmp_dir, count, variables, zarr_format)
+        print('%d stores (Zarr v%d, %d variables)' % (count, zarr_format,
+                                                       variables))
+        print('  %-32s %10s %14s' % ('', 'total [s]', 'per store [us]'))
+        for name, fun in [('xarray.open_zarr', read_with_xarray),
+                          ('zarr.open_group', read_with_zarr),
+                          ('read_zarr_global_attributes',
+                           read_zarr_global_attributes)]:
+            # warm up the page cache
+            for path in paths:
+                fun(path)
+            t0 = time.perf_counter()
+            for path in paths:
+                fun(path)
+            t = time.perf_counter() - t0
+            print('  %-32s %10.3f %14.1f' % (name, t, t / count * 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 2)
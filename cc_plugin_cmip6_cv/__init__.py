@@ -1,3 +1,29 @@
 from ._version import get_versions
 __version__ = get_versions()['version']
 del get_versions
+
+import importlib
+
+# objects re-exported from submodules; they are imported on first access
+# (see `__getattr__`) so that importing the package does not import
+# netCDF4, h5py or the compliance-checker
+#   key: name; value: submodule
+__lazy_exports__ = {'check_many': 'batch',
+                    'check_attributes': 'batch',
+                    'file_check_result': 'batch',
+                    'check_table': 'table_check',
+                    'table_check_result': 'table_check'}
+
+
+def __getattr__(name):
+    module = __lazy_exports__.get(name)
+    if module is None:
+        raise AttributeError('module ' + repr(__name__) + ' has no ' +
+                             'attribute ' + repr(name))
+    value = getattr(importlib.import_module(__name__+'.'+module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(__lazy_exports__))
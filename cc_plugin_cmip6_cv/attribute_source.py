@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+cc_plugin_cmip6_cv.attribute_source.py
+
+Sources of the global attributes which are checked against the CVs. The
+check engine (`cmip6_cv.CMIP6CVBaseCheck.execute_check_plan`) runs against
+a read-only mapping of global attribute name to value (an attribute
+source). Mappings (e.g. a `dict` of attributes which are not written into a
+file yet or the `dict` returned by `nc_header.read_file_global_attributes`)
+are used as they are; opened `netCDF4.Dataset`s are wrapped by
+`dataset_attributes`.
+'''
+
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import collections.abc
+import netCDF4 as nc
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+# types of objects which can be checked; see `get_attribute_source`
+__attribute_source_types__ = (nc._netCDF4.Dataset, collections.abc.Mapping)
+
+
+# ~~~~~~~~~~~~~~ class definitions ~~~~~~~~~~~~~~
+class dataset_attributes(collections.abc.Mapping):
+    """
+    Attribute source of an opened `netCDF4.Dataset`. The names of the global
+    attributes are read on creation (`ncattrs`); each value is read when it
+    is accessed for the first time (`getncattr`) and then kept. Hence, each
+    attribute is read at most once, and attributes which are not checked
+    are not read at all.
+
+    Note: `dataset.__dict__` is not used because it does not contain the
+    netCDF attributes for subclasses of `netCDF4.Dataset` (e.g. the
+    `MemoizedDataset` of the compliance-checker).
+    """
+
+    __slots__ = ('dataset', 'names', 'read_values')
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.names = dict.fromkeys(dataset.ncattrs())
+        self.read_values = {}
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        try:
+            return self.read_values[name]
+        except KeyError:
+            pass
+        if name not in self.names:
+            raise KeyError(name)
+        value = self.read_values[name] = self.dataset.getncattr(name)
+        return value
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def get_attribute_source(dataset):
+    """
+    Returns the attribute source of `dataset`: mappings of global attribute
+    name to value (e.g. `dict`) are returned unchanged; opened
+    `netCDF4.Dataset`s are wrapped by `dataset_attributes`.
+
+    @param dataset netCDF4.Dataset, opened, or mapping of its global
+                   attributes
+    @return collections.abc.Mapping
+    """
+    if isinstance(dataset, collections.abc.Mapping):
+        return dataset
+    if isinstance(dataset, nc._netCDF4.Dataset):
+        return dataset_attributes(dataset)
+    raise TypeError('attribute_source.get_attribute_source:: `dataset` has ' +
+                    'to be an opened netCDF4.Dataset or a mapping of global ' +
+                    'attributes, not `' + type(dataset).__name__ + '`')
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+cc_plugin_cmip6_cv.batch.py
+
+Checking many files against the CMIP6 CVs in parallel without going through
+the compliance-checker. The CVs are read and compiled into a check plan once
+in the calling process; the files are checked in a pool of worker processes.
+`check_attributes` checks global attributes given as `dict` (e.g. before
+they are written into a file).
+'''
+
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import collections
+import concurrent.futures
+import gc
+import itertools
+import os
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
+from cc_plugin_cmip6_cv.nc_header import read_file_global_attributes
+from cc_plugin_cmip6_cv.zarr_header import read_zarr_global_attributes
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+# number of files sent to a worker process at once
+__batch_chunk_size__ = 16
+# number of chunks per worker process which are submitted in advance
+__batch_chunks_per_worker__ = 4
+# checker and check plan of a worker process; set by `_init_worker` (also
+# by the first call of `check_attributes` in a process)
+__worker_state__ = {}
+
+
+# result of checking one file
+#   path: str; path of the checked file
+#   results: list of `compliance_checker.base.Result` or `None` on error
+#   error: str or `None`; description of the error if the file could not be
+#          checked
+file_check_result = collections.namedtuple('file_check_result',
+                                           ['path', 'results', 'error'])
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def _init_worker(plan):
+    __worker_state__['checker'] = CMIP6CVBaseCheck()
+    __worker_state__['plan'] = plan
+
+
+def _check_file(path, checker, plan):
+    # only the global attributes are read; the headers of classic files are
+    # parsed without netCDF4 (see `nc_header.read_file_global_attributes`)
+    # and directories are read as Zarr stores (see
+    # `zarr_header.read_zarr_global_attributes`); any error is reported for
+    # this file and does not stop the checking of the others
+    try:
+        if os.path.isdir(path):
+            attributes = read_zarr_global_attributes(path)
+        else:
+            attributes = read_file_global_attributes(path)
+    except Exception as e:
+        return file_check_result(path, None, type(e).__name__ + ': ' + str(e))
+
+    try:
+        results = checker.execute_check_plan([], attributes, plan)
+    except Exception as e:
+        return file_check_result(path, None, type(e).__name__ + ': ' + str(e))
+
+    return file_check_result(path, results, None)
+
+
+def _check_chunk(paths):
+    return [_check_file(path, __worker_state__['checker'],
+                        __worker_state__['plan'])
+            for path in paths]
+
+
+def _get_chunk_results(future, chunk):
+    # results of a chunk checked in the pool; if the chunk could not be
+    # checked (e.g. `BrokenProcessPool` because a worker process died), the
+    # error is reported for each of its files
+    try:
+        return future.result()
+    except Exception as e:
+        error = type(e).__name__ + ': ' + str(e)
+        return [file_check_result(path, None, error) for path in chunk]
+
+
+def _new_pool(workers, plan):
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                  initializer=_init_worker,
+                                                  initargs=(plan, ))
+
+
+def _split_into_chunks(paths, chunk_size):
+    paths = iter(paths)
+    while True:
+        chunk = [os.fspath(path)
+                 for path in itertools.islice(paths, chunk_size)]
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def check_attributes(attributes, plan=None):
+    """
+    Checks the global attributes `attributes` against the CMIP6 CVs and
+    returns the list of `compliance_checker.base.Result`s (one per check).
+    No file is needed; e.g. the attributes can be checked before they are
+    written into a file.
+
+    On the first call in a process, the CVs are updated (if due), read and
+    compiled into a check plan; later calls reuse this plan. Hence, a call
+    only performs the checks (and attributes with the same values as
+    checked before get the results from the verdict cache; see
+    `check_plan.verdict_cache`). The returned `Result`s must not be
+    modified.
+
+    @param attributes mapping (e.g. dict) of global attribute name to value
+                      or opened netCDF4.Dataset
+    @param plan check_plan (optional); plan to use instead of the plan of
+                the CMIP6 CVs of this process [None]
+    @return list of `compliance_checker.base.Result`
+    """
+    if plan is None:
+        if 'plan' not in __worker_state__:
+            _init_worker(CMIP6CVBaseCheck().prepare_check_plan())
+        plan = __worker_state__['plan']
+    elif 'checker' not in __worker_state__:
+        __worker_state__['checker'] = CMIP6CVBaseCheck()
+    return __worker_state__['checker'].execute_check_plan([], attributes,
+                                                          plan)
+
+
+def check_many(paths, workers=None, chunk_size=None):
+    """
+    Checks the global attributes of many netCDF files (or Zarr stores)
+    against the CMIP6 CVs and yields one `file_check_result` per file as
+    soon as it is available.
+    Results are not yielded in the order of `paths`.
+
+    The CVs are updated (if due), read and compiled only once in the calling
+    process. The files are distributed in chunks of `chunk_size` files to a
+    pool of `workers` processes. At most `__batch_chunks_per_worker__`
+    chunks per worker are submitted in advance; hence, `paths` may be a
+    (long) generator. Files which cannot be checked get a result with an
+    error; if a worker process dies, these are all files of the chunks
+    pending in the pool, and the remaining files are checked in a new
+    pool. While the pool exists, the objects of the calling process are
+    frozen (see `gc.freeze`) so that the workers keep sharing the CVs and
+    the plan.
+
+    @param paths iterable of str; paths of the netCDF files (or directories
+                 of Zarr stores) to check
+    @param workers int (optional); number of worker processes; if 1 (or
+                   less), the files are checked in the calling process; if
+                   `None`, one process per CPU is used [None]
+    @param chunk_size int (optional); number of files per chunk; defaults to
+                      `__batch_chunk_size__` [None]
+    @return generator of `file_check_result`
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = __batch_chunk_size__
+    if chunk_size < 1:
+        raise ValueError('batch.check_many:: `chunk_size` has to be positive')
+
+    # read CVs and compile them once
+    checker = CMIP6CVBaseCheck()
+    plan = checker.prepare_check_plan()
+
+    chunks = _split_into_chunks(paths, chunk_size)
+
+    # no pool for one worker
+    if workers <= 1:
+        for chunk in chunks:
+            for path in chunk:
+                yield _check_file(path, checker, plan)
+        return
+
+    max_pending = workers * __batch_chunks_per_worker__
+    # forked workers share the CVs and the plan copy-on-write; the garbage
+    # collector of a worker would copy their pages when it visits them
+    # (it writes into the object headers) unless they are frozen
+    unfreeze = gc.get_freeze_count() == 0
+    gc.freeze()
+    executor = _new_pool(workers, plan)
+    try:
+        # key: future; value: chunk
+        pending = {}
+        for chunk in chunks:
+            try:
+                future = executor.submit(_check_chunk, chunk)
+            except concurrent.futures.process.BrokenProcessPool:
+                # a worker process died; the chunks pending in the broken
+                # pool fail (see `_get_chunk_results`)
+                executor.shutdown()
+                executor = _new_pool(workers, plan)
+                future = executor.submit(_check_chunk, chunk)
+            pending[future] = chunk
+            if len(pending) >= max_pending:
+                done = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)[0]
+                for future in done:
+                    for result in _get_chunk_results(future,
+                                                     pending.pop(future)):
+                        yield result
+        for future in concurrent.futures.as_completed(list(pending)):
+            for result in _get_chunk_results(future, pending.pop(future)):
+                yield result
+    finally:
+        executor.shutdown()
+        if unfreeze:
+            gc.unfreeze()
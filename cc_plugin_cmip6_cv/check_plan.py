@@ -0,0 +1,466 @@
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import collections
+import collections.abc
+import threading
+from cc_plugin_cmip6_cv.cv_structure import cv_structure, \
+                                            should_process_all_cvs, \
+                                            __dict_types_for_cvs__
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+# kinds of children of an attribute check
+#   'struct': check the child CV against a child `cv_structure`
+#   'all': check all entries of the child CV (child CV has to be a dict)
+#   'all_if_dict': like 'all' but child CVs, which are no dict, are skipped
+__child_kinds__ = ('struct', 'all', 'all_if_dict')
+# cache of compiled check plans; see `get_check_plan` and
+# `get_all_check_plan`
+#   key: (id of cv_structure or of `None`, id of CVs, ignored CVs)
+#   value: (cv_structure, CVs, check_plan)
+__check_plan_cache__ = {}
+__check_plan_cache_size__ = 8
+__check_plan_cache_lock__ = threading.Lock()
+# cache of the results of executed check plans; see `verdict_cache`
+#   maximum number of cached verdicts; 0 disables the cache
+__verdict_cache_size__ = 4096
+
+
+# ~~~~~~~~~~~~~~ class definitions ~~~~~~~~~~~~~~
+class raising_predicate(object):
+    """
+    Predicate for checks which could not be compiled. The error, which was
+    thrown while compiling, is thrown again when the check is performed. Thus,
+    errors only show up for attributes which are actually checked.
+    """
+
+    __slots__ = ('error', )
+
+    def __init__(self, error):
+        self.error = error
+
+    def __call__(self, value):
+        raise self.error
+
+
+class attribute_check(object):
+    """
+    One check of a `check_plan`: the check of one global attribute.
+
+    `predicate` is `None` if only the existence of the attribute is checked.
+    Otherwise, it is called with the value of the attribute and returns
+    `True` or `False`. If the check succeeded and the attribute has children,
+    `get_child_plan` returns the plan for checking them.
+
+    Child plans are compiled once per value of the attribute and kept in
+    `child_plans`. A check belongs to the plan of one version of the CVs;
+    hence, the cached child plans are dropped together with the plan when
+    the CVs are updated. `child_plans` is not pickled.
+    """
+
+    __slots__ = ('attribute', 'predicate', 'child_kind', 'child_struct',
+                 'child_cvs', 'ignore_cvs', 'child_plans')
+
+    def __init__(self, attribute, predicate, child_kind=None,
+                 child_struct=None, child_cvs=None, ignore_cvs=()):
+        self.attribute = attribute
+        self.predicate = predicate
+        self.child_kind = child_kind
+        self.child_struct = child_struct
+        self.child_cvs = child_cvs
+        self.ignore_cvs = ignore_cvs
+        # compiled child plans; key: value of the attribute
+        self.child_plans = {}
+
+    def __getstate__(self):
+        return (self.attribute, self.predicate, self.child_kind,
+                self.child_struct, self.child_cvs, self.ignore_cvs)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def has_children(self):
+        return self.child_kind is not None
+
+    def get_child_plan(self, value):
+        """
+        Returns the `check_plan` for the children of this attribute when it
+        has the value `value` or `None` if there is nothing to check. The
+        plan is compiled on the first call for `value` and reused afterwards.
+
+        @param value value of the attribute; has to be valid
+        @return check_plan or None
+        """
+        try:
+            return self.child_plans[value]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable value => not cached
+            return self._compile_child_plan(value)
+        plan = self._compile_child_plan(value)
+        self.child_plans[value] = plan
+        return plan
+
+    def _compile_child_plan(self, value):
+        # no children or no child CVs => nothing to check
+        if self.child_kind is None or self.child_cvs is None:
+            return None
+
+        # If the parent CV is not dictionary then we cannot extract child
+        # CVs from it.
+        if not isinstance(self.child_cvs, __dict_types_for_cvs__):
+            if self.child_kind == 'all_if_dict':
+                return None
+            raise TypeError('check_plan.get_child_plan:: The provided cv_str' +
+                            'ucture indicated that nested CVs (children) sho' +
+                            'uld be processed. However, the processed CV has' +
+                            ' to be of type `dict` in order to be able to ob' +
+                            'tain child CVs from it. The CV for checking att' +
+                            'ribute ' + self.attribute + ' is meant.')
+
+        # get actual child CV
+        cvs_child = self.child_cvs[value]
+
+        if self.child_kind == 'struct':
+            return compile_check_plan(self.child_struct, cvs_child,
+                                      self.ignore_cvs)
+        # If the child cv we got is not a dict, we cannot proceed and skip
+        # checking this child.
+        if self.child_kind == 'all_if_dict' and \
+                not isinstance(cvs_child, __dict_types_for_cvs__):
+            return None
+        return compile_all_check_plan(cvs_child, self.ignore_cvs)
+
+
+class check_plan(object):
+    """
+    Immutable, compiled form of a `cv_structure` together with the CVs to
+    check against. It consists of one `attribute_check` per attribute in the
+    order in which the attributes are checked. A plan is built once per set
+    of CVs and can be used for any number of datasets.
+    """
+
+    __slots__ = ('checks', )
+
+    def __init__(self, checks):
+        self.checks = tuple(checks)
+
+    def get_attributes_to_check(self):
+        return tuple(check.attribute for check in self.checks)
+
+
+class attribute_recorder(collections.abc.Mapping):
+    """
+    Read-only view of an attribute source (mapping of global attributes;
+    see `attribute_source.get_attribute_source`) which records the names of
+    the attributes looked up via `in` and `[]` (in `read`) while a check
+    plan is executed.
+    """
+
+    __slots__ = ('attributes', 'read')
+
+    def __init__(self, attributes):
+        self.attributes = attributes
+        self.read = {}
+
+    def __contains__(self, name):
+        self.read[name] = None
+        return name in self.attributes
+
+    def __getitem__(self, name):
+        self.read[name] = None
+        return self.attributes[name]
+
+    def __iter__(self):
+        return iter(self.attributes)
+
+    def __len__(self):
+        return len(self.attributes)
+
+
+class verdict_cache(object):
+    """
+    LRU cache of the results of executing a `check_plan` on the global
+    attributes of a file. Files with the same values of the attributes read
+    by the plan get the same results. The plan belongs to one version of the
+    CVs; thus, updated CVs (new plan) do not hit old verdicts.
+
+    Which attributes are read depends on the values of the attributes of the
+    plan itself (child plans). Hence, the key has two parts: the values of
+    the plan's attributes and the values of the attributes read by the
+    child plans. The latter names are recorded (see `attribute_recorder`)
+    when the verdict is stored.
+
+    Values are keyed together with their type (e.g. `numpy.int32(1)` and
+    `1` are different). Files with unhashable values (e.g. arrays) are not
+    cached. At most `__verdict_cache_size__` verdicts are kept.
+    """
+
+    # marks attributes which do not exist
+    missing = object()
+
+    def __init__(self):
+        # key: (plan, values of the plan's attributes, values of the other
+        #       read attributes); value: tuple of results
+        self.verdicts = collections.OrderedDict()
+        # key: (plan, values of the plan's attributes); value: names of the
+        #      other read attributes
+        self.read_sets = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_values(self, names, attributes):
+        return tuple((type(v), v) for v in
+                     (attributes.get(n, self.missing) for n in names))
+
+    def get(self, plan, attributes):
+        """
+        Returns the stored results for `plan` and `attributes` or `None`.
+
+        @param plan check_plan
+        @param attributes mapping; global attributes of the file
+        @return tuple of results or None
+        """
+        try:
+            plan_key = (plan, self._get_values(plan.get_attributes_to_check(),
+                                               attributes))
+            with self.lock:
+                read_set = self.read_sets.get(plan_key)
+            key = None
+            if read_set is not None:
+                key = plan_key + (self._get_values(read_set, attributes), )
+            with self.lock:
+                verdict = self.verdicts.get(key) if key is not None else None
+                if verdict is None:
+                    self.misses += 1
+                    return None
+                self.verdicts.move_to_end(key)
+                self.hits += 1
+                return verdict
+        except TypeError:
+            # unhashable value
+            with self.lock:
+                self.misses += 1
+            return None
+
+    def put(self, plan, attributes, read, results):
+        """
+        Stores the results of executing `plan` on `attributes`.
+
+        @param plan check_plan
+        @param attributes mapping; global attributes of the file
+        @param read iterable of str; names of the attributes read by the plan
+                    and its child plans
+        @param results list of results
+        """
+        if __verdict_cache_size__ <= 0:
+            return
+        names = plan.get_attributes_to_check()
+        read_set = tuple(n for n in read if n not in names)
+        try:
+            plan_key = (plan, self._get_values(names, attributes))
+            key = plan_key + (self._get_values(read_set, attributes), )
+            hash(key)
+        except TypeError:
+            return
+        with self.lock:
+            self.read_sets[plan_key] = read_set
+            self.read_sets.move_to_end(plan_key)
+            self.verdicts[key] = tuple(results)
+            while len(self.verdicts) > __verdict_cache_size__:
+                self.verdicts.popitem(last=False)
+            while len(self.read_sets) > __verdict_cache_size__:
+                self.read_sets.popitem(last=False)
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self.verdicts),
+                    'hit_rate': self.hits / lookups if lookups > 0 else 0.0}
+
+    def clear(self):
+        with self.lock:
+            self.verdicts.clear()
+            self.read_sets.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# process-wide verdict cache; see `get_verdict_cache`
+__verdict_cache__ = verdict_cache()
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def get_verdict_cache():
+    """
+    Returns the process-wide `verdict_cache` or `None` if it is disabled
+    (`__verdict_cache_size__` is 0).
+    """
+    if __verdict_cache_size__ <= 0:
+        return None
+    return __verdict_cache__
+
+
+def get_verdict_cache_stats():
+    """
+    Returns the number of hits and misses of the process-wide verdict cache,
+    its hit rate and the number of cached verdicts.
+
+    @return dict with the keys 'hits', 'misses', 'hit_rate' and 'size'
+    """
+    return __verdict_cache__.get_stats()
+
+
+def clear_verdict_cache():
+    """
+    Removes all verdicts from the process-wide verdict cache and resets its
+    statistics.
+    """
+    __verdict_cache__.clear()
+
+
+def _compile_predicate(cv_struct, attribute, cvs, guess):
+    # Errors are thrown when the check is performed and not when it is
+    # compiled. See `raising_predicate`.
+    try:
+        return cv_struct.compile_check(attribute, cvs, guess)
+    except (TypeError, ValueError, KeyError, RuntimeError) as e:
+        return raising_predicate(e)
+
+
+def compile_check_plan(cv_struct, cvs, ignore_cvs=()):
+    """
+    Compiles the `cv_structure` `cv_struct` and the CVs `cvs` into a
+    `check_plan`. The plan performs the same checks as
+    `CMIP6CVBaseCheck.iterate_cv_structure`.
+
+    @param cv_struct cv_structure; defines how to check which attribute
+    @param cvs CVs to check against
+    @param ignore_cvs list or tuple of str; names of CVs not to check when
+                      all child CVs are checked automatically [()]
+    @return check_plan
+    """
+    ignore_cvs = tuple(ignore_cvs)
+    checks = []
+    for attribute in cv_struct.get_attributes_to_check():
+        # if there is no check-definition for `attribute`
+        # then we just check for its existence.
+        if not cv_struct.has_check_definition(attribute):
+            checks.append(attribute_check(attribute, None))
+            continue
+
+        predicate = _compile_predicate(cv_struct, attribute, cvs, True)
+
+        # check if there are attributes their values are somehow connected
+        # to the checked CV
+        child_kind = None
+        child_struct = None
+        child_cvs = None
+        if cv_struct.has_children(attribute):
+            # obtain variables to parse to the children processing
+            child_struct = cv_struct.get_children(attribute)
+            if isinstance(child_struct, cv_structure):
+                child_kind = 'struct'
+            elif should_process_all_cvs(child_struct):
+                child_kind = 'all'
+            # get raw child CV; we still need to extract the actual child CV
+            # from it
+            if cv_struct.has_cv(attribute):
+                child_cvs = cv_struct.get_cv(attribute)
+            elif isinstance(cvs, dict):
+                # get value of cv by `get` in order to provide default
+                child_cvs = cvs.get(attribute, None)
+
+        checks.append(attribute_check(attribute, predicate, child_kind,
+                                      child_struct, child_cvs, ignore_cvs))
+
+    return check_plan(checks)
+
+
+def compile_all_check_plan(cvs, ignore_cvs=()):
+    """
+    Compiles a `check_plan` which checks one attribute per entry in the CV
+    `cvs`; the attribute names are the keys of `cvs`. The plan performs the
+    same checks as `CMIP6CVBaseCheck.iterate_cv_all`.
+
+    @param cvs dict; CVs to check against
+    @param ignore_cvs list or tuple of str; names of CVs not to check [()]
+    @return check_plan
+    """
+    # The CVs have to be dictionaries. Otherwise, the automatic iteration of
+    # the CVs does not work because one would not know which attribute to
+    # check against each CV.
+    if not isinstance(cvs, dict):
+        raise TypeError('check_plan.compile_all_check_plan:: The CV(s) provi' +
+                        'ded via argument `cvs` have to be of type `dict`. O' +
+                        'ther types for CVs are not support by this function.')
+
+    ignore_cvs = tuple(ignore_cvs)
+    # Generate a cv_struct from the keys of the dictionary
+    autogen_cv_struct = cv_structure({attr: ['in', attr, None, '', False]
+                                      for attr in cvs.keys()
+                                      if attr not in ignore_cvs})
+
+    checks = []
+    for attribute in autogen_cv_struct.get_attributes_to_check():
+        predicate = _compile_predicate(autogen_cv_struct, attribute, cvs,
+                                       True)
+        # if cvs[attribute] is a dict, we can get the child CV
+        if isinstance(cvs[attribute], __dict_types_for_cvs__):
+            checks.append(attribute_check(attribute, predicate, 'all_if_dict',
+                                          None, cvs[attribute], ignore_cvs))
+        else:
+            checks.append(attribute_check(attribute, predicate))
+
+    return check_plan(checks)
+
+
+def get_check_plan(cv_struct, cvs, ignore_cvs=()):
+    """
+    Returns the `check_plan` for `cv_struct` and `cvs` (see
+    `compile_check_plan`). Plans are cached and reused as long as the same
+    `cv_structure` and CV objects are passed. Hence, the CVs must not be
+    modified after a plan was built for them.
+
+    @param cv_struct cv_structure; defines how to check which attribute
+    @param cvs CVs to check against
+    @param ignore_cvs list or tuple of str; names of CVs not to check when
+                      all child CVs are checked automatically [()]
+    @return check_plan
+    """
+    return _get_cached_plan(cv_struct, cvs, ignore_cvs, compile_check_plan)
+
+
+def get_all_check_plan(cvs, ignore_cvs=()):
+    """
+    Returns the `check_plan` which checks one attribute per entry in the CV
+    `cvs` (see `compile_all_check_plan`). Plans are cached like in
+    `get_check_plan`.
+
+    @param cvs dict; CVs to check against
+    @param ignore_cvs list or tuple of str; names of CVs not to check [()]
+    @return check_plan
+    """
+    return _get_cached_plan(None, cvs, ignore_cvs,
+                            lambda cv_struct, cvs, ignore_cvs:
+                            compile_all_check_plan(cvs, ignore_cvs))
+
+
+def _get_cached_plan(cv_struct, cvs, ignore_cvs, compile_fun):
+    key = (id(cv_struct), id(cvs), tuple(ignore_cvs))
+    with __check_plan_cache_lock__:
+        entry = __check_plan_cache__.get(key)
+    if (entry is not None and entry[0] is cv_struct and entry[1] is cvs):
+        return entry[2]
+
+    plan = compile_fun(cv_struct, cvs, ignore_cvs)
+
+    with __check_plan_cache_lock__:
+        # drop the oldest plans
+        while len(__check_plan_cache__) >= __check_plan_cache_size__:
+            __check_plan_cache__.pop(next(iter(__check_plan_cache__)))
+        __check_plan_cache__[key] = (cv_struct, cvs, plan)
+
+    return plan
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+cc_plugin_cmip6_cv.cli.py
+
+Command line interface `cmip6-cv-check` for checking directory trees of
+netCDF files and Zarr stores against the CMIP6 CVs. One JSON object per
+file (or store) is written to stdout (JSON lines).
+'''
+
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import argparse
+import json
+import os
+import sys
+from cc_plugin_cmip6_cv.batch import check_many, __batch_chunk_size__
+from cc_plugin_cmip6_cv.zarr_header import is_zarr_store
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+__default_suffix__ = '.nc'
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def walk_tree(paths, suffix=__default_suffix__):
+    """
+    Yields all files in the directory trees `paths` whose names end with
+    `suffix` and all Zarr stores (directories holding the metadata of the
+    root of a store; see `zarr_header.is_zarr_store`) independent of their
+    names. Zarr stores are not traversed. Directories are traversed with
+    `os.scandir`; symbolic links to directories are not followed. Paths of
+    files are yielded as they are.
+
+    @param paths iterable of str; files or directories
+    @param suffix str; suffix of the files to yield ['.nc']
+    @return generator of str
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError as e:
+                sys.stderr.write('cmip6-cv-check: ' + str(e) + '\n')
+                continue
+            with entries:
+                entries = list(entries)
+            # Zarr store
+            if is_zarr_store(directory, [entry.name for entry in entries]):
+                yield directory
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(suffix):
+                    yield entry.path
+
+
+def result_to_dict(file_result, all_results=False):
+    """
+    Converts a `batch.file_check_result` into a JSON-serializable dict.
+
+    @param file_result batch.file_check_result
+    @param all_results bool; list all checks and not only the failed ones
+                       [False]
+    @return dict
+    """
+    output = {'path': file_result.path, 'error': file_result.error}
+    if file_result.results is None:
+        return output
+
+    output['checks'] = len(file_result.results)
+    output['passed'] = sum(1 for r in file_result.results if r.value)
+    output['failed'] = [{'name': r.name, 'msgs': r.msgs}
+                        for r in file_result.results if not r.value]
+    if all_results:
+        output['results'] = [{'name': r.name, 'value': bool(r.value),
+                              'msgs': r.msgs}
+                             for r in file_result.results]
+    return output
+
+
+def _positive_int(value):
+    # type of the argument `--chunk-size`
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError('has to be a positive integer: ' +
+                                         value)
+    return number
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='cmip6-cv-check',
+        description='Check the global attributes of netCDF files and Zarr s' +
+                    'tores against the CMIP6 controlled vocabularies. One JS' +
+                    'ON object per file is written to stdout.')
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help='netCDF file, Zarr store or directory tree to ' +
+                             'check')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes (default: number ' +
+                             'of CPUs)')
+    parser.add_argument('--chunk-size', type=_positive_int,
+                        default=__batch_chunk_size__,
+                        help='number of files sent to a worker at once ' +
+                             '(default: %(default)s)')
+    parser.add_argument('--suffix', default=__default_suffix__,
+                        help='suffix of the files to check in directories ' +
+                             '(default: %(default)s)')
+    parser.add_argument('--all-results', action='store_true',
+                        help='write all checks and not only the failed ones')
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of `cmip6-cv-check`.
+
+    @param argv list of str (optional); command line arguments; defaults to
+                `sys.argv[1:]` [None]
+    @return int; 0 if all files passed all checks, 1 if at least one check
+                 failed and 2 if at least one file could not be checked
+    """
+    args = get_parser().parse_args(argv)
+
+    status = 0
+    try:
+        for file_result in check_many(walk_tree(args.paths, args.suffix),
+                                      workers=args.workers,
+                                      chunk_size=args.chunk_size):
+            output = result_to_dict(file_result, args.all_results)
+            sys.stdout.write(json.dumps(output) + '\n')
+            if file_result.error is not None:
+                status = 2
+            elif status == 0 and len(output['failed']) > 0:
+                status = 1
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # output was closed by the reader (e.g. `| head`)
+        sys.stderr.close()
+        return status
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,15 +17,23 @@ from __future__ import (absolute_import, division, print_function)
 from compliance_checker import __version__
 from compliance_checker.base import BaseNCCheck, BaseCheck, Result
 from cc_plugin_cmip6_cv.cv_structure import cv_structure, \
-                                            should_process_all_cvs, \
                                             __allowed_types_for_cvs__
-from cc_plugin_cmip6_cv.util import read_cmip6_json_cv, update_cmip6_json_cv, \
+from cc_plugin_cmip6_cv.check_plan import get_check_plan, \
+                                          get_all_check_plan, \
+                                          get_verdict_cache, \
+                                          attribute_recorder
+from cc_plugin_cmip6_cv.cv_snapshot import read_cmip6_json_cv_snapshot
+from cc_plugin_cmip6_cv.attribute_source import get_attribute_source, \
+                                                __attribute_source_types__
+from cc_plugin_cmip6_cv.util import update_cmip6_json_cv_if_due, \
                                     data_directory_collection, accepts
 from cc_plugin_cmip6_cv.cmip6_constants import __cmip6_cv_struct_dict__, \
                                                __cmip6_cv_ignore__
+from cc_plugin_cmip6_cv import util
 
+import os
 import sys
-import netCDF4 as nc
+import time
 
 
 class CMIP6CVBaseCheck(BaseCheck):
@@ -42,144 +50,124 @@ class CMIP6CVBaseCheck(BaseCheck):
     # some default environment variables
     __default_dir_env_vars__ = {'cmip6_json': 'CMIP6_JSON_PATH'}
 
+    # cv_structure built from `__cmip6_cv_struct_dict__`; see
+    # `get_cv_structure`
+    __cv_struct__ = None
+    # check plans prepared by this process for updated data directories;
+    # see `prepare_check_plan`
+    #   key: (_cc_spec, value of the env var of the data directory)
+    #   value: (`time.monotonic()` of the last update check, data directory,
+    #           check plan)
+    __check_plans__ = {}
+
     def __init__(self):
         super(CMIP6CVBaseCheck, self).__init__()
 
-    def check_cvs(self, ds):
+    @classmethod
+    def get_cv_structure(cls):
+        """
+        Returns the `cv_structure` of the CMIP6 CVs. It is built and
+        validated only once.
+        """
+        if CMIP6CVBaseCheck.__cv_struct__ is None:
+            CMIP6CVBaseCheck.__cv_struct__ = \
+                cv_structure(__cmip6_cv_struct_dict__)
+        return CMIP6CVBaseCheck.__cv_struct__
+
+    def prepare_check_plan(self):
+        """
+        Updates (if due) and reads the CMIP6 CVs and returns the check plan
+        for them. The JSON files are read and the plan is compiled once per
+        process and set of CVs (see `cv_snapshot.read_cmip6_json_cv_snapshot`).
+
+        If the CVs are updated, the plan is kept in this process and
+        returned without touching the file system for
+        `util.__update_check_interval__` after the last check for CV updates
+        (see `util.update_cmip6_json_cv_if_due`); `util.reset_update_check`
+        also discards it. Otherwise (e.g. if the CV directory is set via an
+        environment variable), the plan is reused as long as the CV files
+        are not modified, which is checked via `os.stat` on each call.
+
+        @return: check_plan
+        """
+        envvar = self.__default_dir_env_vars__['cmip6_json']
+        cache_key = (self._cc_spec, os.environ.get(envvar))
+        entry = CMIP6CVBaseCheck.__check_plans__.get(cache_key)
+        if entry is not None:
+            check_time, data_dir, plan = entry
+            if (time.monotonic() - check_time <
+                    util.__update_check_interval__.total_seconds() and
+                    util.__last_update_check__.get(data_dir) == check_time):
+                return plan
+
         # get CV structure to check
-        my_cv_structure = cv_structure(__cmip6_cv_struct_dict__)
+        my_cv_structure = self.get_cv_structure()
         needed_cvs = my_cv_structure.get_cv_names_needed()
 
         # determine directory
         my_cv_directory_collection = data_directory_collection(
-            self.__default_dir_env_vars__['cmip6_json'],
-            self._cc_spec, 'cc')
+            envvar, self._cc_spec, 'cc')
 
-        # update CVs if update necessary
+        # update CVs if update necessary; this is checked only once per
+        # `util.__update_check_interval__` and not for each dataset
+        check_time = None
         if my_cv_directory_collection.__do_update__:
-            update_cmip6_json_cv(needed_cvs, my_cv_directory_collection)
+            update_cmip6_json_cv_if_due(needed_cvs, my_cv_directory_collection)
+            data_dir = my_cv_directory_collection.__data_dir__
+            check_time = util.__last_update_check__.get(data_dir)
+
+        # get CVs and the check plan; they are reused as long as the JSON
+        # files are not modified
+        cvs, plan = read_cmip6_json_cv_snapshot(needed_cvs,
+                                                my_cv_directory_collection,
+                                                my_cv_structure,
+                                                __cmip6_cv_ignore__)
+        if check_time is not None:
+            CMIP6CVBaseCheck.__check_plans__[cache_key] = (check_time,
+                                                           data_dir, plan)
+        return plan
 
-        # get CVs
-        cvs = read_cmip6_json_cv(needed_cvs, my_cv_directory_collection)
+    def check_cvs(self, ds):
+        # get the check plan
+        plan = self.prepare_check_plan()
         # initialize further things
         results = []
         # Usage of `results` in the called functions:
         #   results.append([Result(BaseCheck.MEDIUM, check, 'blub', ['blab'])])
-        results = self.iterate_cv_structure(results, ds, my_cv_structure, cvs)
+        results = self.execute_check_plan(results, ds, plan)
 
         return results
 
-    @accepts(None, list, nc._netCDF4.Dataset, cv_structure,
+    @accepts(None, list, __attribute_source_types__, cv_structure,
              __allowed_types_for_cvs__, list)
     def iterate_cv_structure(self, results, dataset, cv_struct, cvs,
                              parent_attribute_tree=[]):
         """
-        @param dataset: netCDF4 file, opened
-        """
-
-        my_name = sys._getframe().f_code.co_name
-        test_name_base_prefix = 'checking global attribute `'
-        test_name_base_suffix = '` against CV'
-
-        for attribute in cv_struct.get_attributes_to_check():
-            test_name_base = (test_name_base_prefix + attribute +
-                              test_name_base_suffix)
-            this_attribute_tree = parent_attribute_tree.copy()
-            this_attribute_tree.append(attribute)
-            # print(attribute)
-            # check value of attribute for presence in Dataset
-            if (hasattr(dataset, attribute)):
-                # if there is no check-definitino for `attribute`
-                # then we just check for its existence.
-                if not cv_struct.has_check_definition(attribute):
-                    results.append(Result(BaseCheck.HIGH, True, test_name_base,
-                                          ['attribute `' + attribute + '` no' +
-                                           't present in netCDF file; hierar' +
-                                           'chy of CVs checked: ' +
-                                           ' -> '.join(this_attribute_tree)]))
-                    continue
-
-                # else ... do more!
-                attr_correct = cv_struct.check_cv(attribute, cvs,
-                                                  getattr(dataset, attribute),
-                                                  guess=True)
-                results.append(Result(BaseCheck.HIGH, attr_correct,
-                                      test_name_base,
-                                      ['attribute `' + attribute + '` with ' +
-                                       'value "' +
-                                       str(getattr(dataset, attribute)) +
-                                       '" not present in CV; hierarchy of' +
-                                       ' CVs checked: ' +
-                                       ' -> '.join(this_attribute_tree)]))
+        Checks the global attributes of `dataset` as defined by `cv_struct`
+        against `cvs`. The check plan of `cv_struct` and `cvs` is compiled
+        once and then reused (see `check_plan.get_check_plan`).
 
-                # check if:
-                #   * there are attributes their values are somehow connected
-                #      to the checked CV and
-                #   * attr_correct is True => then we can extract child CVs
-                if (cv_struct.has_children(attribute) and attr_correct):
-                    # print('  has children!')
-                    # obtain variables to parse to the children processing
-                    cv_struct_child = cv_struct.get_children(attribute)
-                    # get raw child CV; we still need to extract the actual
-                    # child CV from it
-                    if cv_struct.has_cv(attribute):
-                        cvs_child_raw = cv_struct.get_cv(attribute)
-                    else:
-                        # get value of cv by `get` in order to provide default
-                        cvs_child_raw = cvs.get(attribute, None)
-                    # If the raw child cv we got is empty, then we skip
-                    # checking this child.
-                    if cvs_child_raw is None:
-                        continue
-                    # If the parent CV is not dictionary then we cannot extract
-                    # child CVs from it.
-                    if not isinstance(cvs_child_raw, dict):
-                        raise TypeError(self._cc_spec + '.' + my_name + ': T' +
-                                        'he provided cv_structure indicated ' +
-                                        'that nested CVs (children) should b' +
-                                        'e processed. However, the processed' +
-                                        ' CV has to be of type `dict` in ord' +
-                                        'er to be able to obtain child CVs f' +
-                                        'rom it. The CV for checking attribu' +
-                                        'te ' + attribute + ' is meant.')
-                    # get actual child CV
-                    cvs_child = cvs_child_raw[getattr(dataset, attribute)]
-
-                    if (isinstance(cv_struct_child, cv_structure)):
-                        # print('   child has cv_structure')
-                        results = self.iterate_cv_structure(results, dataset,
-                                                            cv_struct_child,
-                                                            cvs_child,
-                                                            this_attribute_tree
-                                                            )
-                    else:
-                        # print('   child has no cv_structure')
-                        if (should_process_all_cvs(cv_struct_child)):
-                            results = self.iterate_cv_all(results, dataset,
-                                                          cvs_child,
-                                                          this_attribute_tree,
-                                                          __cmip6_cv_ignore__)
-
-            else:
-                results.append(Result(BaseCheck.HIGH, False, test_name_base,
-                                      ['attribute `' + attribute + '` not ' +
-                                       'present in netCDF file; hierarchy of' +
-                                       ' CVs checked: ' +
-                                       ' -> '.join(this_attribute_tree)]))
-
-        return results
+        @param dataset: netCDF4 file, opened, or mapping of its global
+                        attributes (see `attribute_source`)
+        """
+        plan = get_check_plan(cv_struct, cvs, __cmip6_cv_ignore__)
+        return self.execute_check_plan(results, dataset, plan,
+                                       parent_attribute_tree)
 
-    @accepts(None, list, nc._netCDF4.Dataset,
+    @accepts(None, list, __attribute_source_types__,
              __allowed_types_for_cvs__, list, list)
     def iterate_cv_all(self, results, dataset, cvs,
                        parent_attribute_tree=[], ignore_cvs=[]):
         """
-        @param dataset: netCDF4 file, opened
+        Checks one global attribute of `dataset` per entry of `cvs` (see
+        `check_plan.compile_all_check_plan`). The check plan is compiled once
+        per CV object (see `check_plan.get_all_check_plan`).
+
+        @param dataset: netCDF4 file, opened, or mapping of its global
+                        attributes (see `attribute_source`)
         """
 
         my_name = sys._getframe().f_code.co_name
-        test_name_base_prefix = 'checking global attribute `'
-        test_name_base_suffix = '` against CV'
 
         # The CVs have to be dictionaries. Otherwise, the automatic iteration
         # of the CVs does not work because one would not know which attribute
@@ -190,50 +178,98 @@ class CMIP6CVBaseCheck(BaseCheck):
                             'ct`. Other types for CVs are not support by thi' +
                             's function.')
 
-        # Generate a cv_struct from the keys of the dictionary
-        autogen_cv_struct = cv_structure({attr: ['in', attr, None, '', False]
-                                          for attr in cvs.keys()
-                                          if attr not in ignore_cvs})
+        plan = get_all_check_plan(cvs, ignore_cvs)
+        return self.execute_check_plan(results, dataset, plan,
+                                       parent_attribute_tree)
+
+    def execute_check_plan(self, results, dataset, plan,
+                           parent_attribute_tree=[]):
+        """
+        Performs the checks of the compiled `plan` on the global attributes
+        of `dataset` and appends one `Result` per check to `results`. The
+        checks, including those of the child plans, are performed on the
+        attribute source of `dataset` (see
+        `attribute_source.get_attribute_source`); each global attribute of a
+        `netCDF4.Dataset` is read at most once.
+
+        Files with the same values of the attributes read by `plan` get the
+        same results. They are taken from the verdict cache (see
+        `check_plan.verdict_cache`); the cached `Result`s are shared between
+        the files and must not be modified.
+
+        @param results: list; results are appended to it
+        @param dataset: netCDF4 file, opened, or mapping of its global
+                        attributes (see `attribute_source`)
+        @param plan: check_plan
+        @param parent_attribute_tree: list of str; names of the parent
+                                      attributes of the checked attributes
+        @return: results
+        """
+        # mapping of the global attributes
+        attributes = get_attribute_source(dataset)
+
+        cache = get_verdict_cache()
+        if cache is None or len(parent_attribute_tree) > 0:
+            return self._execute_check_plan(results, attributes, plan,
+                                            parent_attribute_tree)
+
+        verdict = cache.get(plan, attributes)
+        if verdict is not None:
+            results.extend(verdict)
+            return results
+
+        # record which attributes are read by the plan and its child plans
+        recorder = attribute_recorder(attributes)
+        new_results = self._execute_check_plan([], recorder, plan,
+                                               parent_attribute_tree)
+        cache.put(plan, attributes, recorder.read, new_results)
+        results.extend(new_results)
+        return results
 
-        # Iterate generated CV Structure; all `attributes` are in `cvs`
-        # because we generated the cv_structure from the keys of `cvs`.
-        for attribute in autogen_cv_struct.get_attributes_to_check():
+    def _execute_check_plan(self, results, attributes, plan,
+                            parent_attribute_tree):
+        test_name_base_prefix = 'checking global attribute `'
+        test_name_base_suffix = '` against CV'
+
+        for check in plan.checks:
+            attribute = check.attribute
             test_name_base = (test_name_base_prefix + attribute +
                               test_name_base_suffix)
             this_attribute_tree = parent_attribute_tree.copy()
             this_attribute_tree.append(attribute)
-            # print(attribute)
             # check value of attribute for presence in Dataset
-            if (hasattr(dataset, attribute)):
-                attr_correct = autogen_cv_struct.check_cv(attribute, cvs,
-                                                          getattr(dataset,
-                                                                  attribute),
-                                                          guess=True)
+            if (attribute in attributes):
+                # if there is no check-definitino for `attribute`
+                # then we just check for its existence.
+                if check.predicate is None:
+                    results.append(Result(BaseCheck.HIGH, True, test_name_base,
+                                          ['attribute `' + attribute + '` no' +
+                                           't present in netCDF file; hierar' +
+                                           'chy of CVs checked: ' +
+                                           ' -> '.join(this_attribute_tree)]))
+                    continue
+
+                # else ... do more!
+                value = attributes[attribute]
+                attr_correct = check.predicate(value)
                 results.append(Result(BaseCheck.HIGH, attr_correct,
                                       test_name_base,
                                       ['attribute `' + attribute + '` with ' +
-                                       'value "' +
-                                       str(getattr(dataset, attribute)) +
+                                       'value "' + str(value) +
                                        '" not present in CV; hierarchy of' +
                                        ' CVs checked: ' +
                                        ' -> '.join(this_attribute_tree)]))
 
                 # check if:
-                #   * cvs[attribute] is a dict => we can get the value of key
-                #                                 getattr(dataset, attribute)
+                #   * there are attributes their values are somehow connected
+                #      to the checked CV and
                 #   * attr_correct is True => then we can extract child CVs
-                if (isinstance(cvs[attribute], dict) and attr_correct):
-                    # print('  has children!')
-                    # get child CV
-                    cvs_child = cvs[attribute][getattr(dataset, attribute)]
-                    # If the child cv we got is not a dict, we cannot
-                    # proceed and skip checking this child.
-                    if not isinstance(cvs_child, dict):
-                        continue
-                    
-                    results = self.iterate_cv_all(results, dataset, cvs_child,
-                                                  this_attribute_tree,
-                                                  ignore_cvs)
+                if (check.has_children() and attr_correct):
+                    child_plan = check.get_child_plan(value)
+                    if child_plan is not None:
+                        results = self._execute_check_plan(
+                            results, attributes, child_plan,
+                            this_attribute_tree)
 
             else:
                 results.append(Result(BaseCheck.HIGH, False, test_name_base,
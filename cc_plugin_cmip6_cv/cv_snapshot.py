@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+cc_plugin_cmip6_cv.cv_snapshot.py
+
+The validated and compacted CMIP6 CVs of the current snapshot of a data
+directory (see `util.publish_snapshot`) and the check plan compiled from
+them. Both are kept per process and data directory; they are loaded and
+compiled again only if a source JSON file or the `cv_structure` changes.
+Nothing is written to disk.
+'''
+
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import hashlib
+import os
+import threading
+from cc_plugin_cmip6_cv.check_plan import compile_check_plan
+from cc_plugin_cmip6_cv.util import read_json_cv, get_snapshot_dir, \
+                                    compact_cvs, find_cmip6_json_cv_files, \
+                                    warn_cmip6_json_cv_fallbacks
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+# CVs loaded by this process; see `read_cmip6_json_cv_snapshot`
+#   key: data directory
+#   value: (file keys of the source files, digest of the cv_structure, CVs,
+#           check plan, CVs read from the fall-back directory)
+__loaded_cv_snapshots__ = {}
+__loaded_cv_snapshots_lock__ = threading.Lock()
+# digests of cv_structures; see `get_cv_structure_digest`
+#   key: (id of cv_structure, ignored CVs)
+#   value: (cv_structure, digest)
+__cv_structure_digests__ = {}
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def get_cv_structure_digest(cv_struct, ignore_cvs=()):
+    """
+    Returns a digest of `cv_struct` and `ignore_cvs`. The loaded CVs and
+    their check plan are only reused for the same digest. The digest is
+    computed once per `cv_structure` object.
+
+    @param cv_struct cv_structure
+    @param ignore_cvs list or tuple of str [()]
+    @return str
+    """
+    key = (id(cv_struct), tuple(ignore_cvs))
+    entry = __cv_structure_digests__.get(key)
+    if entry is not None and entry[0] is cv_struct:
+        return entry[1]
+    digest = hashlib.sha256(repr((cv_struct,
+                                  tuple(ignore_cvs))).encode()).hexdigest()
+    __cv_structure_digests__[key] = (cv_struct, digest)
+    return digest
+
+
+def read_cmip6_json_cv_snapshot(cv_name, dst_dir_coll, cv_struct,
+                                ignore_cvs=()):
+    """
+    Returns the CMIP6 CVs `cv_name` (see `util.read_cmip6_json_cv`) of the
+    current snapshot of the data directory of `dst_dir_coll` and the check
+    plan for them (see `check_plan.compile_check_plan`).
+
+    Within a process, the JSON files are read and the plan is compiled only
+    once per data directory as long as the source files (compared by path,
+    modification time, size and inode) and `cv_struct` do not change. The
+    warnings about CVs read from the fall-back directory are issued on each
+    call.
+
+    The entries of the CVs are compacted (see `util.compact_cvs`): their
+    fields in `ignore_cvs` are dropped because they are never checked.
+
+    @param cv_name str or list of str; names of the CVs
+    @param dst_dir_coll util.data_directory_collection
+    @param cv_struct cv_structure; structure to compile the plan from
+    @param ignore_cvs list or tuple of str; see `compile_check_plan`; also
+                      dropped from the CV entries [()]
+    @return tuple (CVs, check_plan)
+    """
+    cv_names = [cv_name] if isinstance(cv_name, str) else list(cv_name)
+    key = dst_dir_coll.__data_dir__
+    # source files in the pinned snapshot of the data directory; this is
+    # done on each call, hence their keys are like `util.get_file_cache_key`
+    # but without resolving the paths (`os.stat` follows symbolic links)
+    data_dir = get_snapshot_dir(dst_dir_coll.__data_dir__)
+    file_keys = []
+    for n in cv_names:
+        if not isinstance(n, str):
+            continue
+        file_name = data_dir+'/CMIP6_'+n+'.json'
+        try:
+            stat_result = os.stat(file_name)
+        except OSError:
+            file_keys.append(None)
+            continue
+        file_keys.append((file_name, stat_result.st_mtime_ns,
+                          stat_result.st_size, stat_result.st_ino))
+    file_keys = tuple(file_keys)
+    cv_struct_digest = get_cv_structure_digest(cv_struct, ignore_cvs)
+
+    # CVs already loaded and source files unchanged
+    with __loaded_cv_snapshots_lock__:
+        entry = __loaded_cv_snapshots__.get(key)
+    if (entry is not None and entry[0] == file_keys and
+            entry[1] == cv_struct_digest):
+        warn_cmip6_json_cv_fallbacks(entry[4])
+        return entry[2], entry[3]
+
+    file_name, fallbacks = find_cmip6_json_cv_files(cv_names, dst_dir_coll)
+    warn_cmip6_json_cv_fallbacks(fallbacks)
+    cvs = compact_cvs(read_json_cv(file_name) if file_name else {},
+                      ignore_cvs)
+    plan = compile_check_plan(cv_struct, cvs, ignore_cvs)
+
+    with __loaded_cv_snapshots_lock__:
+        __loaded_cv_snapshots__[key] = (file_keys, cv_struct_digest, cvs,
+                                        plan, fallbacks)
+    return cvs, plan
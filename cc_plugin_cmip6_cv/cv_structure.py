@@ -3,7 +3,8 @@ import functools
 import sys
 import inspect
 import re
-from cc_plugin_cmip6_cv.util import isinstance_recursive_tuple, accepts
+from cc_plugin_cmip6_cv.util import isinstance_recursive_tuple, accepts, \
+                                    __validation_state__, lazy_cv
 
 
 # ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
@@ -18,6 +19,30 @@ __content__version_metadata__ = {"CV_collection_modified": str,
                                  "specs_doc": str}
 __allowed_types_for_cvs__ = (dict, list, str, int, float, type, tuple,
                              type(None))
+# types of CVs which are treated as `dict`; lazily loaded CVs are read-only
+# mappings (see `util.lazy_cv`)
+__dict_types_for_cvs__ = (dict, lazy_cv)
+# regular expressions to convert the CMIP6 license CV into a regex
+# NOTE: The CMIP6 CV contains a pseudo-regex of the license text. We need to
+#       convert it into a proper python-regex, first. See
+#       `convert_cv_to_regex`.
+#  replace tags like `<TEXT>`
+__regex_tag01__ = re.compile(r'<[^<>]*>')
+#  replace tags like `[TEXT]`
+__regex_tag02__ = re.compile(r'[-]?\[[^[\]]*\]')
+#  replace URLs starting with `https://` or `http://`
+__regex_url__ = re.compile(r'http[s]:\/\/[^\s\)]*')
+#  replace words with underscore
+__regex_underscore__ = re.compile(r'[a-zA-Z0-9]+(_[a-zA-Z0-9]+)+')
+#  replace parenthese
+__regex_parentheses_open__ = re.compile(r'\(')
+__regex_parentheses_close__ = re.compile(r'\)')
+# maximum number of CVs for which the converted regex is kept
+__regex_cache_size__ = 64
+# cache of membership indices; see `get_membership_index`
+#   key: (CV name, name of preprocessing function)
+#   value: instance of `cv_membership_index`
+__membership_index_cache__ = {}
 
 
 # ~~~~~~~~~~~~~~ decorators ~~~~~~~~~~~~~~
@@ -70,12 +95,21 @@ def validate_argument_attribute(arg_name__cv_struct):
                                 'with `str` but it is list filled with `%s`.' %
                                 (my_name, type(val).__name__))
 
+        # get argument names; the signature of `func` is analysed only once
+        arg_names = [param.name
+                     for param
+                     in inspect.signature(func).parameters.values()]
+
+        # validation switched off by environment variable => no wrapper
+        if not __validation_state__['decorate']:
+            return func
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # get argument names
-            arg_names = [param.name
-                         for param
-                         in inspect.signature(func).parameters.values()]
+            # validation switched off by `util.set_validation_level`
+            if not __validation_state__['enabled']:
+                return func(*args, **kwargs)
+
             # collect args and kwargs in one dict
             new_kwargs = dict(zip(arg_names[0:len(args)], args))
             new_kwargs.update(kwargs)
@@ -520,24 +554,14 @@ class cv_structure(dict):
         # Let the other functions to the work
         return self.convert_cv_prepare_fun(self[attribute][3])
 
-    # Carsten: __allowed_types_for_cvs__, welche muessten da rein?
-    @accepts(None, str, __allowed_types_for_cvs__, bool)
-    @validate_argument_attribute('self')
-    def extract_cv(self, attribute, cvs, guess=False):
+    def _extract_raw_cv(self, attribute, cvs, guess=False):
         """
-        Return a list of values
-
-        TODO: describe behaviour!!!
-
+        Returns the CV for `attribute` as provided via `self` or `cvs` without
+        applying the preprocessing function. See `extract_cv` for details.
+        Arguments are expected to be validated by the caller.
         """
         # get this function's name
-        my_name = sys._getframe().f_code.co_name
-
-        # If self has no check_definitino for `attribute`
-        #  (meaning that only the existance of the attribute should be tested)
-        #  then return None
-        if not self.has_check_definition(attribute):
-            return None
+        my_name = 'extract_cv'
 
         # Get name of the cv ...
         cv_name = self[attribute][1]
@@ -612,9 +636,51 @@ class cv_structure(dict):
                         # store return value
                         raw_return_val = cvs
 
+        return raw_return_val
+
+    # Carsten: __allowed_types_for_cvs__, welche muessten da rein?
+    @accepts(None, str, __allowed_types_for_cvs__, bool)
+    @validate_argument_attribute('self')
+    def extract_cv(self, attribute, cvs, guess=False):
+        """
+        Return a list of values
+
+        TODO: describe behaviour!!!
+
+        """
+        # get this function's name
+        my_name = sys._getframe().f_code.co_name
+
+        # If self has no check_definitino for `attribute`
+        #  (meaning that only the existance of the attribute should be tested)
+        #  then return None
+        if not self.has_check_definition(attribute):
+            return None
+
+        # get the CV without preprocessing
+        raw_return_val = self._extract_raw_cv(attribute, cvs, guess)
+
         # get function to apply to CV to get a nicer CV for comparison
         cv_fun = self.get_cv_prepare_fun(attribute)
 
+        return self._apply_cv_prepare_fun(cv_fun, raw_return_val)
+
+    def _apply_cv_prepare_fun(self, cv_fun, raw_return_val):
+        """
+        Applies the preprocessing function `cv_fun` (as returned by
+        `get_cv_prepare_fun`) on the CV `raw_return_val`.
+        """
+        # get this function's name
+        my_name = 'extract_cv'
+
+        # `dict.keys` and `dict.values` cannot be applied on lazy CVs
+        if isinstance(raw_return_val, __dict_types_for_cvs__) and \
+                not isinstance(raw_return_val, dict):
+            if cv_fun is dict.keys:
+                cv_fun = type(raw_return_val).keys
+            elif cv_fun is dict.values:
+                cv_fun = type(raw_return_val).values
+
         # return ...
         if cv_fun is not None:
             # check if the function `cv_fun` can be applied to `raw_return_val`
@@ -633,18 +699,26 @@ class cv_structure(dict):
             return raw_return_val
 
 
-    @accepts(None, str, __allowed_types_for_cvs__, None, bool)
+    @accepts(None, str, __allowed_types_for_cvs__, bool)
     @validate_argument_attribute('self')
-    def check_cv(self, attribute, cvs, value, guess=False):
+    def compile_check(self, attribute, cvs, guess=False):
         """
-        TODO
-
-        TODO: check against CVs of operations
-        TODO: `return` "not implemented" when allowed operation is not covered
-
+        Returns a predicate which checks values of `attribute` against the CV
+        as defined in `self` and provided via `self` or `cvs`. The predicate
+        is called with the value to check and returns `True` or `False`.
+
+        All work which does not depend on the value to check (extracting and
+        preprocessing the CV, building indices and regular expressions) is
+        done here once. Errors, which `check_cv` would throw independently of
+        the value, are thrown here.
+
+        @param attribute str, name of an attribute (key of dict)
+        @param cvs CV(s) to check against (see `extract_cv`)
+        @param guess bool, see `extract_cv` [False]
+        @return: callable; one of the `*_predicate` classes
         """
         # get this function's name
-        my_name = sys._getframe().f_code.co_name
+        my_name = 'check_cv'
 
         # If self has no check_definitino for `attribute`
         #  (meaning that only the existance of the attribute should be tested)
@@ -657,35 +731,30 @@ class cv_structure(dict):
                                'ssumed that only the existance of the attrib' +
                                'ute should be checked and not its value.')
 
-        # ... extract CV, and ...
-        cv = self.extract_cv(attribute, cvs, guess)
-        # ... get operation.
+        # ... get operation, and ...
         operation = self.get_operation(attribute)
 
         # ~~~~~ perform some checks and preparation ~~~~~
         # for IN, NOT IN, CONTAINS ANY and CONTAINS ALL
         if (operation in ['in', 'not_in', 'contains_any', 'contains_all']):
-            # ~~~ if our cv is `iterable` and not a `str`, we keep it as is ~~~
-            # test for iterable
-            try:
-                cv.__iter__
-                # If we reach here, we are iterable. Therefore, we test for
-                # string. We could do this outside of the try-except block.
-                # However, in doing it this way we simplify the modification
-                # of this code.
-                if (isinstance(cv, str)):
-                    raise AttributeError('dummy err to enter `except` clause')
-            except AttributeError:
-                # if we get an AttributeError it is non-`iterable` or a string
-                # we put it into a list
-                cv = [cv]
-
-            # get first type of value
-            value_type = type(value)
-            # check if `value` and content of `cv` are of same type
-            if(any(not isinstance(c, value_type) for c in cv)):
-                raise TypeError('cv_tools.'+my_name+':: value to check and ' +
-                                'values in the CV are of different types')
+            # ... get the precompiled CV; it is only built when the CV is
+            # checked the first time
+            cv_index = get_membership_index(
+                self[attribute][1], self[attribute][3],
+                self._extract_raw_cv(attribute, cvs, guess),
+                self.get_cv_prepare_fun(attribute), self._apply_cv_prepare_fun)
+
+            # IN and NOT IN
+            if (operation in ['in', 'not_in']):
+                return membership_predicate(cv_index,
+                                            negate=(operation == 'not_in'))
+            # CONTAINS ANY and CONTAINS ALL
+            return contains_predicate(cv_index,
+                                      require_all=(operation ==
+                                                   'contains_all'))
+
+        # ... extract CV.
+        cv = self.extract_cv(attribute, cvs, guess)
 
         # for ISINSTANCE
         if (operation == 'isinstance'):
@@ -694,99 +763,30 @@ class cv_structure(dict):
                                 'stance` is chosen, the provided CV or indiv' +
                                 'idual variable has to be of type `type` or ' +
                                 'a tuple containing `type`s.')
+            return isinstance_predicate(cv)
 
         # for REGEX
         if (operation == 'regex'):
-            if (isinstance(cv, list)):
-                if (len(cv) == 1):
-                    cv = cv[0]
-                else:
+            # Several templates are combined into one regular expression.
+            if (isinstance(cv, (list, tuple))):
+                if (len(cv) == 0):
                     raise ValueError('cv_tools.'+my_name+':: When operation ' +
                                      '`regex` is chosen and the provided CV ' +
                                      'is of type list, then the list has to ' +
-                                     'be of length 1 (one) and has to contai' +
-                                     'n a `str`')
-            if (not isinstance(value, str)):
-                raise TypeError('cv_tools.'+my_name+':: When operation `rege' +
-                                'x` is chosen, the provided value to check h' +
-                                'as to be one item of type `str`.')
-            if (not isinstance(cv, str)):
+                                     'contain at least one item of type `str' +
+                                     '`')
+                if (any(not isinstance(c, str) for c in cv)):
+                    raise TypeError('cv_tools.'+my_name+':: When operation `' +
+                                    'regex` is chosen, the provided CV has t' +
+                                    'o contain only items of type `str`.')
+                cv = tuple(cv)
+            elif (isinstance(cv, str)):
+                cv = (cv, )
+            else:
                 raise TypeError('cv_tools.'+my_name+':: When operation `rege' +
                                 'x` is chosen, the provided CV has to be one' +
                                 ' item of type `str`.')
-            # convert CMIP6 license text into a regex
-            # NOTE: The CMIP6 CV contains a pseudo-regex of the license text.
-            #       We need to convert it into a proper python-regex, first.
-            #  replace tags like `<TEXT>`
-            str_regex_tag01 = '<[^<>]*>'
-            regex_tag01 = re.compile(str_regex_tag01)
-            #  replace tags like `[TEXT]`
-            str_regex_tag02 = '[-]?\[[^[\]]*\]'
-            regex_tag02 = re.compile(str_regex_tag02)
-            #  replace URLs starting with `https://` or `http://`
-            str_regex_url = 'http[s]:\/\/[^\s\)]*'
-            regex_url = re.compile(str_regex_url)
-            # replace words with underscore
-            str_regex_underscore = '[a-zA-Z0-9]+(_[a-zA-Z0-9]+)+'
-            regex_underscore = re.compile(str_regex_underscore)
-            # replace parenthese
-            str_regex_parentheses_open = '\('
-            str_regex_parentheses_close = '\)'
-            regex_parentheses_open = re.compile(str_regex_parentheses_open)
-            regex_parentheses_close = re.compile(str_regex_parentheses_close)
-            #  prepare real regex
-            str_regex_cv = \
-                '^'+re.sub(regex_parentheses_open, '\(',
-                           re.sub(regex_parentheses_close, '\)',
-                                  re.sub(regex_underscore, '.*',
-                                         re.sub(regex_tag01, '.*',
-                                                re.sub(regex_tag02, '.*',
-                                                       re.sub(regex_url,
-                                                              '.*', cv)
-                                                       )))))+'$'
-            regex_cv = re.compile(str_regex_cv)
-            # match regex
-            if re.fullmatch(regex_cv, value):
-                return True
-            else:
-                return False
-
-        # ['in', 'not_in', 'regex', 'isinstance', 'contains_any',
-        #  'contains_all']
-        # IN
-        if (operation == 'in'):
-            if (value in cv):
-                return True
-            else:
-                return False
-
-        # NOT IN
-        if (operation == 'not_in'):
-            if (value not in cv):
-                return True
-            else:
-                return False
-
-        # IS INSTANCE
-        if (operation in 'isinstance'):
-            if (isinstance(value, cv)):
-                return True
-            else:
-                return False
-
-        # CONTAINS ANY
-        if (operation == 'contains_any'):
-            if (any([c in value for c in cv])):
-                return True
-            else:
-                return False
-
-        # CONTAINS ALL
-        if (operation == 'contains_all'):
-            if (not any([c not in value for c in cv])):
-                return True
-            else:
-                return False
+            return regex_predicate(compile_cv_regex(cv))
 
         # When we reach here something went wrong.
         raise ValueError('cv_tools.'+my_name+':: Operation `' + operation +
@@ -797,8 +797,210 @@ class cv_structure(dict):
                          'an issue at the official GitHub repository of this' +
                          ' plugin.')
 
+    @accepts(None, str, __allowed_types_for_cvs__, None, bool)
+    @validate_argument_attribute('self')
+    def check_cv(self, attribute, cvs, value, guess=False):
+        """
+        Checks `value` of `attribute` against the CV as defined in `self` and
+        provided via `self` or `cvs`. See `compile_check` for details. When
+        many values are checked against the same CVs, the predicate returned
+        by `compile_check` should be used directly.
+
+        @return: bool; True if `value` is valid and False otherwise
+        """
+        return self.compile_check(attribute, cvs, guess)(value)
+
+
+# ~~~~~~~~~~~~~~ check predicates ~~~~~~~~~~~~~~
+class membership_predicate(object):
+    """
+    Checks whether a value is (`in`) or is not (`not_in`) in a CV.
+    """
+
+    __slots__ = ('cv_index', 'negate')
+
+    def __init__(self, cv_index, negate=False):
+        self.cv_index = cv_index
+        self.negate = negate
+
+    def __call__(self, value):
+        # check if `value` and content of `cv` are of same type
+        if(not self.cv_index.has_element_type(type(value))):
+            raise TypeError('cv_tools.check_cv:: value to check and values ' +
+                            'in the CV are of different types')
+        return self.cv_index.contains(value) != self.negate
+
+
+class contains_predicate(object):
+    """
+    Checks whether a value contains any (`contains_any`) or all
+    (`contains_all`) elements of a CV.
+    """
+
+    __slots__ = ('cv_index', 'require_all')
+
+    def __init__(self, cv_index, require_all=True):
+        self.cv_index = cv_index
+        self.require_all = require_all
+
+    def __call__(self, value):
+        # check if `value` and content of `cv` are of same type
+        if(not self.cv_index.has_element_type(type(value))):
+            raise TypeError('cv_tools.check_cv:: value to check and values ' +
+                            'in the CV are of different types')
+        if self.require_all:
+            return all(c in value for c in self.cv_index.elements)
+        return any(c in value for c in self.cv_index.elements)
+
+
+class isinstance_predicate(object):
+    """
+    Checks whether a value is an instance of the type(s) given as CV.
+    """
+
+    __slots__ = ('types', )
+
+    def __init__(self, types):
+        self.types = types
+
+    def __call__(self, value):
+        return isinstance(value, self.types)
+
+
+class regex_predicate(object):
+    """
+    Checks whether a value fully matches a compiled regular expression.
+    """
+
+    __slots__ = ('regex', )
+
+    def __init__(self, regex):
+        self.regex = regex
+
+    def __call__(self, value):
+        if (not isinstance(value, str)):
+            raise TypeError('cv_tools.check_cv:: When operation `regex` is c' +
+                            'hosen, the provided value to check has to be on' +
+                            'e item of type `str`.')
+        return self.regex.fullmatch(value) is not None
+
+
+class cv_membership_index(object):
+    """
+    Precompiled form of a (preprocessed) CV for the operations `in`, `not_in`,
+    `contains_any` and `contains_all`.
+
+    The elements of the CV are stored in a `frozenset` for O(1) membership
+    tests. The types of the elements are determined once so that checking the
+    type of a value does not require to iterate the CV. If the elements are
+    not hashable, membership is tested on the tuple of elements.
+    """
+
+    __slots__ = ('source', 'elements', 'values', 'element_types')
+
+    def __init__(self, source, cv):
+        """
+        @param source: the CV before preprocessing; used to detect whether
+                        the index is still valid
+        @param cv: the preprocessed CV; an iterable which is not a `str` or
+                    any other object (interpreted as a CV with one element)
+        """
+        self.source = source
+        # if our cv is `iterable` and not a `str`, we keep its elements;
+        # otherwise it is one element
+        if isinstance(cv, str) or not hasattr(cv, '__iter__'):
+            cv = [cv]
+        self.elements = tuple(cv)
+        self.element_types = frozenset(type(c) for c in self.elements)
+        try:
+            self.values = frozenset(self.elements)
+        except TypeError:
+            self.values = None
+
+    def has_element_type(self, value_type):
+        """
+        Returns `True` if all elements of the CV are instances of `value_type`.
+        """
+        return all(issubclass(t, value_type) for t in self.element_types)
+
+    def contains(self, value):
+        """
+        Returns `True` if `value` is an element of the CV.
+        """
+        if self.values is not None:
+            try:
+                return value in self.values
+            except TypeError:
+                # `value` is not hashable
+                pass
+        return value in self.elements
+
 
 # ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def get_membership_index(cv_name, cv_prepare_fun_name, raw_cv, cv_prepare_fun,
+                         apply_fun):
+    """
+    Returns the `cv_membership_index` of the CV `raw_cv` preprocessed with
+    `cv_prepare_fun`. The index is built once for each pair of CV name and
+    name of the preprocessing function and reused as long as the same CV
+    object is passed. CVs must not be modified after they were checked
+    against once.
+
+    @param cv_name str name of the CV (second entry of a cv_structure
+                        definition)
+    @param cv_prepare_fun_name str name of the preprocessing function (fourth
+                                    entry of a cv_structure definition)
+    @param raw_cv the CV before preprocessing
+    @param cv_prepare_fun callable or None; the preprocessing function
+    @param apply_fun callable applying `cv_prepare_fun` on `raw_cv`
+    @return instance of `cv_membership_index`
+    """
+    key = (cv_name, cv_prepare_fun_name)
+    cv_index = __membership_index_cache__.get(key)
+    if cv_index is None or cv_index.source is not raw_cv:
+        cv_index = cv_membership_index(raw_cv,
+                                       apply_fun(cv_prepare_fun, raw_cv))
+        __membership_index_cache__[key] = cv_index
+    return cv_index
+
+
+@functools.lru_cache(maxsize=__regex_cache_size__)
+def convert_cv_to_regex(cv):
+    """
+    Converts the pseudo-regex of a CMIP6 CV (e.g. the license text) into a
+    python regex. The result is cached for the last `__regex_cache_size__`
+    CVs.
+
+    @param cv str; CV entry to convert
+    @return str; regular expression without `^` and `$`
+    """
+    return re.sub(__regex_parentheses_open__, r'\(',
+                  re.sub(__regex_parentheses_close__, r'\)',
+                         re.sub(__regex_underscore__, '.*',
+                                re.sub(__regex_tag01__, '.*',
+                                       re.sub(__regex_tag02__, '.*',
+                                              re.sub(__regex_url__, '.*',
+                                                     cv))))))
+
+
+@functools.lru_cache(maxsize=__regex_cache_size__)
+def compile_cv_regex(cvs):
+    """
+    Returns one compiled regular expression matching any of the CV entries
+    `cvs` (see `convert_cv_to_regex`). The result is cached for the last
+    `__regex_cache_size__` tuples of CV entries.
+
+    @param cvs tuple of str; CV entries
+    @return compiled regular expression
+    """
+    if len(cvs) == 1:
+        return re.compile('^' + convert_cv_to_regex(cvs[0]) + '$')
+    return re.compile('^(?:' +
+                      '|'.join(['(?:' + convert_cv_to_regex(cv) + ')'
+                                for cv in cvs]) +
+                      ')$')
+
+
 def should_process_all_cvs(process_all_cvs):
     """
     TODO
@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+cc_plugin_cmip6_cv.nc_header.py
+
+Reader of the global attributes of netCDF classic files (CDF-1, CDF-2 and
+CDF-5, i.e. the formats NETCDF3_CLASSIC, NETCDF3_64BIT_OFFSET and
+NETCDF3_64BIT_DATA) without the netCDF library. Only the beginning of the
+header is read: magic, number of records, dimensions and global
+attributes. The variables and the data are not touched.
+
+If h5py is installed, the global attributes of netCDF4/HDF5 files can be
+read via the low-level HDF5 API (`read_hdf5_global_attributes`): only the
+attributes of the root group are opened; dimensions, variables and groups
+are not. Each attribute costs several calls into h5py; hence, this is
+faster than `netCDF4.Dataset` for files with many variables, but slower for
+small files. `read_file_global_attributes` uses it only if the HDF5 reader
+'h5py' is selected (see `set_hdf5_reader`).
+
+The values are returned like by `netCDF4.Dataset.getncattr`: text as `str`,
+single numbers as numpy scalars and several numbers as numpy arrays.
+Hence, the returned `dict` can be checked like the global attributes read
+from a `netCDF4.Dataset` (see `util.read_global_attributes`).
+
+Header layout (all numbers big endian; see the netCDF file format
+specification):
+  magic ('CDF' + version byte), numrecs, dim_list, gatt_list, var_list
+  dim_list/gatt_list: tag (uint32), nelems, elements; or two zeros
+  attribute: name, nc_type (uint32), nelems, values (padded to 4 bytes)
+  name: nelems, UTF-8 characters (padded to 4 bytes)
+  nelems and numrecs are uint32 (CDF-1, CDF-2) or uint64 (CDF-5)
+'''
+
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import os
+import struct
+import warnings
+import netCDF4 as nc
+import numpy
+from cc_plugin_cmip6_cv.util import read_global_attributes
+try:
+    import h5py
+except ImportError:
+    # netCDF4/HDF5 files are read via netCDF4; see
+    # `read_file_global_attributes`
+    h5py = None
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+# versions of the classic format; value: format of nelems and numrecs
+__classic_formats__ = {1: struct.Struct('>I'), 2: struct.Struct('>I'),
+                       5: struct.Struct('>Q')}
+__uint32__ = struct.Struct('>I')
+# tags of the lists in the header
+__nc_dimension__ = 10
+__nc_attribute__ = 12
+# nc_type -> numpy dtype of the values (big endian)
+__nc_types__ = {1: numpy.dtype('>i1'), 2: numpy.dtype('S1'),
+                3: numpy.dtype('>i2'), 4: numpy.dtype('>i4'),
+                5: numpy.dtype('>f4'), 6: numpy.dtype('>f8'),
+                7: numpy.dtype('>u1'), 8: numpy.dtype('>u2'),
+                9: numpy.dtype('>u4'), 10: numpy.dtype('>i8'),
+                11: numpy.dtype('>u8')}
+__nc_char__ = 2
+# number of bytes read at once
+__header_chunk_size__ = 8192
+# encoding of text attributes; like `netCDF4.default_encoding`
+__text_encoding__ = 'utf-8'
+# signature of HDF5 files (at offset 0, 512, 1024, ...)
+__hdf5_magic__ = b'\x89HDF\r\n\x1a\n'
+# attributes of the root group which are hidden by the netCDF library
+__hdf5_hidden_attributes__ = ('_NCProperties', '_nc3_strict', '_IsNetcdf4',
+                              '_SuperblockVersion', '_Netcdf4Dimid',
+                              '_Netcdf4Coordinates', 'DIMENSION_LIST',
+                              'REFERENCE_LIST', 'CLASS', 'NAME')
+# readers of netCDF4/HDF5 files in `read_file_global_attributes`; see
+# `set_hdf5_reader`
+#   'netcdf4': `netCDF4.Dataset`
+#   'h5py': `read_hdf5_global_attributes`
+__hdf5_readers__ = ('netcdf4', 'h5py')
+__hdf5_reader_env_var__ = 'CC_PLUGIN_CMIP6_CV_HDF5_READER'
+__hdf5_reader_state__ = {'reader': 'netcdf4'}
+
+
+# ~~~~~~~~~~~~~~ class definitions ~~~~~~~~~~~~~~
+class _truncated_header(Exception):
+    """
+    Thrown if the part of the header read so far does not contain all
+    global attributes.
+    """
+    pass
+
+
+# ~~~~~~~~~~~~~~ reader selection ~~~~~~~~~~~~~~
+def set_hdf5_reader(reader):
+    """
+    Sets the reader of netCDF4/HDF5 files in `read_file_global_attributes`.
+    'h5py' requires h5py.
+
+    @param reader str; one of `__hdf5_readers__`
+    """
+    if reader not in __hdf5_readers__:
+        raise ValueError('nc_header.set_hdf5_reader:: unknown HDF5 reader `' +
+                         str(reader) + '`; allowed are: ' +
+                         ', '.join(__hdf5_readers__))
+    if reader == 'h5py' and h5py is None:
+        raise ValueError('nc_header.set_hdf5_reader:: HDF5 reader `h5py` ' +
+                         'requires h5py, which is not installed')
+    __hdf5_reader_state__['reader'] = reader
+
+
+def get_hdf5_reader():
+    return __hdf5_reader_state__['reader']
+
+
+def _init_hdf5_reader():
+    reader = os.environ.get(__hdf5_reader_env_var__, None)
+    if reader is None:
+        return
+    try:
+        set_hdf5_reader(reader.strip().lower())
+    except ValueError:
+        warnings.warn('nc_header:: environment variable ' +
+                      __hdf5_reader_env_var__ + ' has an invalid value (' +
+                      reader + '); using HDF5 reader ' + get_hdf5_reader(),
+                      RuntimeWarning)
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def is_classic_file(path):
+    """
+    Returns `True` if `path` is a netCDF classic file which can be read by
+    `read_classic_global_attributes`.
+
+    @param path str; path of the file
+    @return bool
+    """
+    with open(path, 'rb') as f:
+        return _is_classic_magic(f.read(4))
+
+
+def _is_classic_magic(magic):
+    return magic[:3] == b'CDF' and len(magic) == 4 and \
+        magic[3] in __classic_formats__
+
+
+def read_classic_global_attributes(path):
+    """
+    Returns the global attributes of the netCDF classic file `path` as
+    `dict` (attribute name -> value) in the order of the file. Only the
+    first part of the header is read.
+
+    A `ValueError` is thrown if `path` is no netCDF classic file (e.g. a
+    netCDF4/HDF5 file) or if its header is damaged.
+
+    @param path str; path of the file
+    @return dict
+    """
+    with open(path, 'rb') as f:
+        return _read_classic_header(f, path)
+
+
+def _read_classic_header(file, path):
+    # The header is read in chunks of `__header_chunk_size__` bytes and
+    # parsed again from the start when a chunk is not sufficient. Counts and
+    # lengths in the header are checked against the size of the file so
+    # that a damaged header does not make us read the whole file.
+    my_name = 'nc_header.read_classic_global_attributes'
+
+    file_size = os.fstat(file.fileno()).st_size
+    buffer = file.read(__header_chunk_size__)
+    while True:
+        try:
+            return _parse_classic_header(buffer, path, my_name, file_size)
+        except _truncated_header:
+            chunk = file.read(max(len(buffer), __header_chunk_size__))
+            if len(chunk) == 0:
+                raise ValueError(my_name+':: header of file ' + path +
+                                 ' is truncated')
+            buffer += chunk
+
+
+def _parse_classic_header(buffer, path, my_name, file_size):
+    if not _is_classic_magic(buffer[:4]):
+        raise ValueError(my_name+':: file ' + path + ' is no netCDF classic ' +
+                         'file')
+    size_format = __classic_formats__[buffer[3]]
+    size_length = size_format.size
+    unpack_size = size_format.unpack_from
+    unpack_uint32 = __uint32__.unpack_from
+
+    def check_size(end, what):
+        if end > file_size:
+            raise ValueError(my_name+':: bad ' + what + ' in header of file ' +
+                             path + '; it exceeds the size of the file')
+
+    def read_name(position):
+        length = unpack_size(buffer, position)[0]
+        position += size_length
+        end = position + length
+        check_size(end, 'length of a name')
+        if end > len(buffer):
+            raise _truncated_header()
+        return buffer[position:end].decode('utf-8'), end + (-length % 4)
+
+    try:
+        # skip magic and number of records
+        position = 4 + size_length
+
+        # dimensions; skipped
+        tag = unpack_uint32(buffer, position)[0]
+        count = unpack_size(buffer, position + 4)[0]
+        position += 4 + size_length
+        if tag == __nc_dimension__:
+            # each dimension: name (at least its length) and its length
+            check_size(position + count * 2 * size_length,
+                       'number of dimensions')
+            for i in range(count):
+                position = read_name(position)[1] + size_length
+        elif tag != 0 or count != 0:
+            raise ValueError(my_name+':: bad list of dimensions in file ' +
+                             path)
+
+        # global attributes
+        attributes = {}
+        tag = unpack_uint32(buffer, position)[0]
+        count = unpack_size(buffer, position + 4)[0]
+        position += 4 + size_length
+        if tag == __nc_attribute__:
+            # each attribute: name (at least its length), type and nelems
+            check_size(position + count * (2 * size_length + 4),
+                       'number of global attributes')
+            for i in range(count):
+                name, position = read_name(position)
+                nc_type = unpack_uint32(buffer, position)[0]
+                length = unpack_size(buffer, position + 4)[0]
+                position += 4 + size_length
+                dtype = __nc_types__.get(nc_type)
+                if dtype is None:
+                    raise ValueError(my_name+':: unknown type ' +
+                                     str(nc_type) + ' of attribute ' + name +
+                                     ' in file ' + path)
+                end = position + length * dtype.itemsize
+                check_size(end, 'length of attribute ' + name)
+                if end > len(buffer):
+                    raise _truncated_header()
+                attributes[name] = _decode_attribute_value(
+                    buffer[position:end], nc_type, dtype, length)
+                position = end + (-(end - position) % 4)
+        elif tag != 0 or count != 0:
+            raise ValueError(my_name+':: bad list of global attributes in ' +
+                             'file ' + path)
+    except struct.error:
+        # buffer too short
+        raise _truncated_header()
+
+    return attributes
+
+
+def _decode_attribute_value(data, nc_type, dtype, length):
+    # text; like netCDF4, null characters are removed
+    if nc_type == __nc_char__:
+        return data.decode(__text_encoding__, 'replace').replace('\x00', '')
+
+    # numbers in native byte order; one number as scalar
+    values = numpy.frombuffer(data, dtype).astype(dtype.newbyteorder('='))
+    if length == 1:
+        return values[0]
+    return values
+
+
+def read_hdf5_global_attributes(path):
+    """
+    Returns the global attributes of the netCDF4/HDF5 file `path` as `dict`
+    in the order in which netCDF4 lists them. The file is opened read-only
+    via the low-level HDF5 API of h5py and only the attributes of the root
+    group are read. The values are decoded like by
+    `netCDF4.Dataset.getncattr`: text (fixed or variable length) as `str`,
+    several variable length strings as `list` of `str`, single numbers as
+    numpy scalars and several numbers as numpy arrays.
+
+    A `ValueError` is thrown if an attribute has a type which is not
+    supported (e.g. compound or enum types); `OSError` is thrown if `path`
+    is no HDF5 file. h5py has to be installed.
+
+    @param path str; path of the file
+    @return dict
+    """
+    my_name = 'nc_header.read_hdf5_global_attributes'
+    if h5py is None:
+        raise ImportError(my_name+':: h5py is not installed')
+
+    file_id = h5py.h5f.open(path.encode('utf-8'), h5py.h5f.ACC_RDONLY)
+    try:
+        group_id = h5py.h5g.open(file_id, b'/')
+        names = []
+        # netCDF lists the attributes in the order of their creation if it
+        # is tracked and by name otherwise
+        try:
+            h5py.h5a.iterate(group_id, names.append,
+                             index_type=h5py.h5.INDEX_CRT_ORDER)
+        except (KeyError, ValueError, RuntimeError):
+            names = []
+            h5py.h5a.iterate(group_id, names.append,
+                             index_type=h5py.h5.INDEX_NAME)
+
+        attributes = {}
+        for raw_name in names:
+            name = raw_name.decode('utf-8')
+            if name in __hdf5_hidden_attributes__:
+                continue
+            attribute_id = h5py.h5a.open(group_id, raw_name)
+            attributes[name] = _read_hdf5_attribute(attribute_id, name, path,
+                                                    my_name)
+        return attributes
+    finally:
+        file_id.close()
+
+
+def _read_hdf5_attribute(attribute_id, name, path, my_name):
+    # Each call of the low-level API creates a new identifier object; hence,
+    # type and dataspace are only queried once.
+    type_id = attribute_id.get_type()
+    type_class = type_id.get_class()
+    shape = attribute_id.get_space().shape
+    dtype = type_id.dtype
+
+    # empty (null) dataspace
+    if shape is None:
+        if type_class == h5py.h5t.STRING:
+            return ''
+        return numpy.empty(0, dtype)
+    values = numpy.empty(shape, dtype)
+    if values.size > 0:
+        attribute_id.read(values)
+    values = values.reshape(-1)
+
+    if type_class == h5py.h5t.STRING:
+        # variable length strings (NC_STRING)
+        if dtype.kind == 'O':
+            strings = [(v.decode(__text_encoding__, 'replace')
+                        if isinstance(v, bytes) else (v or ''))
+                       .replace('\x00', '') for v in values]
+            return strings[0] if len(strings) == 1 else strings
+        # fixed length string (NC_CHAR)
+        return values.tobytes().decode(__text_encoding__,
+                                       'replace').replace('\x00', '')
+
+    if type_class not in (h5py.h5t.INTEGER, h5py.h5t.FLOAT):
+        raise ValueError(my_name+':: type of attribute ' + name + ' in file ' +
+                         path + ' is not supported')
+    values = values.astype(dtype.newbyteorder('='))
+    if len(values) == 1:
+        return values[0]
+    return values
+
+
+def read_file_global_attributes(path):
+    """
+    Returns the global attributes of the netCDF file `path` as `dict`.
+    Classic files are read by `read_classic_global_attributes`. netCDF4/HDF5
+    files are opened with `netCDF4.Dataset`; if the HDF5 reader 'h5py' is
+    selected (see `set_hdf5_reader`), they are read by
+    `read_hdf5_global_attributes` and only opened with `netCDF4.Dataset` if
+    an attribute is not supported.
+
+    @param path str; path of the file
+    @return dict
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(8)
+        if _is_classic_magic(magic[:4]):
+            f.seek(0)
+            return _read_classic_header(f, path)
+    if magic == __hdf5_magic__ and get_hdf5_reader() == 'h5py':
+        try:
+            return read_hdf5_global_attributes(path)
+        except ValueError:
+            pass
+    dataset = nc.Dataset(path, 'r')
+    try:
+        return read_global_attributes(dataset)
+    finally:
+        dataset.close()
+
+
+_init_hdf5_reader()
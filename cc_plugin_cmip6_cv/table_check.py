@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+cc_plugin_cmip6_cv.table_check.py
+
+Checking tables of global attributes (e.g. catalogs with one row per file
+and one column per global attribute) against the CMIP6 CVs without checking
+each row on its own. A table is a `pandas.DataFrame` or a `dict` of
+columns (NumPy arrays or sequences), which all have the same length.
+
+The checks of a check plan are evaluated column by column: each column is
+factorized once into codes and distinct values (categorical columns of
+pandas are used as they are) and each check is performed once per distinct
+value; the results are mapped onto the rows by the codes. Child plans (e.g. of
+`experiment_id`) are evaluated on the group of rows of each valid value of
+their parent attribute. Hence, the costs depend on the number of distinct
+values and not on the number of rows.
+
+The results are the same as those of
+`cmip6_cv.CMIP6CVBaseCheck.execute_check_plan` for each row; values which
+make a check throw a `TypeError` (e.g. a value of the wrong type) fail the
+check.
+'''
+
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import collections
+import numpy
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+# separator of the attribute names in the names of checks of child plans;
+# like in the messages of the `Result`s of `execute_check_plan`
+__check_name_separator__ = ' -> '
+
+
+# result of checking a table
+#   checks: list of str; names of the checks: names of the checked attributes
+#           and, for checks of child plans, of their parent attributes (e.g.
+#           'experiment_id -> activity_id')
+#   passed: numpy.ndarray of bool (rows x checks); `True` if the check was
+#           performed for the row and passed
+#   performed: numpy.ndarray of bool (rows x checks); `False` if the check
+#              was not performed for the row (checks of child plans whose
+#              parent attribute is missing or invalid)
+table_check_result = collections.namedtuple('table_check_result',
+                                            ['checks', 'passed', 'performed'])
+
+
+# ~~~~~~~~~~~~~~ class definitions ~~~~~~~~~~~~~~
+class _table_columns(object):
+    """
+    Columns of a table factorized into codes and distinct values (see
+    `_factorize`) when they are accessed for the first time. `get` returns
+    `None` for missing columns.
+    """
+
+    __slots__ = ('table', 'columns')
+
+    def __init__(self, table):
+        self.table = table
+        self.columns = {}
+
+    def get(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            pass
+        column = None
+        if name in self.table:
+            column = _factorize(self.table[name])
+        self.columns[name] = column
+        return column
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def check_table(table, plan=None):
+    """
+    Checks each row of `table` against the CMIP6 CVs. Columns are global
+    attributes; missing values (`None` or NaN) and missing columns are
+    missing attributes. Returns a `table_check_result` with one column per
+    check, including the checks of the child plans.
+
+    @param table pandas.DataFrame or dict of str -> numpy.ndarray or
+                 sequence; all columns have the same length
+    @param plan check_plan (optional); plan to use instead of the plan of
+                the CMIP6 CVs [None]
+    @return table_check_result
+    """
+    n_rows = _count_rows(table)
+    if plan is None:
+        plan = CMIP6CVBaseCheck().prepare_check_plan()
+
+    results = {}
+    _check_rows(_table_columns(table), n_rows, None, plan, [], results)
+
+    checks = list(results)
+    passed = numpy.zeros((n_rows, len(checks)), dtype=bool)
+    performed = numpy.zeros((n_rows, len(checks)), dtype=bool)
+    for i, name in enumerate(checks):
+        passed[:, i], performed[:, i] = results[name]
+    return table_check_result(checks, passed, performed)
+
+
+def _count_rows(table):
+    my_name = 'table_check.check_table'
+    # pandas.DataFrame
+    if hasattr(table, 'columns') and hasattr(table, 'index'):
+        return len(table.index)
+    if not hasattr(table, 'keys'):
+        raise TypeError(my_name+':: `table` has to be a pandas.DataFrame or ' +
+                        'a dict of columns, not `' + type(table).__name__ +
+                        '`')
+    lengths = set(len(table[name]) for name in table.keys())
+    if len(lengths) > 1:
+        raise ValueError(my_name+':: the columns of `table` have different ' +
+                         'lengths')
+    return lengths.pop() if len(lengths) == 1 else 0
+
+
+def _check_rows(columns, n_rows, rows, plan, parent_attribute_tree,
+                results):
+    # `rows`: indices of the checked rows or `None` for all rows
+    for check in plan.checks:
+        attribute = check.attribute
+        this_attribute_tree = parent_attribute_tree + [attribute]
+        name = __check_name_separator__.join(this_attribute_tree)
+        if name not in results:
+            results[name] = (numpy.zeros(n_rows, dtype=bool),
+                             numpy.zeros(n_rows, dtype=bool))
+        passed, performed = results[name]
+        index = slice(None) if rows is None else rows
+        performed[index] = True
+
+        # missing column
+        column = columns.get(attribute)
+        if column is None:
+            passed[index] = False
+            continue
+
+        codes, values = column
+        if rows is not None:
+            codes = codes[rows]
+        # one verdict per distinct value of these rows; the last one for
+        # missing values (code -1)
+        verdicts = numpy.zeros(len(values) + 1, dtype=bool)
+        used = numpy.flatnonzero(numpy.bincount(codes + 1,
+                                                minlength=len(values) + 1)[1:])
+        for k in used:
+            value = values[k]
+            if _is_missing(value):
+                continue
+            if check.predicate is None:
+                verdicts[k] = True
+                continue
+            try:
+                verdicts[k] = check.predicate(value)
+            except TypeError:
+                # value of another type than the CV
+                verdicts[k] = False
+        passed[index] = verdicts[codes]
+
+        # child plans on the rows of each valid value
+        if not check.has_children():
+            continue
+        order = numpy.argsort(codes, kind='stable')
+        bounds = numpy.searchsorted(codes[order], numpy.arange(len(values) +
+                                                               1))
+        for k in used:
+            if not verdicts[k]:
+                continue
+            child_plan = check.get_child_plan(values[k])
+            if child_plan is None:
+                continue
+            child_rows = order[bounds[k]:bounds[k + 1]]
+            if rows is not None:
+                child_rows = rows[child_rows]
+            _check_rows(columns, n_rows, child_rows, child_plan,
+                        this_attribute_tree, results)
+
+
+def _factorize(column):
+    # Returns the codes of the values of `column` and the distinct values;
+    # code -1 marks missing values.
+
+    # pandas.Categorical / categorical pandas.Series
+    categorical = getattr(column, 'cat', column)
+    if hasattr(categorical, 'codes') and hasattr(categorical, 'categories'):
+        return (numpy.asarray(categorical.codes, dtype=numpy.intp),
+                list(categorical.categories))
+
+    if isinstance(column, numpy.ndarray):
+        values = column
+    elif hasattr(column, 'to_numpy'):
+        values = column.to_numpy()
+    else:
+        # keep the objects of sequences (e.g. do not convert int into str)
+        values = numpy.empty(len(column), dtype=object)
+        values[:] = list(column)
+
+    # numbers (as numpy scalars like read by netCDF4)
+    if values.dtype.kind not in 'USO':
+        distinct, codes = numpy.unique(values, return_inverse=True)
+        return codes.reshape(-1), list(distinct)
+
+    # text (as `str`); hashing is faster than sorting the strings
+    if values.dtype.kind in 'US':
+        index = {}
+        codes = [index.setdefault(v, len(index)) for v in values.tolist()]
+        return numpy.array(codes, dtype=numpy.intp), list(index)
+
+    # Values are keyed with their type: the checks depend on it (e.g.
+    # `numpy.int32(1)`, `1` and `1.0` are different) while `pandas.factorize`
+    # and `numpy.unique` would merge equal numbers of different types.
+    try:
+        index = {}
+        codes = [index.setdefault((type(v), v), len(index)) for v in values]
+        return numpy.array(codes, dtype=numpy.intp), [v for t, v in index]
+    except TypeError:
+        # unhashable values (e.g. arrays) are checked one by one
+        return numpy.arange(len(values)), list(values)
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, (float, numpy.floating)) and
+                             value != value)
@@ -0,0 +1,52 @@
+from cc_plugin_cmip6_cv.attribute_source import get_attribute_source, \
+    dataset_attributes
+import netCDF4 as nc
+import collections
+import pytest
+import os
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = __current_dir__+'/data/example_file_cf_issue_212.nc'
+
+
+class subclassed_dataset(nc.Dataset):
+    pass
+
+
+def test_get_attribute_source():
+    # mappings are used as they are
+    attributes = {'institution_id': 'DKRZ'}
+    assert get_attribute_source(attributes) is attributes
+    attributes = collections.OrderedDict(attributes)
+    assert get_attribute_source(attributes) is attributes
+
+    # datasets are wrapped; also subclasses
+    for dataset_class in [nc.Dataset, subclassed_dataset]:
+        with dataset_class(__test_file__, 'r') as dataset:
+            attributes = get_attribute_source(dataset)
+            assert isinstance(attributes, dataset_attributes)
+            assert list(attributes) == dataset.ncattrs()
+            assert dict(attributes) == {name: dataset.getncattr(name)
+                                        for name in dataset.ncattrs()}
+
+    with pytest.raises(TypeError):
+        get_attribute_source([('institution_id', 'DKRZ')])
+
+
+def test_dataset_attributes():
+    with nc.Dataset(__test_file__, 'r') as dataset:
+        attributes = dataset_attributes(dataset)
+        assert len(attributes) == len(dataset.ncattrs())
+        assert 'institution_id' in attributes
+        assert 'not_an_attribute' not in attributes
+        with pytest.raises(KeyError):
+            attributes['not_an_attribute']
+        assert attributes.get('not_an_attribute') is None
+
+        # values are read on first access only
+        assert attributes.read_values == {}
+        value = attributes['institution_id']
+        assert value == dataset.getncattr('institution_id')
+        assert attributes.read_values == {'institution_id': value}
+        assert list(attributes.values()) == [dataset.getncattr(name)
+                                             for name in dataset.ncattrs()]
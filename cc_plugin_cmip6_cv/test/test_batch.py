@@ -0,0 +1,220 @@
+from cc_plugin_cmip6_cv import check_many, check_attributes, \
+    file_check_result
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
+from cc_plugin_cmip6_cv.nc_header import read_file_global_attributes
+import cc_plugin_cmip6_cv.batch as batch
+import cc_plugin_cmip6_cv.cmip6_cv as cmip6_cv
+import cc_plugin_cmip6_cv.util as util
+import datetime
+import gc
+import netCDF4 as nc
+import multiprocessing
+import pytest
+import json
+import os
+import shutil
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = __current_dir__+'/data/example_file_cf_issue_212.nc'
+
+
+@pytest.fixture
+def package_cvs(monkeypatch):
+    # use the CVs shipped with the package; no update
+    monkeypatch.setenv('CMIP6_JSON_PATH',
+                       os.path.split(__current_dir__)[0]+'/data')
+
+
+def summarize(results):
+    return [(r.name, r.value, r.msgs) for r in results]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_check_many(package_cvs, workers):
+    # expected results: from `check_cvs`
+    dataset = nc.Dataset(__test_file__)
+    expected = summarize(CMIP6CVBaseCheck().check_cvs(dataset))
+    dataset.close()
+
+    bad_file = __current_dir__+'/data/not_an_existing_file.nc'
+    paths = [__test_file__, bad_file] * 5
+    output = list(check_many(paths, workers=workers, chunk_size=3))
+
+    assert len(output) == len(paths)
+    assert all(isinstance(r, file_check_result) for r in output)
+    for r in output:
+        if r.path == __test_file__:
+            assert r.error is None
+            assert summarize(r.results) == expected
+        else:
+            assert r.path == bad_file
+            assert r.results is None
+            assert r.error.startswith('FileNotFoundError')
+
+
+def test_check_many_bad_chunk_size(package_cvs):
+    with pytest.raises(ValueError):
+        list(check_many([__test_file__], workers=1, chunk_size=0))
+
+
+def test_check_many_classic_file(package_cvs, tmp_path):
+    # classic copy of the test file; its header is read without netCDF4
+    dataset = nc.Dataset(__test_file__)
+    expected = summarize(CMIP6CVBaseCheck().check_cvs(dataset))
+    classic_file = str(tmp_path/'classic.nc')
+    classic = nc.Dataset(classic_file, 'w', format='NETCDF3_CLASSIC')
+    classic.setncatts({name: dataset.getncattr(name)
+                       for name in dataset.ncattrs()})
+    classic.close()
+    dataset.close()
+
+    output = list(check_many([classic_file], workers=1))
+    assert output[0].error is None
+    assert summarize(output[0].results) == expected
+
+
+def test_check_many_zarr_store(package_cvs, tmp_path):
+    # Zarr store with the global attributes of the test file
+    dataset = nc.Dataset(__test_file__)
+    expected = summarize(CMIP6CVBaseCheck().check_cvs(dataset))
+    zattrs = {name: dataset.getncattr(name) for name in dataset.ncattrs()}
+    dataset.close()
+    zattrs = {name: value.tolist() if hasattr(value, 'tolist') else value
+              for name, value in zattrs.items()}
+    store = tmp_path/'test.zarr'
+    store.mkdir()
+    (store/'.zgroup').write_text(json.dumps({'zarr_format': 2}))
+    (store/'.zattrs').write_text(json.dumps(zattrs))
+
+    output = list(check_many([str(store), str(tmp_path)], workers=1))
+    assert output[0].error is None
+    assert summarize(output[0].results) == expected
+    # directory which is no Zarr store
+    assert output[1].results is None
+    assert output[1].error.startswith('ValueError')
+
+def test_check_attributes(package_cvs):
+    dataset = nc.Dataset(__test_file__)
+    expected = summarize(CMIP6CVBaseCheck().check_cvs(dataset))
+    attributes = {name: dataset.getncattr(name)
+                  for name in dataset.ncattrs()}
+    dataset.close()
+
+    # same results as for the file; also for repeated calls
+    assert summarize(check_attributes(attributes)) == expected
+    assert summarize(check_attributes(dict(attributes))) == expected
+
+    # other values
+    results = check_attributes(dict(attributes, institution_id='XXXX'))
+    assert [r.value for r in results if r.name.endswith(
+        '`institution_id` against CV')] == [False]
+
+    with pytest.raises(TypeError):
+        check_attributes([('institution_id', 'DKRZ')])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_check_many_reader_error(package_cvs, monkeypatch, workers):
+    # any error of a reader is reported for the file
+    def read(path):
+        if path.endswith('bad.nc'):
+            raise KeyError('damaged header')
+        return read_file_global_attributes(path)
+    monkeypatch.setattr(batch, 'read_file_global_attributes', read)
+    paths = [__test_file__, 'bad.nc', __test_file__]
+    output = list(check_many(paths, workers=workers, chunk_size=1))
+    assert sorted(r.path for r in output) == sorted(paths)
+    for r in output:
+        if r.path == 'bad.nc':
+            assert r.results is None
+            assert r.error.startswith('KeyError')
+        else:
+            assert r.error is None
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='the worker processes have to be forked')
+def test_check_many_broken_pool(package_cvs, monkeypatch):
+    # a dying worker process fails the pending chunks; the other files are
+    # checked in a new pool
+    check_file = batch._check_file
+
+    def check_or_die(path, checker, plan):
+        if path.endswith('crash.nc'):
+            os._exit(1)
+        return check_file(path, checker, plan)
+    monkeypatch.setattr(batch, '_check_file', check_or_die)
+    paths = [__test_file__] * 4 + ['crash.nc'] + [__test_file__] * 20
+    output = list(check_many(paths, workers=2, chunk_size=1))
+    assert sorted(r.path for r in output) == sorted(paths)
+    for r in output:
+        if r.path == 'crash.nc':
+            assert r.results is None
+            assert r.error.startswith('BrokenProcessPool')
+    # files submitted after the crash are checked
+    assert output[-1].error is None
+
+
+def test_check_many_gc_freeze(package_cvs):
+    # the objects of the calling process are frozen while the pool exists
+    assert gc.get_freeze_count() == 0
+    output = check_many([__test_file__] * 4, workers=2)
+    assert next(output).error is None
+    assert gc.get_freeze_count() > 0
+    assert all(r.error is None for r in output)
+    assert gc.get_freeze_count() == 0
+
+
+def test_prepare_check_plan_cached(monkeypatch, tmp_path):
+    monkeypatch.setattr(CMIP6CVBaseCheck, '__check_plans__', {})
+    checker = CMIP6CVBaseCheck()
+
+    # data directory which is not updated => plan is reused as long as the
+    # CV files are not modified
+    cv_dir = str(tmp_path/'cvs')
+    shutil.copytree(os.path.split(__current_dir__)[0]+'/data', cv_dir)
+    monkeypatch.setenv('CMIP6_JSON_PATH', cv_dir)
+    plan = checker.prepare_check_plan()
+    assert CMIP6CVBaseCheck().prepare_check_plan() is plan
+    json_file = cv_dir+'/CMIP6_institution_id.json'
+    with open(json_file) as f:
+        content = json.load(f)
+    content['institution_id']['XXXX'] = 'some new institution'
+    with open(json_file, 'w') as f:
+        json.dump(content, f)
+    new_plan = checker.prepare_check_plan()
+    assert new_plan is not plan
+    checks = dict(zip(new_plan.get_attributes_to_check(), new_plan.checks))
+    assert checks['institution_id'].predicate('XXXX')
+
+    # data directory which is updated => within the interval, no data
+    # directory, no update check, no stats
+    monkeypatch.delenv('CMIP6_JSON_PATH')
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path/'data'))
+    monkeypatch.setattr(util, 'update_cmip6_json_cv', lambda *args: [])
+    util.reset_update_check()
+    with pytest.warns(RuntimeWarning, match='fall-back directory'):
+        plan = checker.prepare_check_plan()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('file system touched although plan is cached')
+    with monkeypatch.context() as m:
+        m.setattr(cmip6_cv, 'data_directory_collection', fail)
+        m.setattr(cmip6_cv, 'read_cmip6_json_cv_snapshot', fail)
+        assert CMIP6CVBaseCheck().prepare_check_plan() is plan
+
+    # interval passed or update check reset => plan is prepared again
+    reads = []
+    read_snapshot = cmip6_cv.read_cmip6_json_cv_snapshot
+    monkeypatch.setattr(cmip6_cv, 'read_cmip6_json_cv_snapshot',
+                        lambda *args: reads.append(1) or read_snapshot(*args))
+    with monkeypatch.context() as m:
+        m.setattr(util, '__update_check_interval__', datetime.timedelta())
+        with pytest.warns(RuntimeWarning, match='fall-back directory'):
+            checker.prepare_check_plan()
+    assert len(reads) == 1
+    util.reset_update_check()
+    with pytest.warns(RuntimeWarning, match='fall-back directory'):
+        checker.prepare_check_plan()
+    assert len(reads) == 2
+    util.reset_update_check()
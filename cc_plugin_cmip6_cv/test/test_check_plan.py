@@ -0,0 +1,182 @@
+from cc_plugin_cmip6_cv.check_plan import compile_check_plan, \
+    compile_all_check_plan, get_check_plan, check_plan, raising_predicate, \
+    get_all_check_plan, verdict_cache, attribute_recorder, \
+    get_verdict_cache_stats, clear_verdict_cache
+from cc_plugin_cmip6_cv.cv_structure import cv_structure
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
+import cc_plugin_cmip6_cv.check_plan as check_plan_module
+import numpy
+import pytest
+import pickle
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~ DEFINE TEST DATA ~~~~~~~~~~~~~~~~~~~~~~
+dummy_cv = {'cv01': {'DKRZ': 'Deutsches Klimarechenzentrum',
+                     'mfg': 'Mit freundlichen Gruessen'},
+            'cv02': ['red', 'green', 'blue'],
+            'cv06': {'car': {'cv02': ['red', 'green'],
+                             'description': 'a car'},
+                     'bike': {'cv02': ['red', 'blue'],
+                              'wheels': {'two': {'cv02': ['blue']}}}}}
+dummy_cv_struct = {'attr01': ['in', 'cv01', None, 'keys', False],
+                   'attr02': ['in', 'cv01', None, 'values', False],
+                   'attr03': ['not in', 'cv02', None, '', False],
+                   'cv06': ['in', 'cv06', None, 'keys', True],
+                   'attr99': ['in', 'cv99', None, '', False],
+                   'attr14': None}
+
+
+def test_compile_check_plan():
+    my_cv_struct = cv_structure(dummy_cv_struct)
+    plan = compile_check_plan(my_cv_struct, dummy_cv, ['description'])
+
+    assert isinstance(plan, check_plan)
+    assert plan.get_attributes_to_check() == ('attr01', 'attr02', 'attr03',
+                                              'cv06', 'attr99', 'attr14')
+    checks = dict(zip(plan.get_attributes_to_check(), plan.checks))
+
+    # predicates give the same results as `check_cv`
+    for attribute, value in [('attr01', 'DKRZ'), ('attr01', 'ARD'),
+                             ('attr02', 'Mit freundlichen Gruessen'),
+                             ('attr03', 'red'), ('attr03', 'pink'),
+                             ('cv06', 'car'), ('cv06', 'ship')]:
+        assert (checks[attribute].predicate(value) ==
+                my_cv_struct.check_cv(attribute, dummy_cv, value, True))
+
+    # existence only
+    assert checks['attr14'].predicate is None
+    # errors are thrown when the check is performed
+    assert isinstance(checks['attr99'].predicate, raising_predicate)
+    with pytest.raises(KeyError):
+        checks['attr99'].predicate('red')
+
+    # children
+    assert not checks['attr01'].has_children()
+    assert checks['cv06'].has_children()
+    child_plan = checks['cv06'].get_child_plan('car')
+    assert child_plan.get_attributes_to_check() == ('cv02', )
+    assert child_plan.checks[0].predicate('red')
+    assert not child_plan.checks[0].predicate('blue')
+    #   nested dicts of all-checks
+    child_plan = checks['cv06'].get_child_plan('bike')
+    assert child_plan.get_attributes_to_check() == ('cv02', 'wheels')
+    grandchild_plan = child_plan.checks[1].get_child_plan('two')
+    assert grandchild_plan.get_attributes_to_check() == ('cv02', )
+
+
+def test_compile_all_check_plan():
+    plan = compile_all_check_plan(dummy_cv['cv06']['car'], ['description'])
+    assert plan.get_attributes_to_check() == ('cv02', )
+
+    with pytest.raises(TypeError):
+        compile_all_check_plan(['a', 'list'])
+
+
+def test_get_check_plan():
+    my_cv_struct = cv_structure(dummy_cv_struct)
+
+    # plans are reused for the same structure and CVs
+    plan = get_check_plan(my_cv_struct, dummy_cv, ['description'])
+    assert plan is get_check_plan(my_cv_struct, dummy_cv, ['description'])
+
+    # new CVs => new plan
+    other_cv = dict(dummy_cv)
+    assert plan is not get_check_plan(my_cv_struct, other_cv, ['description'])
+
+
+def test_get_child_plan_cached():
+    my_cv_struct = cv_structure(dummy_cv_struct)
+    plan = compile_check_plan(my_cv_struct, dummy_cv, ['description'])
+    checks = dict(zip(plan.get_attributes_to_check(), plan.checks))
+
+    # child plans are compiled once per value
+    child_plan = checks['cv06'].get_child_plan('car')
+    assert checks['cv06'].get_child_plan('car') is child_plan
+    assert checks['cv06'].get_child_plan('bike') is not child_plan
+    assert list(checks['cv06'].child_plans) == ['car', 'bike']
+    with pytest.raises(KeyError):
+        checks['cv06'].get_child_plan('ship')
+    with pytest.raises(TypeError):
+        checks['cv06'].get_child_plan(['car'])
+
+    # cached child plans are not pickled
+    new_check = pickle.loads(pickle.dumps(checks['cv06']))
+    assert new_check.child_plans == {}
+    assert new_check.get_child_plan('car').get_attributes_to_check() == \
+        ('cv02', )
+
+    # all-check plans are reused for the same CVs
+    plan = get_all_check_plan(dummy_cv['cv06']['bike'], ['description'])
+    assert plan is get_all_check_plan(dummy_cv['cv06']['bike'],
+                                      ['description'])
+    assert plan is not get_all_check_plan(dict(dummy_cv['cv06']['bike']),
+                                          ['description'])
+
+
+def test_verdict_cache():
+    my_cv_struct = cv_structure(dummy_cv_struct)
+    plan = compile_check_plan(my_cv_struct, dummy_cv, ['description'])
+    cache = verdict_cache()
+    attributes = {'attr01': 'DKRZ', 'cv06': 'car', 'cv02': 'red',
+                  'variable_id': 'tas'}
+
+    # attributes read by the plan and its child plans
+    recorder = attribute_recorder(attributes)
+    assert 'cv06' in recorder and recorder['cv06'] == 'car'
+    assert list(recorder.read) == ['cv06']
+
+    assert cache.get(plan, attributes) is None
+    cache.put(plan, attributes, ['attr01', 'cv06', 'cv02', 'attr14'],
+              ['result'])
+    assert cache.get(plan, attributes) == ('result', )
+    # other values of attributes, which are not read => hit
+    assert cache.get(plan, dict(attributes, variable_id='pr')) == \
+        ('result', )
+    # other values of read attributes, also of child plans => miss
+    assert cache.get(plan, dict(attributes, cv02='blue')) is None
+    assert cache.get(plan, dict(attributes, attr01='mfg')) is None
+    attributes_missing = dict(attributes)
+    attributes_missing.pop('attr01')
+    assert cache.get(plan, attributes_missing) is None
+    # values of other types => miss
+    assert cache.get(plan, dict(attributes, attr14=numpy.int32(1))) is None
+    cache.put(plan, dict(attributes, attr14=numpy.int32(1)),
+              ['attr01', 'cv06', 'cv02', 'attr14'], ['int32'])
+    assert cache.get(plan, dict(attributes, attr14=1)) is None
+    # unhashable values are not cached
+    cache.put(plan, dict(attributes, attr14=numpy.arange(3)),
+              ['attr01', 'cv06', 'cv02', 'attr14'], ['array'])
+    assert cache.get(plan, dict(attributes, attr14=numpy.arange(3))) is None
+    # other plan => miss
+    other_plan = compile_check_plan(my_cv_struct, dummy_cv, ['description'])
+    assert cache.get(other_plan, attributes) is None
+
+    assert cache.get_stats() == {'hits': 2, 'misses': 8, 'size': 2,
+                                 'hit_rate': 0.2}
+
+
+def test_execute_check_plan_verdict_cache(monkeypatch):
+    my_cv_struct = cv_structure(dummy_cv_struct)
+    plan = compile_check_plan(my_cv_struct, dummy_cv, ['description'])
+    checker = CMIP6CVBaseCheck()
+    attributes = {'attr01': 'DKRZ', 'cv06': 'bike', 'cv02': 'red',
+                  'wheels': 'two', 'variable_id': 'tas'}
+
+    clear_verdict_cache()
+    results = checker.execute_check_plan([], attributes, plan)
+    # same results from the cache
+    for other in [attributes, dict(attributes, variable_id='pr')]:
+        cached = checker.execute_check_plan([], other, plan)
+        assert [r.serialize() for r in cached] == \
+            [r.serialize() for r in results]
+    assert get_verdict_cache_stats()['hits'] == 2
+    # value of an attribute of a grandchild plan differs
+    other = dict(attributes, cv02='blue')
+    assert checker.execute_check_plan([], other, plan) != results
+    assert get_verdict_cache_stats()['misses'] == 2
+
+    # disabled cache
+    monkeypatch.setattr(check_plan_module, '__verdict_cache_size__', 0)
+    checker.execute_check_plan([], attributes, plan)
+    assert get_verdict_cache_stats()['hits'] == 2
+    clear_verdict_cache()
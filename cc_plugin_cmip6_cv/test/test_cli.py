@@ -0,0 +1,93 @@
+from cc_plugin_cmip6_cv.cli import main, walk_tree
+import pytest
+import os
+import json
+import shutil
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = __current_dir__+'/data/example_file_cf_issue_212.nc'
+
+
+@pytest.fixture
+def package_cvs(monkeypatch):
+    # use the CVs shipped with the package; no update
+    monkeypatch.setenv('CMIP6_JSON_PATH',
+                       os.path.split(__current_dir__)[0]+'/data')
+
+
+@pytest.fixture
+def test_tree(tmp_path):
+    # tree/a.nc, tree/sub/b.nc, tree/sub/subsub/c.nc, tree/sub/notes.txt
+    os.makedirs(str(tmp_path/'tree'/'sub'/'subsub'))
+    shutil.copy(__test_file__, str(tmp_path/'tree'/'a.nc'))
+    shutil.copy(__test_file__, str(tmp_path/'tree'/'sub'/'b.nc'))
+    shutil.copy(__test_file__, str(tmp_path/'tree'/'sub'/'subsub'/'c.nc'))
+    (tmp_path/'tree'/'sub'/'notes.txt').write_text('no netCDF file')
+    return str(tmp_path/'tree')
+
+
+def test_walk_tree(test_tree):
+    found = sorted(os.path.relpath(p, test_tree)
+                   for p in walk_tree([test_tree]))
+    assert found == ['a.nc', 'sub/b.nc', 'sub/subsub/c.nc']
+    assert ['sub/notes.txt'] == [os.path.relpath(p, test_tree)
+                                 for p in walk_tree([test_tree], '.txt')]
+    # files are passed through
+    assert [__test_file__] == list(walk_tree([__test_file__]))
+
+
+def test_walk_tree_zarr(test_tree):
+    # Zarr stores are yielded independent of their names and not traversed
+    store = test_tree+'/sub/store'
+    os.makedirs(store+'/tas')
+    with open(store+'/.zgroup', 'w') as f:
+        f.write('{"zarr_format": 2}')
+    shutil.copy(__test_file__, store+'/tas/d.nc')
+    found = sorted(os.path.relpath(p, test_tree)
+                   for p in walk_tree([test_tree]))
+    assert found == ['a.nc', 'sub/b.nc', 'sub/store', 'sub/subsub/c.nc']
+    assert [store] == list(walk_tree([store]))
+
+    # other Zarr files (e.g. a stray `.zattrs`) do not make a store
+    with open(test_tree+'/sub/subsub/.zattrs', 'w') as f:
+        f.write('{}')
+    with open(test_tree+'/zarr.json', 'w') as f:
+        f.write('{"attributes": {}}')
+    found = sorted(os.path.relpath(p, test_tree)
+                   for p in walk_tree([test_tree]))
+    assert found == ['a.nc', 'sub/b.nc', 'sub/store', 'sub/subsub/c.nc']
+
+
+@pytest.mark.parametrize("workers", ['1', '2'])
+def test_main(package_cvs, test_tree, capsys, workers):
+    # the test file does not pass all checks => 1
+    assert 1 == main([test_tree, '--workers', workers])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3
+    for line in lines:
+        output = json.loads(line)
+        assert output['error'] is None
+        assert output['checks'] == output['passed'] + len(output['failed'])
+        assert 'results' not in output
+
+    # all results
+    assert 1 == main([test_tree+'/a.nc', '--workers', workers,
+                      '--all-results'])
+    output = json.loads(capsys.readouterr().out)
+    assert len(output['results']) == output['checks']
+
+    # file which cannot be checked => 2
+    assert 2 == main([test_tree+'/sub/notes.txt', '--workers', workers])
+    output = json.loads(capsys.readouterr().out)
+    assert output['error'] is not None
+
+
+@pytest.mark.parametrize("chunk_size", ['0', '-1', 'x'])
+def test_main_bad_chunk_size(test_tree, capsys, chunk_size):
+    # usage errors exit with 2 before any file is checked
+    with pytest.raises(SystemExit) as e:
+        main([test_tree, '--chunk-size', chunk_size])
+    assert e.value.code == 2
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert '--chunk-size' in captured.err
@@ -0,0 +1,108 @@
+from cc_plugin_cmip6_cv.cv_snapshot import read_cmip6_json_cv_snapshot, \
+    get_cv_structure_digest, __loaded_cv_snapshots__
+from cc_plugin_cmip6_cv.util import data_directory_collection, \
+    read_cmip6_json_cv
+from cc_plugin_cmip6_cv.check_plan import check_plan
+from cc_plugin_cmip6_cv.cv_structure import cv_structure
+import cc_plugin_cmip6_cv.cv_snapshot as cv_snapshot
+import pytest
+import os
+import shutil
+import json
+import warnings
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~ DEFINE TEST DATA ~~~~~~~~~~~~~~~~~~~~~~
+package_data_dir = os.path.dirname(os.path.dirname(__file__)) + '/data'
+cv_names = ['institution_id', 'nominal_resolution']
+dummy_cv_struct = {'institution_id': ['in', 'institution_id', None, 'keys',
+                                      False],
+                   'nominal_resolution': ['in', 'nominal_resolution', None,
+                                          '', False]}
+
+
+@pytest.fixture
+def cv_dir(tmp_path, monkeypatch):
+    os.makedirs(str(tmp_path/'cvs'))
+    for n in cv_names:
+        shutil.copy(package_data_dir+'/CMIP6_'+n+'.json',
+                    str(tmp_path/'cvs'/('CMIP6_'+n+'.json')))
+    monkeypatch.setenv('CC_PLUGIN_CMIP6_CV_TEST_DIR', str(tmp_path/'cvs'))
+    __loaded_cv_snapshots__.clear()
+    yield data_directory_collection('CC_PLUGIN_CMIP6_CV_TEST_DIR',
+                                    'test_app', 'test_creator')
+    __loaded_cv_snapshots__.clear()
+
+
+def test_get_cv_structure_digest():
+    my_cv_struct = cv_structure(dummy_cv_struct)
+    digest = get_cv_structure_digest(my_cv_struct, ['description'])
+    assert digest == get_cv_structure_digest(my_cv_struct, ['description'])
+    assert digest == get_cv_structure_digest(cv_structure(dummy_cv_struct),
+                                             ['description'])
+    assert digest != get_cv_structure_digest(my_cv_struct)
+
+
+def test_read_cmip6_json_cv_snapshot(cv_dir, monkeypatch):
+    my_cv_struct = cv_structure(dummy_cv_struct)
+
+    # first call => JSON files are read and the plan is compiled
+    cvs, plan = read_cmip6_json_cv_snapshot(cv_names, cv_dir, my_cv_struct)
+    assert cvs == read_cmip6_json_cv(cv_names, cv_dir)
+    assert isinstance(plan, check_plan)
+    assert plan.get_attributes_to_check() == ('institution_id',
+                                              'nominal_resolution')
+    checks = dict(zip(plan.get_attributes_to_check(), plan.checks))
+    assert checks['institution_id'].predicate('IPSL')
+    assert not checks['institution_id'].predicate('XXXX')
+
+    # source files unchanged => JSON files are not read again
+    def fail(*args, **kwargs):
+        raise AssertionError('JSON CVs read although they are unchanged')
+    with monkeypatch.context() as m:
+        m.setattr(cv_snapshot, 'find_cmip6_json_cv_files', fail)
+        new_cvs, new_plan = read_cmip6_json_cv_snapshot(cv_names, cv_dir,
+                                                        my_cv_struct)
+        assert new_cvs is cvs
+        assert new_plan is plan
+
+    # JSON file modified => read again
+    json_file = cv_dir.__data_dir__+'/CMIP6_institution_id.json'
+    with open(json_file) as f:
+        content = json.load(f)
+    content['institution_id']['XXXX'] = 'some new institution'
+    with open(json_file, 'w') as f:
+        json.dump(content, f)
+    cvs, plan = read_cmip6_json_cv_snapshot(cv_names, cv_dir, my_cv_struct)
+    assert 'XXXX' in cvs['institution_id']
+    checks = dict(zip(plan.get_attributes_to_check(), plan.checks))
+    assert checks['institution_id'].predicate('XXXX')
+
+    # other cv_structure => plan is compiled again
+    other_struct = cv_structure({'institution_id':
+                                 dummy_cv_struct['institution_id']})
+    cvs, plan = read_cmip6_json_cv_snapshot(cv_names, cv_dir, other_struct)
+    assert plan.get_attributes_to_check() == ('institution_id',)
+
+    # nothing is written into the data directory
+    assert sorted(os.listdir(cv_dir.__data_dir__)) == \
+        ['CMIP6_'+n+'.json' for n in cv_names]
+
+
+def test_read_cmip6_json_cv_snapshot_fallback(cv_dir):
+    my_cv_struct = cv_structure(dummy_cv_struct)
+
+    # file missing in the data directory => fall-back directory is used and
+    # the user is told so, also if the loaded CVs are reused
+    os.remove(cv_dir.__data_dir__+'/CMIP6_nominal_resolution.json')
+    for i in range(2):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            cvs, plan = read_cmip6_json_cv_snapshot(cv_names, cv_dir,
+                                                    my_cv_struct)
+        assert [str(x.message) for x in w
+                if 'Switching to fall-back directory' in str(x.message)
+                and 'nominal_resolution' in str(x.message)]
+        assert 'nominal_resolution' in cvs
+        assert os.listdir(cv_dir.__data_dir__) == \
+            ['CMIP6_institution_id.json']
@@ -1,7 +1,10 @@
 from cc_plugin_cmip6_cv.cv_structure import cv_structure, \
     validate_structure_of_cvs, should_process_all_cvs, \
-    validate_argument_attribute
+    validate_argument_attribute, cv_membership_index, get_membership_index, \
+    convert_cv_to_regex, compile_cv_regex
 import cc_plugin_cmip6_cv.cv_structure as cv_tools
+from cc_plugin_cmip6_cv.util import set_validation_level, \
+    __validation_state__
 import pytest
 import numpy
 import inspect
@@ -222,6 +225,32 @@ def test__cv_tools__validate_argument_attribute():
         dummy_fun(dummy_cv_struct, 'attr01')
 
 
+def test__cv_tools__validate_argument_attribute_validation_level():
+    dummy_cv_struct = cv_structure(dummy_cv_struct_good_01)
+
+    @validate_argument_attribute(None)
+    def dummy_fun(cv_struct, attribute):
+        return attribute in cv_struct
+
+    old_state = dict(__validation_state__)
+    try:
+        # no validation => no error for an unknown attribute
+        set_validation_level('off')
+        assert not dummy_fun(dummy_cv_struct, 'attr03')
+        # validation again
+        set_validation_level('full')
+        with pytest.raises(ValueError):
+            dummy_fun(dummy_cv_struct, 'attr03')
+        # no decoration at all (environment variable set to 'off')
+        __validation_state__['decorate'] = False
+
+        def dummy_fun(cv_struct, attribute):
+            return attribute in cv_struct
+        assert dummy_fun is validate_argument_attribute(None)(dummy_fun)
+    finally:
+        __validation_state__.update(old_state)
+
+
 def test_cv_tools_constants():
 
     # set global module-variables to check
@@ -722,6 +751,75 @@ def test__cv_tools__check_cv():
         tmp = dummy_cv_struct_good_B.check_cv('attr12', example_dict, 'a string to check', True)
 
 
+def test__cv_tools__membership_index():
+    # elements, types and membership
+    cv_index = cv_membership_index(dummy_cv['cv01'], dummy_cv['cv01'].keys())
+    assert cv_index.values == frozenset(['DKRZ', 'mfg', 'asap'])
+    assert cv_index.has_element_type(str)
+    assert not cv_index.has_element_type(int)
+    assert cv_index.contains('DKRZ')
+    assert not cv_index.contains('ARD')
+    #   unhashable values do not raise
+    assert not cv_index.contains(['DKRZ'])
+
+    #   a string is one element
+    cv_index = cv_membership_index('CF', 'CF')
+    assert cv_index.elements == ('CF', )
+
+    #   unhashable elements
+    cv_index = cv_membership_index(None, [['a'], ['b']])
+    assert cv_index.values is None
+    assert cv_index.contains(['b'])
+
+    # the index is reused as long as the same CV is passed
+    dummy_cv_struct = cv_structure(dummy_cv_struct_good_01)
+    index_a = get_membership_index('cv01', 'keys', dummy_cv['cv01'],
+                                   dict.keys,
+                                   dummy_cv_struct._apply_cv_prepare_fun)
+    index_b = get_membership_index('cv01', 'keys', dummy_cv['cv01'],
+                                   dict.keys,
+                                   dummy_cv_struct._apply_cv_prepare_fun)
+    assert index_a is index_b
+    other_cv = dict(dummy_cv['cv01'])
+    index_c = get_membership_index('cv01', 'keys', other_cv, dict.keys,
+                                   dummy_cv_struct._apply_cv_prepare_fun)
+    assert index_c is not index_a
+    assert index_c.source is other_cv
+
+    # the type of the value is still checked
+    with pytest.raises(TypeError):
+        dummy_cv_struct.check_cv('attr01', dummy_cv, 5)
+
+
+def test__cv_tools__cv_regex():
+    # conversion of the pseudo-regex of the CMIP6 license CV
+    assert convert_cv_to_regex(
+        'by <Your Centre Name> (see https://a.b/c)') == 'by .* \\(see .*\\)'
+    assert convert_cv_to_regex('Attribution-[NonCommercial-]ShareAlike') == \
+        'Attribution.*ShareAlike'
+
+    # compiled regexes are cached
+    assert compile_cv_regex(('A <x>', )) is compile_cv_regex(('A <x>', ))
+
+    # several templates => one regex matching any of them
+    regex = compile_cv_regex(('A <x>', 'B[y]'))
+    assert regex.fullmatch('A 1')
+    assert regex.fullmatch('B')
+    assert not regex.fullmatch('C 1')
+
+    # check via cv_structure
+    dummy_cv_struct = cv_structure({'attr01': ['regex', 'cv', None, '',
+                                               False]})
+    assert dummy_cv_struct.check_cv('attr01', {'cv': ['A <x>', 'B[y]']},
+                                    'B', True)
+    assert not dummy_cv_struct.check_cv('attr01', {'cv': ['A <x>']}, 'B',
+                                        True)
+    with pytest.raises(ValueError):
+        dummy_cv_struct.check_cv('attr01', {'cv': []}, 'B', True)
+    with pytest.raises(TypeError):
+        dummy_cv_struct.check_cv('attr01', {'cv': ['A <x>']}, 5, True)
+
+
 def test__cf_tools__should_process_all_cvs():
 
     # successful: True
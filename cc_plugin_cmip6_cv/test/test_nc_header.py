@@ -0,0 +1,152 @@
+from cc_plugin_cmip6_cv.nc_header import read_classic_global_attributes, \
+    is_classic_file, read_file_global_attributes, \
+    read_hdf5_global_attributes, set_hdf5_reader, get_hdf5_reader, \
+    __hdf5_reader_state__
+import cc_plugin_cmip6_cv.nc_header as nc_header
+from cc_plugin_cmip6_cv.util import read_global_attributes
+import netCDF4 as nc
+import numpy
+import pytest
+import os
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = __current_dir__+'/data/example_file_cf_issue_212.nc'
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~ DEFINE TEST DATA ~~~~~~~~~~~~~~~~~~~~~~
+dummy_attributes = {'title': 'Test ä ü', 'empty': '',
+                    'forcing_index': numpy.int32(1),
+                    'byte': numpy.int8(-3),
+                    'shorts': numpy.array([1, 2], 'i2'),
+                    'float': numpy.float32(1.5),
+                    'doubles': numpy.array([1.0, 2.0, 3.0])}
+dummy_attributes_cdf5 = {'ubyte': numpy.uint8(200),
+                         'ushorts': numpy.array([1, 65000], 'u2'),
+                         'int64': numpy.int64(-2**40),
+                         'uint64s': numpy.array([2**63, 1], 'u8')}
+
+
+def write_file(path, file_format, attributes):
+    dataset = nc.Dataset(path, 'w', format=file_format)
+    dataset.createDimension('time', None)
+    dataset.createDimension('x', 3)
+    dataset.createVariable('tas', 'f4', ('time', 'x')).units = 'K'
+    for name, value in attributes.items():
+        dataset.setncattr(name, value)
+    dataset.close()
+
+
+def assert_same_attributes(attributes, expected):
+    assert list(attributes) == list(expected)
+    for name, value in expected.items():
+        assert type(attributes[name]) == type(value)
+        if isinstance(value, numpy.ndarray):
+            assert attributes[name].dtype == value.dtype
+            assert numpy.array_equal(attributes[name], value)
+        else:
+            assert attributes[name] == value
+
+
+@pytest.mark.parametrize("file_format", ['NETCDF3_CLASSIC',
+                                         'NETCDF3_64BIT_OFFSET',
+                                         'NETCDF3_64BIT_DATA'])
+def test_read_classic_global_attributes(tmp_path, file_format):
+    path = str(tmp_path/'test.nc')
+    attributes = dict(dummy_attributes)
+    if file_format == 'NETCDF3_64BIT_DATA':
+        attributes.update(dummy_attributes_cdf5)
+    write_file(path, file_format, attributes)
+
+    # same values as read by netCDF4
+    dataset = nc.Dataset(path)
+    expected = read_global_attributes(dataset)
+    dataset.close()
+    assert is_classic_file(path)
+    assert_same_attributes(read_classic_global_attributes(path), expected)
+    assert_same_attributes(read_file_global_attributes(path), expected)
+
+
+def test_read_classic_global_attributes_errors(tmp_path):
+    # no global attributes
+    path = str(tmp_path/'test.nc')
+    write_file(path, 'NETCDF3_CLASSIC', {})
+    assert read_classic_global_attributes(path) == {}
+
+    # truncated header
+    write_file(path, 'NETCDF3_CLASSIC', dummy_attributes)
+    with open(path, 'rb') as f:
+        header = f.read(100)
+    with open(path, 'wb') as f:
+        f.write(header)
+    with pytest.raises(ValueError):
+        read_classic_global_attributes(path)
+
+    # damaged lengths in the header are not read beyond the end of the file
+    write_file(path, 'NETCDF3_CLASSIC', dummy_attributes)
+    with open(path, 'rb') as f:
+        content = bytearray(f.read())
+    position = content.find(b'title')
+    for offset, what in [(position + 12, 'length of attribute title'),
+                         (position - 8, 'number of global attributes')]:
+        damaged = bytearray(content)
+        damaged[offset:offset+4] = b'\x7f\xff\xff\xff'
+        with open(path, 'wb') as f:
+            f.write(damaged)
+        with pytest.raises(ValueError, match=what):
+            read_classic_global_attributes(path)
+
+    # netCDF4/HDF5 file
+    assert not is_classic_file(__test_file__)
+    with pytest.raises(ValueError):
+        read_classic_global_attributes(__test_file__)
+    dataset = nc.Dataset(__test_file__)
+    expected = read_global_attributes(dataset)
+    dataset.close()
+    assert_same_attributes(read_file_global_attributes(__test_file__),
+                           expected)
+
+
+def test_read_hdf5_global_attributes(tmp_path):
+    pytest.importorskip('h5py')
+    path = str(tmp_path/'test.nc')
+    attributes = dict(dummy_attributes)
+    attributes.update(dummy_attributes_cdf5)
+    write_file(path, 'NETCDF4', attributes)
+    dataset = nc.Dataset(path, 'a')
+    dataset.setncattr_string('vlen', 'a string')
+    dataset.setncattr_string('vlens', ['one', 'two'])
+    dataset.close()
+
+    # same values as read by netCDF4
+    for test_path in [path, __test_file__]:
+        dataset = nc.Dataset(test_path)
+        expected = read_global_attributes(dataset)
+        dataset.close()
+        assert_same_attributes(read_hdf5_global_attributes(test_path),
+                               expected)
+
+    # no HDF5 file
+    write_file(path, 'NETCDF3_CLASSIC', dummy_attributes)
+    with pytest.raises(OSError):
+        read_hdf5_global_attributes(path)
+
+
+def test_hdf5_reader(monkeypatch):
+    old_state = dict(__hdf5_reader_state__)
+    try:
+        assert get_hdf5_reader() in ['netcdf4', 'h5py']
+        with pytest.raises(ValueError):
+            set_hdf5_reader('pytables')
+        monkeypatch.setattr(nc_header, 'h5py', None)
+        with pytest.raises(ValueError):
+            set_hdf5_reader('h5py')
+        monkeypatch.undo()
+
+        # files are read via h5py only if selected
+        pytest.importorskip('h5py')
+        set_hdf5_reader('h5py')
+        monkeypatch.setattr(nc_header.nc, 'Dataset', None)
+        assert_same_attributes(read_file_global_attributes(__test_file__),
+                               read_hdf5_global_attributes(__test_file__))
+    finally:
+        __hdf5_reader_state__.update(old_state)
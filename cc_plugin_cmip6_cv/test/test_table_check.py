@@ -0,0 +1,123 @@
+from cc_plugin_cmip6_cv import check_table, table_check_result
+from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
+import netCDF4 as nc
+import numpy
+import pytest
+import os
+
+__current_dir__ = os.path.abspath(os.path.dirname(__file__))
+__test_file__ = __current_dir__+'/data/example_file_cf_issue_212.nc'
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~ DEFINE TEST DATA ~~~~~~~~~~~~~~~~~~~~~~
+# variations of the global attributes of the test file; one row each
+dummy_rows = [{},
+              {'institution_id': 'XXXX'},
+              {'institution_id': None},
+              {'experiment_id': 'historical', 'activity_id': 'CMIP',
+               'source_id': 'MPI-ESM1-2-HR'},
+              {'experiment_id': 'historical', 'activity_id': 'ScenarioMIP',
+               'sub_experiment_id': 'none', 'parent_experiment_id': 'none'},
+              {'experiment_id': 'ssp585', 'activity_id': 'ScenarioMIP'},
+              {'experiment_id': 'no_experiment'},
+              {'forcing_index': 1},
+              {'license': 'CC-BY 4.0', 'Conventions': 'CF-1.7 CMIP-6.2'},
+              {'frequency': 5}]
+
+
+@pytest.fixture
+def package_cvs(monkeypatch):
+    # use the CVs shipped with the package; no update
+    monkeypatch.setenv('CMIP6_JSON_PATH',
+                       os.path.split(__current_dir__)[0]+'/data')
+
+
+def get_test_rows():
+    with nc.Dataset(__test_file__) as dataset:
+        attributes = {name: dataset.getncattr(name)
+                      for name in dataset.ncattrs()}
+    return [dict(attributes, **row) for row in dummy_rows]
+
+
+def check_rows(rows):
+    # results of `execute_check_plan` per row; key: hierarchy of the
+    # checked attributes
+    checker = CMIP6CVBaseCheck()
+    plan = checker.prepare_check_plan()
+    checked = []
+    for row in rows:
+        attributes = {name: value for name, value in row.items()
+                      if value is not None}
+        try:
+            results = checker.execute_check_plan([], attributes, plan)
+        except TypeError:
+            checked.append(None)
+            continue
+        checked.append({r.msgs[0].split('hierarchy of CVs checked: ')[1]:
+                        r.value for r in results})
+    return checked
+
+
+def assert_same_as_rows(result, rows):
+    assert isinstance(result, table_check_result)
+    assert result.passed.shape == (len(rows), len(result.checks))
+    assert result.performed.shape == result.passed.shape
+    assert not (result.passed & ~result.performed).any()
+    for i, expected in enumerate(check_rows(rows)):
+        performed = {name: bool(passed) for name, passed, done
+                     in zip(result.checks, result.passed[i],
+                            result.performed[i]) if done}
+        if expected is None:
+            # type error for this row => check with the wrong type fails
+            assert not all(performed.values())
+        else:
+            assert performed == expected
+
+
+def test_check_table(package_cvs):
+    rows = get_test_rows()
+    names = sorted(set(name for row in rows for name in row))
+
+    # dict of sequences
+    table = {name: [row.get(name) for row in rows] for name in names}
+    result = check_table(table)
+    assert_same_as_rows(result, rows)
+    assert 'experiment_id -> activity_id' in result.checks
+
+    # dict of numpy arrays; strings as `str_`
+    table = {name: numpy.array(column) if name in ['license', 'source_id']
+             else column for name, column in table.items()}
+    table['forcing_index'] = numpy.ones(len(rows), dtype=numpy.int32)
+    for row in rows:
+        row['forcing_index'] = numpy.int32(1)
+    assert_same_as_rows(check_table(table), rows)
+
+    # missing column
+    table.pop('institution_id')
+    result = check_table(table)
+    assert not result.passed[:, result.checks.index('institution_id')].any()
+
+
+def test_check_table_pandas(package_cvs):
+    pandas = pytest.importorskip('pandas')
+    rows = get_test_rows()
+    table = pandas.DataFrame(rows)
+    table['institution_id'] = table['institution_id'].astype('category')
+    assert_same_as_rows(check_table(table), rows)
+
+    # equal values of different types get their own results
+    for row, value in zip(rows, [numpy.int32(1), 1, '1', 1.0]):
+        row['forcing_index'] = value
+    table = pandas.DataFrame(rows)
+    assert table['forcing_index'].dtype == object
+    result = check_table(table)
+    assert_same_as_rows(result, rows)
+    assert list(result.passed[:4, result.checks.index('forcing_index')]) == \
+        [True, False, False, False]
+
+
+def test_check_table_errors():
+    with pytest.raises(ValueError):
+        check_table({'frequency': ['mon'], 'realm': []})
+    with pytest.raises(TypeError):
+        check_table([{'frequency': 'mon'}])
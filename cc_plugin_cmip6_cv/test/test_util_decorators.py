@@ -1,4 +1,5 @@
-from cc_plugin_cmip6_cv.util import accepts
+from cc_plugin_cmip6_cv.util import accepts, set_validation_level, \
+        get_validation_level, __validation_state__
 import pytest
 
 
@@ -117,3 +118,51 @@ def test__cv_tools__accepts():
         def dummy_fun(arg1, arg2):
             return arg1+arg2
         dummy_fun(1, 5)
+
+    #   provide a wrong type to the function call via keyword, TypeError
+    with pytest.raises(TypeError, match='does not match type'):
+        @accepts(int, (int, float))
+        def dummy_fun(arg1, arg2):
+            return arg1+arg2
+        dummy_fun(1, arg2='a String')
+
+
+@pytest.fixture
+def restore_validation_level():
+    old_state = dict(__validation_state__)
+    yield
+    __validation_state__.update(old_state)
+
+
+def test__cv_tools__accepts_validation_level(restore_validation_level):
+    @accepts(int, int)
+    def dummy_fun(arg1, arg2):
+        return arg1+arg2
+
+    assert get_validation_level() == 'full'
+    with pytest.raises(TypeError):
+        dummy_fun(1, 'a String')
+
+    # no validation => no error
+    set_validation_level('off')
+    assert get_validation_level() == 'off'
+    assert 'a String' * 2 == dummy_fun('a String', 'a String')
+
+    # validation again
+    set_validation_level('full')
+    with pytest.raises(TypeError):
+        dummy_fun(1, 'a String')
+
+    # unknown level
+    with pytest.raises(ValueError):
+        set_validation_level('some')
+
+    # no decoration at all (environment variable set to 'off')
+    __validation_state__['decorate'] = False
+
+    def dummy_fun(arg1, arg2):
+        return arg1+arg2
+    assert dummy_fun is accepts(int, int)(dummy_fun)
+    #   errors in the decorator call are still found
+    with pytest.raises(RuntimeError):
+        accepts(int)(dummy_fun)
@@ -1,7 +1,16 @@
 from cc_plugin_cmip6_cv.util import is_json_cv, compare_json_cv_versions, \
         isinstance_recursive_tuple, is_dir_locked, lock_dir, unlock_dir, \
         download_file, update_needed, update_cmip6_json_cv, update_json_cv, \
-        update_performed, data_directory_collection
+        update_performed, data_directory_collection, load_json_file_cached, \
+        get_cv_cache_stats, clear_cv_cache, read_json_cv, \
+        update_cmip6_json_cv_if_due, reset_update_check, \
+        read_global_attributes, download_files, get_http_session, \
+        download_file_if_modified, read_manifest, write_manifest, \
+        get_valid_manifest_entry, get_file_sha256, dir_lock, \
+        get_snapshot_dir, collect_snapshots, load_json_cv, \
+        read_cv_collection_version, get_cv_collection_version, lazy_cv, \
+        index_json_cv_entries, load_json_file_lazy, compact_cvs, \
+        compact_cv_entry
 import cc_plugin_cmip6_cv.util as util
 from cc_plugin_cmip6_cv.cmip6_cv import CMIP6CVBaseCheck
 import pytest
@@ -10,6 +19,15 @@ import datetime
 import inspect
 import appdirs
 import functools
+import shutil
+import json
+import netCDF4 as nc
+import http.server
+import threading
+import time
+import multiprocessing
+import socket
+import pickle
 
 __current_dir__ = os.path.abspath(os.path.dirname(__file__))
 # __lock_test_dir__ = __current_dir__+'/tmp_test_lock'
@@ -55,6 +73,58 @@ def prepost_test_dir(test_dir):
     return decorator
 
 
+class local_cv_request_handler(http.server.SimpleHTTPRequestHandler):
+    # serves the test data; requests to `/slow/...` are answered late;
+    # ETags are the sha256 of the files
+
+    def __init__(self, request, client_address, server):
+        self.etag = None
+        super().__init__(request, client_address, server,
+                         directory=server.directory)
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path.startswith('/slow/'):
+            time.sleep(1)
+            self.path = self.path[5:]
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            self.etag = '"' + get_file_sha256(path) + '"'
+            if self.headers.get('If-None-Match') == self.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+        return super().do_GET()
+
+    def send_response(self, code, message=None):
+        self.server.responses.append(code)
+        super().send_response(code, message)
+
+    def end_headers(self):
+        if self.etag is not None:
+            self.send_header('ETag', self.etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_cv_server():
+    # local HTTP server standing in for the CV repository
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                             local_cv_request_handler)
+    server.directory = __current_dir__+'/data'
+    server.requests = []
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = 'http://127.0.0.1:'+str(server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 def remove_recursive(target_dir):
     # check if dir/file exists
     if os.path.exists(target_dir):
@@ -253,6 +323,130 @@ def test_is_dir_locked():
     os.rmdir(lock_test_file)
     assert not is_dir_locked(__lock_test_dir__)
 
+def test_dir_lock(tmp_path, monkeypatch):
+    some_dir = str(tmp_path)
+    lock_path = some_dir+'/'+__lock_file__
+    monkeypatch.setattr(util, '__lock_timeout__', 0.2)
+
+    # a lock excludes all other locks
+    lock = dir_lock(some_dir)
+    assert lock.acquire(blocking=False)
+    assert is_dir_locked(some_dir)
+    with pytest.raises(RuntimeError):
+        lock.acquire()
+    assert not dir_lock(some_dir).acquire(blocking=False)
+    assert not dir_lock(some_dir).acquire(timeout=0.1)
+    with pytest.raises(TimeoutError):
+        with dir_lock(some_dir):
+            pass
+    #   PID, host and time are recorded
+    with open(lock_path) as f:
+        record = json.load(f)
+    assert record['pid'] == os.getpid()
+    assert record['host'] == socket.gethostname()
+    assert time.time() - record['time'] < 60
+    #   release removes the lock file
+    lock.release()
+    assert not os.path.exists(lock_path)
+    with dir_lock(some_dir):
+        assert is_dir_locked(some_dir)
+    assert not is_dir_locked(some_dir)
+
+    # lock file of an older version (without holder record) => locked
+    with open(lock_path, 'w') as f:
+        f.write(datetime.date.today().strftime('%Y-%m-%d'))
+    assert not dir_lock(some_dir).acquire(blocking=False)
+    assert not lock_dir(some_dir)
+    assert unlock_dir(some_dir)
+    assert dir_lock(some_dir).acquire(blocking=False)
+
+
+def hold_lock_in_child(some_dir, locked, release):
+    # acquire the lock and hold it until `release` is set
+    lock = dir_lock(some_dir)
+    lock.acquire()
+    locked.set()
+    release.wait(60)
+    lock.release()
+
+
+def test_dir_lock_stale(tmp_path):
+    some_dir = str(tmp_path)
+    lock_path = some_dir+'/'+__lock_file__
+
+    # lock of a living process on this host => not stale, even if it is old
+    ctx = multiprocessing.get_context('fork')
+    locked = ctx.Event()
+    release = ctx.Event()
+    holder = ctx.Process(target=hold_lock_in_child,
+                         args=(some_dir, locked, release))
+    holder.start()
+    try:
+        assert locked.wait(60)
+        with open(lock_path) as f:
+            record = json.load(f)
+        assert record['pid'] == holder.pid
+        with open(lock_path, 'w') as f:
+            json.dump(dict(record, time=0), f)
+        assert not dir_lock(some_dir).acquire(blocking=False)
+        assert is_dir_locked(some_dir)
+    finally:
+        release.set()
+        holder.join()
+
+    # recorded holder is dead
+    dead = ctx.Process(target=time.sleep, args=(0, ))
+    dead.start()
+    dead.join()
+    #   on another host => not stale
+    with open(lock_path, 'w') as f:
+        json.dump({'pid': dead.pid, 'host': 'other.' + socket.gethostname(),
+                   'time': time.time()}, f)
+    assert not dir_lock(some_dir).acquire(blocking=False)
+    #   on this host => stale lock is broken
+    with open(lock_path, 'w') as f:
+        json.dump({'pid': dead.pid, 'host': socket.gethostname(),
+                   'time': time.time()}, f)
+    lock = dir_lock(some_dir)
+    with pytest.warns(RuntimeWarning, match='stale lock'):
+        assert lock.acquire(blocking=False)
+    with open(lock_path) as f:
+        assert json.load(f)['pid'] == os.getpid()
+    lock.release()
+    assert not is_dir_locked(some_dir)
+
+
+def increment_counter_locked(some_dir, n_increments):
+    # increment the counter in some_dir/counter under the lock
+    for i in range(n_increments):
+        with dir_lock(some_dir):
+            with open(some_dir+'/counter') as f:
+                counter = int(f.read())
+            with open(some_dir+'/counter', 'w') as f:
+                f.write(str(counter + 1))
+
+
+def test_dir_lock_stress(tmp_path):
+    some_dir = str(tmp_path)
+    n_processes = 32
+    n_increments = 10
+    with open(some_dir+'/counter', 'w') as f:
+        f.write('0')
+
+    ctx = multiprocessing.get_context('fork')
+    processes = [ctx.Process(target=increment_counter_locked,
+                             args=(some_dir, n_increments))
+                 for i in range(n_processes)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(120)
+
+    assert all([p.exitcode == 0 for p in processes])
+    with open(some_dir+'/counter') as f:
+        assert int(f.read()) == n_processes * n_increments
+    assert not is_dir_locked(some_dir)
+
 
 @pytest.mark.parametrize(
     "src_file,dst_file,warning,output",
@@ -402,13 +596,152 @@ def test_update_needed():
         update_needed(__lock_test_dir__)
 
 
-@pytest.mark.skip(reason="test function not implemented yet")
-@prepost_test_dir(__lock_test_dir__)
-def test_update_json_cv():
-    # TODO: implement
+def test_download_file_local(local_cv_server, tmp_path):
+    src_url = local_cv_server.url
+    dst_file = str(tmp_path/'CMIP6_institution_id.json')
 
-    #  catch warnings with `with pytest.warns(WARNING):`
-    pass
+    # successful download
+    assert dst_file == download_file(src_url+'/CMIP6_institution_id.json',
+                                     dst_file)
+    with open(dst_file, 'rb') as f_dst, \
+            open(__current_dir__+'/data/CMIP6_institution_id.json', 'rb') \
+            as f_src:
+        assert f_src.read() == f_dst.read()
+    with pytest.raises(OSError):
+        download_file(src_url+'/CMIP6_institution_id.json', dst_file,
+                      overwrite=False)
+
+    # file does not exist on server
+    with pytest.warns(RuntimeWarning, match='HTTP status code: 404'):
+        assert download_file(src_url+'/CMIP6_not_existing.json',
+                             str(tmp_path/'CMIP6_not_existing.json')) is None
+
+    # server answers too late
+    with pytest.warns(RuntimeWarning, match='timeout'):
+        assert download_file(src_url+'/slow/CMIP6_institution_id.json',
+                             str(tmp_path/'slow.json'), timeout=0.2) is None
+
+    # one session for all downloads
+    assert get_http_session() is get_http_session()
+
+
+def test_download_files(local_cv_server, tmp_path):
+    file_names = ['CMIP6_institution_id.json', 'CMIP6_nominal_resolution.json',
+                  'CMIP6_test_two_cvs.json']
+    dst_files = [str(tmp_path/n) for n in file_names]
+    assert dst_files == download_files([local_cv_server.url+'/'+n
+                                        for n in file_names], dst_files,
+                                       workers=2)
+    assert all([os.path.isfile(f) for f in dst_files])
+    assert len(local_cv_server.requests) == 3
+
+    assert [] == download_files([], [])
+    with pytest.raises(ValueError):
+        download_files([local_cv_server.url+'/'+file_names[0]], [])
+
+
+def test_update_json_cv(local_cv_server, tmp_path, monkeypatch):
+    monkeypatch.setenv('CC_PLUGIN_CMIP6_CV_TEST_DIR', str(tmp_path))
+    my_data_dir_col = data_directory_collection('CC_PLUGIN_CMIP6_CV_TEST_DIR',
+                                                'test_app', 'test_creator')
+    file_names = ['CMIP6_institution_id.json', 'CMIP6_nominal_resolution.json']
+
+    # missing files are downloaded
+    assert [str(tmp_path)+'/'+n for n in file_names] == \
+        update_json_cv(file_names, local_cv_server.url, my_data_dir_col)
+    for n in file_names:
+        assert is_json_cv(str(tmp_path/n))
+        assert not os.path.exists(str(tmp_path/('tmp.'+n)))
+    assert not is_dir_locked(str(tmp_path))
+
+    # existing files are not downloaded again if no update is needed
+    local_cv_server.requests.clear()
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col)
+    assert local_cv_server.requests == []
+
+    # forced update; same versions => files are kept
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col, True)
+    assert len(local_cv_server.requests) == 2
+
+    # file which cannot be downloaded
+    with pytest.warns(RuntimeWarning, match='could not be downloaded'):
+        update_json_cv('CMIP6_not_existing.json', local_cv_server.url,
+                       my_data_dir_col)
+
+
+def test_update_json_cv_locked(local_cv_server, tmp_path, monkeypatch):
+    monkeypatch.setenv('CC_PLUGIN_CMIP6_CV_TEST_DIR', str(tmp_path))
+    my_data_dir_col = data_directory_collection('CC_PLUGIN_CMIP6_CV_TEST_DIR',
+                                                'test_app', 'test_creator')
+    file_names = ['CMIP6_institution_id.json', 'CMIP6_nominal_resolution.json']
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col)
+    # update always due
+    my_data_dir_col.__do_update__ = True
+    monkeypatch.setattr(util, '__update_period__', datetime.timedelta())
+    local_cv_server.requests.clear()
+
+    # another process is updating => no waiting; current CVs are kept
+    monkeypatch.setattr(util, '__lock_timeout__', 30)
+    with dir_lock(str(tmp_path)):
+        t0 = time.monotonic()
+        with pytest.warns(RuntimeWarning, match='locked by another process'):
+            update_json_cv(file_names, local_cv_server.url, my_data_dir_col)
+        assert time.monotonic() - t0 < 5
+    assert local_cv_server.requests == []
+
+    # another process updated before we got the lock => nothing is done
+    def fail(*args, **kwargs):
+        raise AssertionError('directory modified although up to date')
+    needed = iter([True, False])
+    monkeypatch.setattr(util, 'update_needed', lambda some_dir: next(needed))
+    monkeypatch.setattr(util, 'collect_snapshots', fail)
+    monkeypatch.setattr(util, 'update_performed', fail)
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col)
+    assert local_cv_server.requests == []
+    assert not is_dir_locked(str(tmp_path))
+
+
+def test_update_json_cv_revalidation(local_cv_server, tmp_path, monkeypatch):
+    monkeypatch.setenv('CC_PLUGIN_CMIP6_CV_TEST_DIR', str(tmp_path))
+    my_data_dir_col = data_directory_collection('CC_PLUGIN_CMIP6_CV_TEST_DIR',
+                                                'test_app', 'test_creator')
+    file_names = ['CMIP6_institution_id.json', 'CMIP6_nominal_resolution.json']
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col)
+
+    # manifest written
+    manifest = read_manifest(str(tmp_path))
+    assert sorted(manifest.keys()) == file_names
+    for n in file_names:
+        assert manifest[n]['url'] == local_cv_server.url+'/'+n
+        assert manifest[n]['sha256'] == get_file_sha256(str(tmp_path/n))
+        assert manifest[n]['etag'] is not None
+        assert manifest[n]['last_modified'] is not None
+
+    # count validations of downloaded files
+    calls = []
+    load_json_cv_orig = util.load_json_cv
+    monkeypatch.setattr(util, 'load_json_cv',
+                        lambda f, *args, **kwargs:
+                        calls.append(f) or load_json_cv_orig(f, *args,
+                                                             **kwargs))
+
+    # nothing changed on the server => 304, no download, no validation
+    local_cv_server.responses.clear()
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col, True)
+    assert local_cv_server.responses == [304, 304]
+    assert calls == []
+
+    # local file changed => unconditional download and validation
+    with open(str(tmp_path/file_names[0]), 'a') as f:
+        f.write(' ')
+    local_cv_server.responses.clear()
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col, True)
+    assert sorted(local_cv_server.responses) == [200, 304]
+    assert (set([os.path.basename(f) for f in calls
+                 if os.path.basename(f).startswith('tmp.')]) ==
+            set(['tmp.'+file_names[0]]))
+    assert (read_manifest(str(tmp_path))[file_names[0]]['sha256'] ==
+            get_file_sha256(str(tmp_path/file_names[0])))
 
 
 @pytest.mark.skip(reason="test function not implemented yet")
@@ -418,6 +751,161 @@ def test_update_cmip6_json_cv():
     pass
 
 
+def test_update_json_cv_snapshots(local_cv_server, tmp_path, monkeypatch):
+    # served CVs
+    served_dir = tmp_path/'served'
+    os.makedirs(str(served_dir))
+    local_cv_server.directory = str(served_dir)
+    shutil.copy(__current_dir__+'/data/CMIP6_institution_id.json',
+                str(served_dir))
+    shutil.copy(__current_dir__+'/data/' +
+                'CMIP6_nominal_resolution_lower_version_a.json',
+                str(served_dir/'CMIP6_nominal_resolution.json'))
+    # data directory
+    data_dir = str(tmp_path/'data')
+    os.makedirs(data_dir)
+    monkeypatch.setenv('CC_PLUGIN_CMIP6_CV_TEST_DIR', data_dir)
+    my_data_dir_col = data_directory_collection('CC_PLUGIN_CMIP6_CV_TEST_DIR',
+                                                'test_app', 'test_creator')
+    file_names = ['CMIP6_institution_id.json', 'CMIP6_nominal_resolution.json']
+
+    # first update => first snapshot
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col)
+    old_snapshot = get_snapshot_dir(data_dir)
+    assert os.path.islink(data_dir+'/current')
+    assert os.path.dirname(old_snapshot) == os.path.realpath(data_dir +
+                                                             '/.snapshots')
+    for n in file_names:
+        assert os.path.islink(data_dir+'/'+n)
+        assert os.path.realpath(data_dir+'/'+n) == old_snapshot+'/'+n
+    old_content = read_json_cv(old_snapshot+'/CMIP6_nominal_resolution.json')
+
+    # no change on the server => no new snapshot
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col, True)
+    assert old_snapshot == get_snapshot_dir(data_dir)
+
+    # new version on the server => new snapshot; the pinned old snapshot is
+    # not modified
+    shutil.copy(__current_dir__+'/data/CMIP6_nominal_resolution.json',
+                str(served_dir))
+    update_json_cv(file_names, local_cv_server.url, my_data_dir_col, True)
+    new_snapshot = get_snapshot_dir(data_dir)
+    assert new_snapshot != old_snapshot
+    assert old_content == read_json_cv(old_snapshot +
+                                       '/CMIP6_nominal_resolution.json')
+    assert (get_file_sha256(new_snapshot+'/CMIP6_nominal_resolution.json') ==
+            get_file_sha256(str(served_dir/'CMIP6_nominal_resolution.json')))
+    #   unchanged files are taken over
+    assert (os.stat(new_snapshot+'/CMIP6_institution_id.json').st_ino ==
+            os.stat(old_snapshot+'/CMIP6_institution_id.json').st_ino)
+    #   reading via the data directory yields the new CVs
+    assert (get_file_sha256(data_dir+'/CMIP6_nominal_resolution.json') ==
+            get_file_sha256(str(served_dir/'CMIP6_nominal_resolution.json')))
+
+    # old snapshots are removed after the grace period
+    assert [] == collect_snapshots(data_dir)
+    assert [old_snapshot] == [os.path.realpath(d) for d in collect_snapshots(
+        data_dir, datetime.timedelta())]
+    assert not os.path.exists(old_snapshot)
+    assert os.path.isdir(new_snapshot)
+
+
+def test_manifest(tmp_path):
+    some_dir = str(tmp_path)
+    src_file = 'https://some.url/CMIP6_institution_id.json'
+    dst_file = some_dir+'/CMIP6_institution_id.json'
+    shutil.copy(__current_dir__+'/data/CMIP6_institution_id.json', dst_file)
+
+    # no manifest
+    assert {} == read_manifest(some_dir)
+
+    manifest = {'CMIP6_institution_id.json':
+                {'url': src_file, 'etag': '"abc"',
+                 'last_modified': 'Mon, 01 Jun 2020 00:00:00 GMT',
+                 'sha256': get_file_sha256(dst_file)}}
+    write_manifest(some_dir, manifest)
+    assert manifest == read_manifest(some_dir)
+
+    # valid entry
+    assert (manifest['CMIP6_institution_id.json'] ==
+            get_valid_manifest_entry(manifest, src_file, dst_file))
+    # entry from another url
+    assert get_valid_manifest_entry(manifest, src_file+'x', dst_file) is None
+    # local file was changed
+    with open(dst_file, 'a') as f:
+        f.write(' ')
+    assert get_valid_manifest_entry(manifest, src_file, dst_file) is None
+    # local file was removed
+    os.remove(dst_file)
+    assert get_valid_manifest_entry(manifest, src_file, dst_file) is None
+
+    # corrupt manifest
+    with open(some_dir+'/.manifest.json', 'w') as f:
+        f.write('{"CMIP6_institution')
+    assert {} == read_manifest(some_dir)
+
+
+def test_download_file_if_modified(local_cv_server, tmp_path):
+    src_file = local_cv_server.url+'/CMIP6_institution_id.json'
+
+    # no manifest entry => download
+    result = download_file_if_modified(src_file, str(tmp_path/'a.json'))
+    assert result.file == str(tmp_path/'a.json')
+    assert not result.not_modified
+    assert result.etag is not None and result.last_modified is not None
+
+    # not modified since last download => no download
+    for entry in [{'etag': result.etag},
+                  {'last_modified': result.last_modified},
+                  {'etag': result.etag,
+                   'last_modified': result.last_modified}]:
+        result_b = download_file_if_modified(src_file, str(tmp_path/'b.json'),
+                                             entry)
+        assert result_b.not_modified
+        assert result_b.file is None
+        assert not os.path.exists(str(tmp_path/'b.json'))
+    assert local_cv_server.responses == [200, 304, 304, 304]
+
+    # modified (other ETag) => download
+    result_c = download_file_if_modified(src_file, str(tmp_path/'c.json'),
+                                         {'etag': '"abc"'})
+    assert result_c.file == str(tmp_path/'c.json')
+    assert not result_c.not_modified
+
+
+def test_update_cmip6_json_cv_if_due(monkeypatch):
+    # count calls of the actual update function
+    calls = []
+    monkeypatch.setattr(util, 'update_cmip6_json_cv',
+                        lambda cv_name, dst_dir_coll, force_update:
+                        calls.append(cv_name) or [])
+    my_data_dir_col = data_directory_collection('TEST_ENV_VAR_NOT_SET',
+                                                'test_app', 'test_creator')
+    reset_update_check()
+
+    # first call performs the check; further calls within the interval do not
+    assert [] == update_cmip6_json_cv_if_due('license', my_data_dir_col)
+    assert update_cmip6_json_cv_if_due('license', my_data_dir_col) is None
+    assert update_cmip6_json_cv_if_due('license', my_data_dir_col) is None
+    assert len(calls) == 1
+
+    # forced checks are always performed
+    assert [] == update_cmip6_json_cv_if_due('license', my_data_dir_col, True)
+    assert len(calls) == 2
+
+    # after a reset, the check is performed again
+    reset_update_check(my_data_dir_col.__data_dir__)
+    assert [] == update_cmip6_json_cv_if_due('license', my_data_dir_col)
+    assert len(calls) == 3
+
+    # an interval of zero means: check on each call
+    monkeypatch.setattr(util, '__update_check_interval__',
+                        datetime.timedelta())
+    assert [] == update_cmip6_json_cv_if_due('license', my_data_dir_col)
+    assert len(calls) == 4
+    reset_update_check()
+
+
 def test_is_json_cv():
     path = "cc_plugin_cmip6_cv/test/data"
     # True: correct CVs in correct JSON files
@@ -467,6 +955,140 @@ def test_is_json_cv():
         is_json_cv(path+"/CMIP6_nominal_resolution.json", verbose=77)
 
 
+def test_load_json_cv():
+    path = "cc_plugin_cmip6_cv/test/data"
+    content = load_json_cv(path+"/CMIP6_institution_id.json")
+    assert content.cv is load_json_file_cached(path +
+                                               "/CMIP6_institution_id.json")
+    assert content.version_metadata is content.cv['version_metadata']
+    assert content.version_metadata['CV_collection_version'] == '6.2.45.3'
+    assert load_json_cv(path+"/CMIP6_institution_id.json",
+                        "institution_id") is not None
+    assert load_json_cv(path+"/CMIP6_institution_id.json", "source_id") is None
+    assert load_json_cv(path+"/CMIP6_test_fail01.json") is None
+    assert load_json_cv(path+"/not_an_existing_file.json") is None
+
+    # not cached
+    clear_cv_cache()
+    content = load_json_cv(path+"/CMIP6_nominal_resolution.json",
+                           cached=False)
+    assert content.version_metadata['CV_collection_version'] == '6.2.45.3'
+    assert get_cv_cache_stats()['size'] == 0
+
+
+def test_index_json_cv_entries():
+    cv = {'version_metadata': {'author': 'me'},
+          'test_cv': {'a': {'b': [1, 2, {'c': 'd "}" e'}]}, 'f': 'g',
+                      'h': None},
+          'other_cv': {'x': 'y'}}
+    for text in [json.dumps(cv), json.dumps(cv, indent=4),
+                 json.dumps(cv, separators=(',', ':')), ' {} ']:
+        content = index_json_cv_entries(text, ['test_cv'])
+        assert content == json.loads(text)
+        if 'test_cv' in content:
+            assert isinstance(content['test_cv'], lazy_cv)
+            assert isinstance(content['other_cv'], dict)
+            assert list(content['test_cv']) == ['a', 'f', 'h']
+
+    # invalid JSON
+    for text in ['{"test_cv": {"a": 1,}}', '{"test_cv": {"a" 1}}',
+                 '{"test_cv": {"a": 1}} x', '{"test_cv": {"a": [1}}', '[]']:
+        with pytest.raises(json.JSONDecodeError):
+            index_json_cv_entries(text, ['test_cv'])
+
+
+def test_lazy_cv(monkeypatch):
+    path = "cc_plugin_cmip6_cv/data/CMIP6_experiment_id.json"
+    with open(path) as f:
+        expected = json.load(f)['experiment_id']
+    clear_cv_cache()
+    cv = load_json_file_lazy(path)
+    assert load_json_file_lazy(path) is cv
+    assert get_cv_cache_stats() == {'hits': 1, 'misses': 1, 'size': 1}
+    cv = cv['experiment_id']
+    assert isinstance(cv, lazy_cv)
+
+    # keys only; entries are parsed on access
+    assert len(cv) == len(expected)
+    assert list(cv) == list(expected)
+    assert len(cv.entries) == 0
+    assert 'historical' in cv and 'no_experiment' not in cv
+    assert ['historical'] not in cv
+    assert cv['historical'] == expected['historical']
+    assert cv['historical'] is cv['historical']
+    with pytest.raises(KeyError):
+        cv['no_experiment']
+
+    # LRU of parsed entries
+    monkeypatch.setattr(util, '__lazy_cv_cache_size__', 2)
+    for key in ['historical', 'piControl', 'amip', 'historical']:
+        cv[key]
+    assert list(cv.entries) == ['amip', 'historical']
+
+    # pickled with its index; equal to the materialized CV
+    assert pickle.loads(pickle.dumps(cv)) == expected
+    assert read_json_cv([path])['experiment_id'] is cv
+    clear_cv_cache()
+
+
+def test_compact_cvs():
+    entry = {'activity_id': ['CMIP'], 'description': 'long text',
+             'parent': {'description': ['a', 'b']}, 'tier': 1}
+    assert compact_cv_entry(entry, ['description', 'tier']) == \
+        {'activity_id': ('CMIP', ), 'parent': {'description': ('a', 'b')}}
+    assert compact_cv_entry(['a', ['b']]) == ('a', ('b', ))
+    assert compact_cv_entry('some text', ['some text']) == 'some text'
+
+    path = "cc_plugin_cmip6_cv/data/CMIP6_experiment_id.json"
+    cvs = read_json_cv([path])
+    compacted = compact_cvs(cvs, ['description'])
+    assert compacted is not cvs and compacted.keys() == cvs.keys()
+    for name in cvs:
+        if name.startswith('version_metadata'):
+            assert compacted[name] is cvs[name]
+    # lazily loaded entries are compacted on access
+    assert isinstance(compacted['experiment_id'], lazy_cv)
+    historical = compacted['experiment_id']['historical']
+    assert 'description' not in historical
+    assert 'description' in cvs['experiment_id']['historical']
+    assert isinstance(historical['activity_id'], tuple)
+    assert historical['activity_id'][0] is \
+        compacted['experiment_id']['amip']['activity_id'][0]
+    assert pickle.loads(pickle.dumps(compacted['experiment_id']))[
+        'historical'] == historical
+    # `dict` CVs are compacted at once
+    compacted = compact_cvs({'experiment_id': dict(cvs['experiment_id'])},
+                            ['description'])
+    assert compacted['experiment_id']['historical'] == historical
+    clear_cv_cache()
+
+
+def test_read_cv_collection_version(tmp_path):
+    path = "cc_plugin_cmip6_cv/test/data"
+    for name, version in [('CMIP6_nominal_resolution.json', '6.2.45.3'),
+                          ('CMIP6_nominal_resolution_lower_version_c.json',
+                           '6.2.39.17'),
+                          ('CMIP6_test_two_cvs.json', '6.2.45.3')]:
+        assert read_cv_collection_version(path+'/'+name) == version
+        assert get_cv_collection_version(path+'/'+name) == version
+
+    # version metadata first, with braces and quotes in strings, nested CVs
+    cv = {'version_metadata': {'author': 'a "}{" b',
+                               'CV_collection_version': '1.2.3.4'},
+          'test_cv': {'a': {'version_metadata': {}}}}
+    with open(str(tmp_path/'test.json'), 'w') as f:
+        json.dump(cv, f, indent=4)
+    assert read_cv_collection_version(str(tmp_path/'test.json')) == '1.2.3.4'
+
+    # no version in the version metadata => None
+    cv['version_metadata'].pop('CV_collection_version')
+    with open(str(tmp_path/'test.json'), 'w') as f:
+        json.dump(cv, f)
+    assert read_cv_collection_version(str(tmp_path/'test.json')) is None
+    with pytest.raises(KeyError):
+        get_cv_collection_version(str(tmp_path/'test.json'))
+
+
 def test_compare_json_cv_versions():
     path = "cc_plugin_cmip6_cv/test/data"
     # return file0:
@@ -552,7 +1174,58 @@ def test_read_cmip6_json_cv():
     pass
 
 
+@prepost_test_dir(__lock_test_dir__)
+def test_load_json_file_cached():
+    path = "cc_plugin_cmip6_cv/test/data"
+    test_file = __lock_test_dir__+'/CMIP6_nominal_resolution.json'
+    shutil.copy(path+'/CMIP6_nominal_resolution.json', test_file)
+    clear_cv_cache()
+
+    # first call parses the file, second call is served from the cache
+    cv0 = load_json_file_cached(test_file)
+    assert get_cv_cache_stats() == {'hits': 0, 'misses': 1, 'size': 1}
+    cv1 = load_json_file_cached(test_file)
+    assert cv1 is cv0
+    assert get_cv_cache_stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+    # modify the file => it is parsed again
+    cv_new = dict(cv0)
+    cv_new['nominal_resolution'] = ['1 km']
+    with open(test_file, 'w') as json_file:
+        json.dump(cv_new, json_file)
+    cv2 = load_json_file_cached(test_file)
+    assert cv2['nominal_resolution'] == ['1 km']
+    assert get_cv_cache_stats() == {'hits': 1, 'misses': 2, 'size': 1}
+
+    # merged CVs are shared as long as the files do not change
+    assert read_json_cv([test_file]) is read_json_cv([test_file])
+
+    # missing files are not cached
+    with pytest.raises(FileNotFoundError):
+        load_json_file_cached(__lock_test_dir__+'/not_an_existing_file.json')
+
+    clear_cv_cache()
+    assert get_cv_cache_stats() == {'hits': 0, 'misses': 0, 'size': 0}
+
+
 @pytest.mark.skip(reason="test function not implemented yet")
 def test_read_json_cv():
     # TODO: implement test
-    pass
\ No newline at end of file
+    pass
+
+
+class subclassed_dataset(nc.Dataset):
+    pass
+
+
+def test_read_global_attributes():
+    test_file = __current_dir__+'/data/example_file_cf_issue_212.nc'
+    for dataset_class in [nc.Dataset, subclassed_dataset]:
+        with dataset_class(test_file, 'r') as dataset:
+            attributes = read_global_attributes(dataset)
+            assert sorted(attributes.keys()) == sorted(dataset.ncattrs())
+            for name in dataset.ncattrs():
+                assert attributes[name] == getattr(dataset, name)
+    # dicts are passed through
+    attributes = {'institution_id': 'DKRZ'}
+    assert read_global_attributes(attributes) is attributes
@@ -0,0 +1,122 @@
+from cc_plugin_cmip6_cv.zarr_header import read_zarr_global_attributes, \
+    is_zarr_store
+import numpy
+import pytest
+import json
+import os
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~ DEFINE TEST DATA ~~~~~~~~~~~~~~~~~~~~~~
+dummy_zattrs = {'title': 'Test ä ü', 'empty': '', 'forcing_index': 1,
+                'big': 2**40, 'float': 1.5, 'doubles': [1.0, 2.0],
+                'ints': [1, 2], 'one_int': [3], 'strings': ['a', 'b'],
+                'flag': True, 'nothing': None}
+dummy_attributes = {'title': 'Test ä ü', 'empty': '',
+                    'forcing_index': numpy.int32(1),
+                    'big': numpy.int64(2**40), 'float': numpy.float64(1.5),
+                    'doubles': numpy.array([1.0, 2.0]),
+                    'ints': numpy.array([1, 2], dtype=numpy.int32),
+                    'one_int': numpy.int32(3), 'strings': ['a', 'b'],
+                    'flag': True, 'nothing': None}
+
+
+def write_json(path, content):
+    with open(path, 'w') as f:
+        json.dump(content, f)
+
+
+def assert_same_attributes(attributes, expected):
+    assert list(attributes) == list(expected)
+    for name, value in expected.items():
+        assert type(attributes[name]) == type(value)
+        if isinstance(value, numpy.ndarray):
+            assert attributes[name].dtype == value.dtype
+            assert numpy.array_equal(attributes[name], value)
+        else:
+            assert attributes[name] == value
+
+
+@pytest.mark.parametrize("layout", ['consolidated', 'zattrs', 'v3'])
+def test_read_zarr_global_attributes(tmp_path, layout):
+    store = str(tmp_path/'test.zarr')
+    os.makedirs(store+'/tas')
+    if layout == 'v3':
+        write_json(store+'/zarr.json', {'zarr_format': 3,
+                                        'node_type': 'group',
+                                        'attributes': dummy_zattrs})
+    else:
+        write_json(store+'/.zgroup', {'zarr_format': 2})
+        write_json(store+'/tas/.zattrs', {'units': 'K'})
+        write_json(store+'/.zattrs', dummy_zattrs)
+        if layout == 'consolidated':
+            write_json(store+'/.zmetadata',
+                       {'metadata': {'.zgroup': {'zarr_format': 2},
+                                     '.zattrs': dummy_zattrs,
+                                     'tas/.zattrs': {'units': 'K'}},
+                        'zarr_consolidated_format': 1})
+            # only the consolidated metadata are read
+            os.remove(store+'/.zattrs')
+
+    assert is_zarr_store(store)
+    assert_same_attributes(read_zarr_global_attributes(store),
+                           dummy_attributes)
+
+
+def test_read_zarr_global_attributes_errors(tmp_path):
+    # group without attributes
+    store = str(tmp_path/'test.zarr')
+    os.makedirs(store)
+    write_json(store+'/.zgroup', {'zarr_format': 2})
+    assert read_zarr_global_attributes(store) == {}
+
+    # damaged metadata
+    with open(store+'/.zattrs', 'w') as f:
+        f.write('{"title": ')
+    with pytest.raises(ValueError):
+        read_zarr_global_attributes(store)
+    write_json(store+'/.zattrs', ['title'])
+    with pytest.raises(ValueError):
+        read_zarr_global_attributes(store)
+
+    # no Zarr store
+    assert not is_zarr_store(str(tmp_path))
+    with pytest.raises(ValueError):
+        read_zarr_global_attributes(str(tmp_path))
+    assert not is_zarr_store(store+'/.zgroup')
+    with pytest.raises(ValueError):
+        read_zarr_global_attributes(store+'/.zgroup')
+
+
+def test_is_zarr_store(tmp_path):
+    # only metadata of the root mark a store
+    directory = str(tmp_path)
+    write_json(directory+'/.zattrs', {'title': 'stray'})
+    write_json(directory+'/.zmetadata', {'metadata': {}})
+    assert not is_zarr_store(directory)
+    write_json(directory+'/zarr.json', {'attributes': {}})
+    assert not is_zarr_store(directory)
+    with open(directory+'/zarr.json', 'w') as f:
+        f.write('{"node_type": ')
+    assert not is_zarr_store(directory)
+    write_json(directory+'/zarr.json', {'zarr_format': 3,
+                                        'node_type': 'array'})
+    assert is_zarr_store(directory)
+    assert is_zarr_store(directory, ['zarr.json'])
+    assert not is_zarr_store(directory, ['.zattrs'])
+    assert is_zarr_store(directory, ['.zarray'])
+
+
+def test_read_zarr_global_attributes_zarr(tmp_path):
+    zarr = pytest.importorskip('zarr')
+    attributes = {'title': 'Test', 'forcing_index': 1, 'doubles': [1.0, 2.0]}
+    for zarr_format in [2, 3]:
+        store = str(tmp_path/('test_%d.zarr' % zarr_format))
+        group = zarr.open_group(store, mode='w', zarr_format=zarr_format)
+        group.attrs.update(attributes)
+        group.create_array('tas', shape=(3, ), dtype='f4')
+        zarr.consolidate_metadata(store)
+        assert is_zarr_store(store)
+        assert_same_attributes(read_zarr_global_attributes(store),
+                               {'title': 'Test',
+                                'forcing_index': numpy.int32(1),
+                                'doubles': numpy.array([1.0, 2.0])})
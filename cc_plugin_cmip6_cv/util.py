@@ -9,6 +9,20 @@ import shutil
 import datetime
 import appdirs
 import warnings
+import threading
+import concurrent.futures
+import collections
+import collections.abc
+import hashlib
+import re
+import socket
+import tempfile
+try:
+    import fcntl
+except ImportError:
+    # no locking on platforms without `fcntl`; see `dir_lock`
+    fcntl = None
+import requests.adapters
 
 # ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
 # some directories and URLs
@@ -17,8 +31,81 @@ __data_url__ = 'https://raw.githubusercontent.com/WCRP-CMIP/CMIP6_CVs/master'
 # some files
 __lock_file__ = '.locked'
 __last_update_file__ = '.last_update'
+# maximum time in seconds to wait for the lock of a CV directory; see
+# `dir_lock`
+__lock_timeout__ = 60
+# snapshots of the CVs in a data directory; see `publish_snapshot`
+#   directory holding the snapshot directories
+__snapshot_dir__ = '.snapshots'
+#   symbolic link to the current snapshot
+__current_snapshot__ = 'current'
+#   superseded snapshots are removed after this period
+__snapshot_grace_period__ = datetime.timedelta(hours=1)
+#   locks acquired by `lock_dir`; key: directory
+__dir_locks__ = {}
+__dir_locks_lock__ = threading.Lock()
+#   ETag, Last-Modified and sha256 of the downloaded CV files; see
+#   `read_manifest`
+__manifest_file__ = '.manifest.json'
 # we test for curr_date >= last_date + __update_period__
 __update_period__ = datetime.timedelta(days=7)
+# timeout of downloads in seconds: (connect, read)
+__download_timeout__ = (5, 30)
+# maximum number of files downloaded concurrently; also size of the
+# connection pool of the HTTP session
+__download_workers__ = 8
+# HTTP session shared by all downloads; see `get_http_session`
+__http_session__ = None
+__http_session_lock__ = threading.Lock()
+# result of `download_file_if_modified`
+#   file: str or `None`; path of the downloaded file
+#   not_modified: bool; `True` if the server answered 304 (Not Modified)
+#   etag, last_modified: str or `None`; validators sent by the server
+download_result = collections.namedtuple('download_result',
+                                         ['file', 'not_modified', 'etag',
+                                          'last_modified'])
+# content of a CMIP6 JSON CV file; see `load_json_cv`
+#   cv: dict; parsed content of the file
+#   version_metadata: dict; value of the key `version_metadata`
+json_cv_content = collections.namedtuple('json_cv_content',
+                                         ['cv', 'version_metadata'])
+# the object `version_metadata` in a CMIP6 JSON CV file; it contains only
+# strings (and no nested objects); see `read_cv_collection_version`
+__key_version_metadata__ = b'"version_metadata"'
+__regex_version_metadata__ = re.compile(
+    rb'"version_metadata"\s*:\s*(\{(?:[^{}"\\]+|"(?:[^"\\]|\\.)*")*\})')
+# minimum time between two checks for CV updates of the same directory within
+# one process; see `update_cmip6_json_cv_if_due`
+__update_check_interval__ = datetime.timedelta(hours=1)
+#   key: data directory; value: `time.monotonic()` of the last check
+__last_update_check__ = {}
+__last_update_check_lock__ = threading.Lock()
+# process-wide cache of parsed JSON CV files; see `load_json_file_cached`
+#   key: resolved path; value: (file key, parsed content)
+__cv_cache__ = {}
+__cv_cache_lock__ = threading.Lock()
+__cv_cache_stats__ = {'hits': 0, 'misses': 0}
+#   merged CV collections as returned by `read_json_cv`
+#   key: tuple of file keys; value: merged CV dict
+__cv_collection_cache__ = {}
+#   lazily loaded JSON CV files; see `load_json_file_lazy`
+#   key: resolved path; value: (file key, content with `lazy_cv`s)
+__lazy_cv_cache__ = {}
+# CVs whose entries are parsed on first access (see `lazy_cv`) and the
+# number of parsed entries kept per CV
+__lazy_cvs__ = ['experiment_id', 'source_id']
+__lazy_cv_cache_size__ = 64
+# validation of arguments by the decorators `accepts` and
+# `cv_structure.validate_argument_attribute`
+#   'full': validate the arguments of each call (default)
+#   'off': do not validate; if set via the environment variable, the
+#          decorators return the undecorated functions
+__validation_levels__ = ('full', 'off')
+__validation_env_var__ = 'CC_PLUGIN_CMIP6_CV_VALIDATION'
+#   current state; set via `set_validation_level`; the decorators read it on
+#   each call
+__validation_state__ = {'level': 'full', 'enabled': True,
+                        'decorate': True}
 
 
 # ~~~~~~~~~~~~~~ helper functions ~~~~~~~~~~~~~~
@@ -36,6 +123,366 @@ def isinstance_recursive_tuple(arg, type2check):
     return False
 
 
+def get_file_cache_key(file):
+    """
+    Returns a key identifying the current state of the file `file`.
+
+    The key consists of the resolved path, the modification time (in ns), the
+    size and the inode of the file. It changes whenever the file is modified
+    or replaced. If `file` does not exist, a `FileNotFoundError` is thrown.
+
+    @param file str path of the file
+    @return tuple (resolved path, mtime in ns, size, inode)
+    """
+    real_path = os.path.realpath(file)
+    stat_result = os.stat(real_path)
+    return (real_path, stat_result.st_mtime_ns, stat_result.st_size,
+            stat_result.st_ino)
+
+
+def load_json_file_cached(file):
+    """
+    Returns the parsed content of the JSON file `file`. Each file is parsed
+    only once per process as long as it is not modified on disk (see
+    `get_file_cache_key`).
+
+    The returned object is shared between all callers and must not be
+    modified. Errors are the same as of `json.load` (e.g. `FileNotFoundError`
+    or `json.JSONDecodeError`); failed parses are not cached.
+
+    @param file str path of the JSON file
+    @return parsed content of the JSON file
+    """
+    file_key = get_file_cache_key(file)
+
+    with __cv_cache_lock__:
+        cache_entry = __cv_cache__.get(file_key[0])
+        if cache_entry is not None and cache_entry[0] == file_key:
+            __cv_cache_stats__['hits'] += 1
+            return cache_entry[1]
+        __cv_cache_stats__['misses'] += 1
+
+    # parse outside of the lock; parsing the same file twice in parallel does
+    # no harm
+    with open(file_key[0]) as json_file:
+        content = json.load(json_file)
+
+    with __cv_cache_lock__:
+        __cv_cache__[file_key[0]] = (file_key, content)
+
+    return content
+
+
+class lazy_cv(collections.abc.Mapping):
+    """
+    Read-only `dict` CV whose entries are parsed on first access. It holds
+    the JSON text of the CV and an index of the start and end of each entry
+    in this text (see `index_json_cv_entries`). The last
+    `__lazy_cv_cache_size__` parsed entries are kept (LRU). Parsed entries
+    are shared between callers and must not be modified.
+    """
+
+    def __init__(self, text, index, prepare=None):
+        """
+        @param text str; JSON text containing the entries
+        @param index dict; key -> (start, end) of the entry's value in `text`
+        @param prepare callable (optional); applied on each parsed entry
+                       (e.g. `compact_cv_entry`); has to be picklable [None]
+        """
+        self.text = text
+        self.index = index
+        self.prepare = prepare
+        self.entries = collections.OrderedDict()
+        self.entries_lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self.entries_lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        start, end = self.index[key]
+        entry = json.loads(self.text[start:end])
+        if self.prepare is not None:
+            entry = self.prepare(entry)
+        with self.entries_lock:
+            self.entries[key] = entry
+            while len(self.entries) > __lazy_cv_cache_size__:
+                self.entries.popitem(last=False)
+        return entry
+
+    def __contains__(self, key):
+        try:
+            return key in self.index
+        except TypeError:
+            # unhashable key
+            return False
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __reduce__(self):
+        return (lazy_cv, (self.text, self.index, self.prepare))
+
+
+def _compact_json_value(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(_compact_json_value(v) for v in value)
+    if isinstance(value, dict):
+        return {sys.intern(k): _compact_json_value(v)
+                for k, v in value.items()}
+    return value
+
+
+def compact_cv_entry(entry, ignore_cvs=()):
+    """
+    Returns a compact copy of the CV entry `entry` (e.g. one experiment of
+    the `experiment_id` CV): fields listed in `ignore_cvs` are dropped, all
+    strings are interned and lists are converted into tuples.
+
+    Only the fields of the entry itself are dropped. Their names are the
+    attributes checked by `check_plan.compile_all_check_plan`, which skips
+    the same `ignore_cvs`. Nested dicts are kept completely because their
+    keys might be CV values.
+
+    @param entry value of one CV entry as read from a JSON CV file
+    @param ignore_cvs list or tuple of str; names of fields to drop [()]
+    @return compacted entry
+    """
+    if isinstance(entry, dict):
+        return {sys.intern(k): _compact_json_value(v)
+                for k, v in entry.items() if k not in ignore_cvs}
+    return _compact_json_value(entry)
+
+
+def compact_cvs(cvs, ignore_cvs=()):
+    """
+    Returns the CVs `cvs` with compacted entries (see `compact_cv_entry`).
+    The entries of `lazy_cv`s are compacted when they are parsed. CVs which
+    are no `dict` (e.g. lists) and the version metadata are kept as they
+    are. `cvs` is not modified.
+
+    @param cvs dict; CVs as returned by `read_cmip6_json_cv`
+    @param ignore_cvs list or tuple of str; names of fields to drop [()]
+    @return dict; compacted CVs
+    """
+    prepare = functools.partial(compact_cv_entry,
+                                ignore_cvs=frozenset(ignore_cvs))
+    compacted = {}
+    for name, cv in cvs.items():
+        if name.startswith('version_metadata'):
+            compacted[name] = cv
+        elif isinstance(cv, lazy_cv):
+            compacted[name] = lazy_cv(cv.text, cv.index, prepare)
+        elif isinstance(cv, dict):
+            compacted[name] = {sys.intern(k): prepare(v)
+                               for k, v in cv.items()}
+        else:
+            compacted[name] = cv
+    return compacted
+
+
+def _skip_json_whitespace(text, position):
+    while position < len(text) and text[position] in ' \t\n\r':
+        position += 1
+    return position
+
+
+def _expect_json_char(text, position, chars):
+    position = _skip_json_whitespace(text, position)
+    if position >= len(text) or text[position] not in chars:
+        raise json.JSONDecodeError('Expecting one of ' + repr(chars), text,
+                                   position)
+    return position
+
+
+def _parse_json_object(text, position, parse_value):
+    """
+    Parses the JSON object starting at `position` in `text`. The values are
+    parsed by `parse_value(key, position)`, which returns the position
+    after the value.
+
+    @return int; position after the object
+    """
+    position = _expect_json_char(text, position, '{') + 1
+    if text[_skip_json_whitespace(text, position):][:1] == '}':
+        return _skip_json_whitespace(text, position) + 1
+    while True:
+        position = _expect_json_char(text, position, '"') + 1
+        key, position = json.decoder.scanstring(text, position)
+        position = _expect_json_char(text, position, ':') + 1
+        position = parse_value(key, _skip_json_whitespace(text, position))
+        position = _expect_json_char(text, position, ',}')
+        if text[position] == '}':
+            return position + 1
+        position += 1
+
+
+def index_json_cv_entries(text, lazy_cvs):
+    """
+    Parses the JSON CV file content `text` without materializing the entries
+    of the CVs `lazy_cvs`. Each entry is decoded once to find its end and
+    discarded immediately; thus, `text` is completely validated.
+
+    @param text str; content of a JSON CV file; its top level has to be an
+                object
+    @param lazy_cvs list of str; names of CVs to load lazily
+    @return dict; top-level content; CVs in `lazy_cvs` which are objects are
+            represented by `lazy_cv`s
+    """
+    decoder = json.JSONDecoder()
+    content = {}
+
+    def parse_entry(index, key, position):
+        start = position
+        position = decoder.raw_decode(text, start)[1]
+        index[key] = (start, position)
+        return position
+
+    def parse_top_level(key, position):
+        if key in lazy_cvs and text[position:position+1] == '{':
+            index = {}
+            position = _parse_json_object(
+                text, position,
+                lambda k, p: parse_entry(index, k, p))
+            content[key] = lazy_cv(text, index)
+            return position
+        content[key], position = decoder.raw_decode(text, position)
+        return position
+
+    position = _parse_json_object(text, 0, parse_top_level)
+    if _skip_json_whitespace(text, position) != len(text):
+        raise json.JSONDecodeError('Extra data', text, position)
+    return content
+
+
+def load_json_file_lazy(file):
+    """
+    Returns the content of the JSON file `file` like `load_json_file_cached`
+    but the CVs in `__lazy_cvs__` are `lazy_cv`s. Their entries are parsed
+    on first access. The index of the entries is built once per process as
+    long as the file is not modified on disk.
+
+    @param file str path of the JSON file
+    @return dict; content of the JSON file
+    """
+    file_key = get_file_cache_key(file)
+
+    with __cv_cache_lock__:
+        cache_entry = __lazy_cv_cache__.get(file_key[0])
+        if cache_entry is not None and cache_entry[0] == file_key:
+            __cv_cache_stats__['hits'] += 1
+            return cache_entry[1]
+        __cv_cache_stats__['misses'] += 1
+
+    with open(file_key[0]) as json_file:
+        text = json_file.read()
+    content = index_json_cv_entries(text, __lazy_cvs__)
+
+    with __cv_cache_lock__:
+        __lazy_cv_cache__[file_key[0]] = (file_key, content)
+
+    return content
+
+
+def get_cv_cache_stats():
+    """
+    Returns the number of hits and misses of the process-wide CV cache and
+    the number of files currently cached.
+
+    @return dict with keys `hits`, `misses` and `size`
+    """
+    with __cv_cache_lock__:
+        return {'hits': __cv_cache_stats__['hits'],
+                'misses': __cv_cache_stats__['misses'],
+                'size': len(__cv_cache__) + len(__lazy_cv_cache__)}
+
+
+def clear_cv_cache():
+    """
+    Empties the process-wide CV cache and resets its statistics.
+    """
+    with __cv_cache_lock__:
+        __cv_cache__.clear()
+        __lazy_cv_cache__.clear()
+        __cv_collection_cache__.clear()
+        __cv_cache_stats__['hits'] = 0
+        __cv_cache_stats__['misses'] = 0
+
+
+def read_global_attributes(dataset):
+    """
+    Reads all global attributes of `dataset` in one pass and returns them as
+    a dict (attribute name -> value). If `dataset` already is a dict, it is
+    returned unchanged.
+
+    Note: `dataset.__dict__` is not used because it does not contain the
+    netCDF attributes for subclasses of `netCDF4.Dataset` (e.g. the
+    `MemoizedDataset` of the compliance-checker).
+
+    @param dataset netCDF4.Dataset, opened, or dict
+    @return dict
+    """
+    if isinstance(dataset, dict):
+        return dataset
+    return {name: dataset.getncattr(name) for name in dataset.ncattrs()}
+
+
+def set_validation_level(level):
+    """
+    Sets the validation level of the decorators `accepts` and
+    `cv_structure.validate_argument_attribute`. With level 'off', the
+    arguments of decorated functions are not validated anymore; the
+    decorated functions are only called through a thin wrapper.
+
+    If the environment variable `CC_PLUGIN_CMIP6_CV_VALIDATION` is set to
+    'off' when the plugin is imported, the decorators are not applied at
+    all. Functions decorated in this way are not validated if the level is
+    set to 'full' later on.
+
+    @param level str; one of `__validation_levels__`
+    """
+    my_name = sys._getframe().f_code.co_name
+    if level not in __validation_levels__:
+        raise ValueError('util.'+my_name+':: validation level has to be one' +
+                         ' of: ' + ', '.join(__validation_levels__))
+    __validation_state__['level'] = level
+    __validation_state__['enabled'] = (level != 'off')
+
+
+def get_validation_level():
+    """
+    Returns the validation level of the decorators `accepts` and
+    `cv_structure.validate_argument_attribute`; see `set_validation_level`.
+
+    @return str
+    """
+    return __validation_state__['level']
+
+
+def _init_validation_level():
+    my_name = sys._getframe().f_code.co_name
+    level = os.environ.get(__validation_env_var__, '').strip().lower()
+    if level == '':
+        return
+    if level not in __validation_levels__:
+        warnings.warn('util.'+my_name+':: value "' + level + '" of' +
+                      ' environment variable ' + __validation_env_var__ +
+                      ' is not one of: ' + ', '.join(__validation_levels__) +
+                      '; using "full"', RuntimeWarning)
+        return
+    set_validation_level(level)
+    # do not decorate at all
+    __validation_state__['decorate'] = (level != 'off')
+
+
+_init_validation_level()
+
+
 # ~~~~~~~~~~~~~~ DECORATORS ~~~~~~~~~~~~~~
 def accepts(*types):
     """
@@ -65,54 +512,71 @@ def accepts(*types):
                             " allowed for this decorator")
         # build a dictionary of arguments names and types
         arg_types = dict(zip(arg_names, types))
+        # (position, name, type) of positional arguments; arguments with type
+        # `None`
+        # are not tested and, hence, skipped
+        positional_types = tuple((i, arg_name, req_arg_type)
+                                 for (i, (arg_name, req_arg_type))
+                                 in enumerate(zip(arg_names, types))
+                                 if req_arg_type is not None)
+
+        # validation switched off by environment variable => no wrapper
+        if not __validation_state__['decorate']:
+            return func
+
+        def raise_type_error(arg_name, req_arg_type):
+            # check whether `req_arg_type` is type `type` or `tuple`
+            #   `req_arg_type` is `type`
+            if(isinstance(req_arg_type, type)):
+                raise TypeError("cv_tools."+func.__name__+":: " +
+                                "argument "+arg_name+" does not " +
+                                "match type `"+req_arg_type.__name__ +
+                                "`")
+            #   `t` is tuple
+            if(isinstance(req_arg_type, tuple)):
+                #   check if all values in the tuple are of type `type`
+                if (not any([not isinstance(t, type)
+                             for t in req_arg_type])):
+                    raise TypeError(("cv_tools.%s:: argument %r does" +
+                                     " not match type (%s)") %
+                                    (func.__name__, arg_name,
+                                     ', '.join([t.__name__
+                                                for t in req_arg_type])))
+            #   `t` is (neither `type` nor `tuple`)
+            #    or (`tuple` but not all elements in `tuple`
+            #            are `types`)
+            try:
+                raise TypeError(("cv_tools.%s:: a type provided to" +
+                                 " decorator has strange type: %r ") %
+                                (func.__name__, req_arg_type.__name__))
+            except AttributeError:
+                raise TypeError(("cv_tools.%s:: a type provided to" +
+                                 " decorator has strange type") %
+                                (func.__name__))
 
         # the actual wrapper
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # collect args and kwargs in one dict
-            new_kwargs = dict(zip(arg_names[0:len(args)], args))
-            new_kwargs.update(kwargs)
-
-            # iterate argument names arguments
-            for (arg_name, arg_val) in new_kwargs.items():
+            # validation switched off by `set_validation_level`
+            if not __validation_state__['enabled']:
+                return func(*args, **kwargs)
+
+            # test positional arguments
+            nargs_call = len(args)
+            for (i, arg_name, req_arg_type) in positional_types:
+                if i >= nargs_call:
+                    break
+                if(not isinstance(args[i], req_arg_type)):
+                    raise_type_error(arg_name, req_arg_type)
+            # test keyword arguments
+            for (arg_name, arg_val) in kwargs.items():
                 # get required argument type for this argument
                 req_arg_type = arg_types[arg_name]
                 # check if `type` was set to `None` => do not test
                 if(req_arg_type is None):
                     continue
                 if(not isinstance(arg_val, req_arg_type)):
-                    # check whether `req_arg_type` is type `type` or `tuple`
-                    #   `req_arg_type` is `type`
-                    if(isinstance(req_arg_type, type)):
-                        raise TypeError("cv_tools."+func.__name__+":: " +
-                                        "argument "+arg_name+" does not " +
-                                        "match type `"+req_arg_type.__name__ +
-                                        "`")
-                    #   `t` is tuple
-                    if(isinstance(req_arg_type, tuple)):
-                        #   check if all values in the tuple are of type `type`
-                        if (not any([not isinstance(t, type)
-                                     for t in req_arg_type])):
-                            raise TypeError("cv_tools.%s:: argument %r does" +
-                                            " not match type (%r)" +
-                                            "" % (func.__name__,
-                                                  arg_name,
-                                                  ', '.join([t.__name__
-                                                             for t
-                                                             in req_arg_type]
-                                                            )))
-                    #   `t` is (neither `type` nor `tuple`)
-                    #    or (`tuple` but not all elements in `tuple`
-                    #            are `types`)
-                    try:
-                        raise TypeError("cv_tools.%s:: a type provided to" +
-                                        " decorator has strange type: %r " +
-                                        "" % (func.__name__,
-                                              req_arg_type.__name__))
-                    except AttributeError:
-                        raise TypeError("cv_tools.%s:: a type provided to" +
-                                        " decorator has strange type" +
-                                        "" % (func.__name__))
+                    raise_type_error(arg_name, req_arg_type)
             return func(*args, **kwargs)
         return wrapper
     return decorator
@@ -181,53 +645,283 @@ def update_cmip6_json_cv(cv_name, dst_dir_coll, force_update=False):
     return []
 
 
+@accepts((str, list), data_directory_collection, bool)
+def update_cmip6_json_cv_if_due(cv_name, dst_dir_coll, force_update=False):
+    """
+    Calls `update_cmip6_json_cv` at most once per `__update_check_interval__`
+    and data directory within this process. The time of the last check is
+    only kept in memory. Hence, repeated calls (e.g. one call per checked
+    file) do not touch the file system until the interval has passed.
+
+    @param cv_name str or list of str; names of the CVs to update
+    @param dst_dir_coll data_directory_collection; where the CVs are located
+    @param force_update bool; check/update regardless of the last check
+                              [False]
+    @return list of str or None; output of `update_cmip6_json_cv` or `None` if
+                                 no check was due
+    """
+    data_dir = dst_dir_coll.__data_dir__
+    now = time.monotonic()
+
+    with __last_update_check_lock__:
+        last_check = __last_update_check__.get(data_dir)
+        if (not force_update and last_check is not None and
+                now - last_check < __update_check_interval__.total_seconds()):
+            return None
+        # register the check before performing it so that concurrent threads
+        # do not start the same update
+        __last_update_check__[data_dir] = now
+
+    return update_cmip6_json_cv(cv_name, dst_dir_coll, force_update)
+
+
+def reset_update_check(data_dir=None):
+    """
+    Forgets when the CVs were checked for updates the last time so that the
+    next call of `update_cmip6_json_cv_if_due` performs the check again (e.g.
+    at the beginning of each batch of files).
+
+    @param data_dir str (optional); directory for which to reset the record;
+                                    all directories are reset if `None` [None]
+    """
+    with __last_update_check_lock__:
+        if data_dir is None:
+            __last_update_check__.clear()
+        else:
+            __last_update_check__.pop(data_dir, None)
+
+
+class dir_lock(object):
+    """
+    Exclusive lock of a CV directory. The directory is locked as long as
+    the lock file `__lock_file__` exists in it; older versions of this
+    plugin only check whether it exists and, hence, respect the lock. The
+    holder creates the lock file exclusively (`os.O_EXCL`), locks it via
+    `fcntl.flock` and writes its PID, host name and the time of locking into
+    it. On release, the holder removes the lock file.
+
+    A lock is only broken if its holder is a dead process on the same host.
+    Breaking requires the `fcntl.flock` lock of the lock file; the kernel
+    releases it when the holder terminates. Lock files of other hosts and
+    lock files without holder record (e.g. of older versions) are never
+    broken; if their holder crashed, they have to be removed manually (see
+    `unlock_dir`).
+
+    Usage:
+        with dir_lock(some_dir):
+            ...  # update CVs
+    """
+
+    def __init__(self, some_dir):
+        self.some_dir = some_dir
+        self.lock_path = some_dir+'/'+__lock_file__
+        # file descriptor of the lock file; `None` if not locked
+        self.fd = None
+
+    def is_locked(self):
+        return self.fd is not None
+
+    def acquire(self, blocking=True, timeout=None):
+        """
+        Acquires the lock.
+
+        @param blocking bool; wait for the lock [True]
+        @param timeout float (optional); maximum time in seconds to wait for
+                       the lock; defaults to `__lock_timeout__` [None]
+        @return bool; `True` if the lock was acquired
+        """
+        # get function's name
+        my_name = 'dir_lock.acquire'
+
+        if self.is_locked():
+            raise RuntimeError('util.'+my_name+':: lock is already acquired' +
+                               ': '+self.lock_path)
+        if timeout is None:
+            timeout = __lock_timeout__
+        deadline = time.monotonic() + timeout
+        wait = 0.01
+
+        while True:
+            if os.path.isdir(self.lock_path):
+                raise IsADirectoryError('utils.dir_lock:: a directory with ' +
+                                        'name of the lock file exists; plea' +
+                                        'se remove manually: ' +
+                                        self.lock_path)
+            try:
+                fd = os.open(self.lock_path,
+                             os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                fd = None
+            if fd is not None:
+                # nobody else knows the new file yet
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                self._write_holder_record(fd)
+                self.fd = fd
+                return True
+            if self._break_if_stale(my_name):
+                continue
+            if not blocking or time.monotonic() >= deadline:
+                return False
+            time.sleep(min(wait, max(0.0, deadline - time.monotonic())))
+            wait = min(wait * 2, 0.5)
+
+    def release(self):
+        """
+        Releases the lock and removes the lock file.
+        """
+        if self.fd is None:
+            return
+        try:
+            if self._is_current_lock_file(self.fd):
+                os.remove(self.lock_path)
+        except OSError:
+            pass
+        finally:
+            # closing the file releases the `fcntl.flock` lock
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError('util.dir_lock:: could not acquire lock: ' +
+                               self.lock_path)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def _is_current_lock_file(self, fd):
+        try:
+            stat_path = os.stat(self.lock_path)
+        except FileNotFoundError:
+            return False
+        stat_fd = os.fstat(fd)
+        return (stat_path.st_ino == stat_fd.st_ino and
+                stat_path.st_dev == stat_fd.st_dev)
+
+    def _write_holder_record(self, fd):
+        record = json.dumps({'pid': os.getpid(), 'host': socket.gethostname(),
+                             'time': time.time()}).encode()
+        os.pwrite(fd, record, 0)
+
+    def _read_holder_record(self, fd):
+        try:
+            record = json.loads(os.pread(fd, 4096, 0).decode())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(record, dict):
+            return None
+        return record
+
+    def _break_if_stale(self, my_name):
+        # Removes the existing lock file if its holder is a dead process on
+        # this host; returns `True` if it was removed.
+        try:
+            fd = os.open(self.lock_path, os.O_RDONLY)
+        except FileNotFoundError:
+            # released in between
+            return True
+        try:
+            holder = self._read_holder_record(fd)
+            if holder is None or not self._is_holder_dead(holder):
+                return False
+            # The lock of a living holder cannot be acquired; it also
+            # excludes other processes breaking the same lock.
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except (BlockingIOError, PermissionError):
+                    return False
+            if not self._is_current_lock_file(fd):
+                # broken and replaced by another process
+                return False
+            warnings.warn('util.'+my_name+':: breaking stale lock of dead ' +
+                          'process ' + str(holder.get('pid')) + ' on ' +
+                          str(holder.get('host')) + ': ' + self.lock_path,
+                          RuntimeWarning)
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
+            return True
+        finally:
+            os.close(fd)
+
+    def _is_holder_dead(self, holder):
+        if holder.get('host') != socket.gethostname():
+            return False
+        try:
+            os.kill(int(holder.get('pid')), 0)
+        except ProcessLookupError:
+            return True
+        except (PermissionError, TypeError, ValueError, OverflowError):
+            pass
+        return False
+
+
 @accepts(str)
 def is_dir_locked(some_dir):
+    """
+    Returns `True` if `some_dir` is locked (see `dir_lock`), i.e. if the
+    lock file or a directory with its name exists.
+
+    @param some_dir str name of the directory
+    @return bool
+    """
     return os.path.exists(some_dir+'/'+__lock_file__)
 
 
 @accepts(str)
 def lock_dir(some_dir):
-    # get function's name
-    my_name = sys._getframe().f_code.co_name
-    # construct path of lock file
-    lock_path = some_dir+'/'+__lock_file__
-    # get todays date and convert into string
-    str_today = datetime.date.today().strftime('%Y-%m-%d')
+    """
+    Tries to acquire the lock of `some_dir` without waiting (see
+    `dir_lock`). The lock is held until `unlock_dir` is called.
 
-    if (is_dir_locked(some_dir)):
-        if os.path.isfile(lock_path):
+    @param some_dir str name of the directory
+    @return bool; `True` if the lock was acquired
+    """
+    with __dir_locks_lock__:
+        lock = __dir_locks__.get(some_dir)
+        if lock is not None:
+            if lock.is_locked() and lock._is_current_lock_file(lock.fd):
+                return False
+            # our lock file was removed by someone else
+            lock.release()
+        lock = dir_lock(some_dir)
+        if not lock.acquire(blocking=False):
             return False
-        else:
-            raise IsADirectoryError('utils.'+my_name+':: a directory with ' +
-                                    'name of the lock file exists; please ' +
-                                    'remove manually: '+lock_path)
-    else:
-        handle_lock_file = open(lock_path, 'w')
-        # NOTE: keep this for debugging
-        iostat = handle_lock_file.write(str_today)
-        handle_lock_file.close()
+        __dir_locks__[some_dir] = lock
         return True
 
 
 @accepts(str)
 def unlock_dir(some_dir):
+    """
+    Releases the lock of `some_dir` acquired by `lock_dir` and removes the
+    lock file, also if it was created by another process.
+
+    @param some_dir str name of the directory
+    @return bool; `True` if `some_dir` is not locked anymore
+    """
     # get function's name
     my_name = sys._getframe().f_code.co_name
-    # if lock exists, remove lock file
-    if (is_dir_locked(some_dir)):
-        if os.path.isfile(some_dir+'/'+__lock_file__):
-            os.remove(some_dir+'/'+__lock_file__)
-        else:
-            raise IsADirectoryError('utils.' + my_name + ':: a directory wit' +
-                                    'h name of the lock file exists; please ' +
-                                    'remove manually: ' + some_dir + '/' +
-                                    __lock_file__)
-    # check if file really was removed
-    if (not is_dir_locked(some_dir)):
-        return True
-    # lock does still exist
-    return False
+    lock_path = some_dir+'/'+__lock_file__
+    if os.path.isdir(lock_path):
+        raise IsADirectoryError('utils.' + my_name + ':: a directory wit' +
+                                'h name of the lock file exists; please ' +
+                                'remove manually: ' + lock_path)
+    with __dir_locks_lock__:
+        lock = __dir_locks__.pop(some_dir, None)
+        if lock is not None:
+            lock.release()
+    # remove a left-over lock file
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+    # check if lock really was removed
+    return not is_dir_locked(some_dir)
 
 
 @accepts(str)
@@ -344,8 +1038,29 @@ def update_performed(some_dir):
     return True
 
 
-@accepts(str, str, bool)
-def download_file(src_file, dst_file, overwrite=True):
+def get_http_session():
+    """
+    Returns the HTTP session which is shared by all downloads of this
+    process. Its connection pool keeps up to `__download_workers__`
+    connections per host open.
+
+    @return requests.Session
+    """
+    global __http_session__
+    with __http_session_lock__:
+        if __http_session__ is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=__download_workers__,
+                pool_maxsize=__download_workers__)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            __http_session__ = session
+        return __http_session__
+
+
+@accepts(str, str, bool, (int, float, tuple, type(None)))
+def download_file(src_file, dst_file, overwrite=True, timeout=None):
     """
     Downloads `src_file` and saves it as `dst_file`.
 
@@ -355,11 +1070,17 @@ def download_file(src_file, dst_file, overwrite=True):
     HTTP error code, then no file is written and `None` is returned. Otherwise,
     if the download was successful, the value of `dst_file` is returned.
 
+    The shared HTTP session (see `get_http_session`) is used. If the server
+    does not respond within `timeout`, the download is aborted and `None` is
+    returned.
+
     @param src_file str download url of the file to obtain
     @param dst_file str destination path (directory + file name) where to save
                         the downloaded file
     @param overwrite bool choose to overwrite `dst_file` if it already exists
                           [True]
+    @param timeout float or tuple (connect, read) of float (optional); timeout
+                   in seconds; defaults to `__download_timeout__` [None]
     @return `None` or value of `dst_file`; value `dst_file` if download
                                            successful and `None` otherwise
     """
@@ -371,31 +1092,385 @@ def download_file(src_file, dst_file, overwrite=True):
                       's already exist. Set `overwrite` to `True` to overwri' +
                       'te it.')
 
+    return _download(src_file, dst_file, None, timeout, my_name).file
+
+
+def _download(src_file, dst_file, headers, timeout, my_name):
+    # Performs the download of `download_file` and
+    # `download_file_if_modified`. Returns a `download_result`.
     try:
         # send request
-        r = requests.get(src_file, allow_redirects=True)
+        r = get_http_session().get(src_file, allow_redirects=True,
+                                   headers=headers,
+                                   timeout=(timeout if timeout is not None
+                                            else __download_timeout__))
         # check if status code indicates successful download
         if r.status_code == requests.codes.ok:
             # write file
-            open(dst_file, mode='wb').write(r.content)
+            with open(dst_file, mode='wb') as f:
+                f.write(r.content)
             # if file exists, return file name
             if os.path.isfile(dst_file):
-                return dst_file
+                return download_result(dst_file, False,
+                                       r.headers.get('ETag'),
+                                       r.headers.get('Last-Modified'))
             warnings.warn('util.' + my_name + ':: file could not be download' +
                           'ed and saved for unknown reason; source url: ' +
                           src_file + '; destination file: ' + dst_file, 
                           RuntimeWarning)
+        elif (r.status_code == requests.codes.not_modified and
+              headers is not None):
+            # the file on the server did not change since the last download
+            return download_result(None, True, r.headers.get('ETag'),
+                                   r.headers.get('Last-Modified'))
         else:
             warnings.warn('util.' + my_name + ':: file could not be download' +
                           'ed; HTTP status code: ' + str(r.status_code) + ';' +
                           ' source url: ' + src_file,
                           RuntimeWarning)
+    except requests.Timeout:
+        warnings.warn('util.' + my_name + ':: timeout while downloading file' +
+                      ': ' + src_file, RuntimeWarning)
     except requests.ConnectionError:
         warnings.warn('util.' + my_name + ':: connection could not be establ' +
                       'ished to download file: ' + src_file, RuntimeWarning)
 
     # something went wrong ...
-    return None
+    return download_result(None, False, None, None)
+
+
+@accepts(str, str, (dict, type(None)), (int, float, tuple, type(None)))
+def download_file_if_modified(src_file, dst_file, manifest_entry=None,
+                              timeout=None):
+    """
+    Downloads `src_file` and saves it as `dst_file` if it was modified since
+    the download described by `manifest_entry` (see `read_manifest`).
+
+    The ETag and Last-Modified values of `manifest_entry` are sent as
+    `If-None-Match` and `If-Modified-Since` headers. If the server answers
+    with 304 (Not Modified), nothing is written. Without `manifest_entry`,
+    the file is downloaded unconditionally. `dst_file` is overwritten.
+
+    @param src_file str download url of the file to obtain
+    @param dst_file str destination path (directory + file name) where to save
+                        the downloaded file
+    @param manifest_entry dict (optional); manifest entry of the last
+                          download of `src_file` [None]
+    @param timeout float or tuple (connect, read) of float (optional); timeout
+                   in seconds; defaults to `__download_timeout__` [None]
+    @return download_result; `file` is `dst_file` if the file was downloaded
+            and `None` otherwise; `not_modified` is `True` if the server
+            answered with 304
+    """
+    # get function's name
+    my_name = sys._getframe().f_code.co_name
+
+    headers = None
+    if manifest_entry is not None:
+        headers = {}
+        if manifest_entry.get('etag'):
+            headers['If-None-Match'] = manifest_entry['etag']
+        if manifest_entry.get('last_modified'):
+            headers['If-Modified-Since'] = manifest_entry['last_modified']
+        if len(headers) == 0:
+            headers = None
+
+    return _download(src_file, dst_file, headers, timeout, my_name)
+
+
+def _map_concurrently(fun, args, workers):
+    # calls `fun(*a)` for each `a` in `args` in a bounded thread pool and
+    # returns the results in the order of `args`
+    if len(args) == 0:
+        return []
+    if workers is None:
+        workers = __download_workers__
+    workers = max(1, min(workers, len(args)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda a: fun(*a), args))
+
+
+def download_files(src_files, dst_files, overwrite=True, timeout=None,
+                   workers=None):
+    """
+    Downloads the files `src_files` concurrently and saves them as
+    `dst_files`; see `download_file`.
+
+    @param src_files list of str download urls of the files to obtain
+    @param dst_files list of str destination paths; same length as
+                     `src_files`
+    @param overwrite bool choose to overwrite existing files [True]
+    @param timeout float or tuple (connect, read) of float (optional); timeout
+                   in seconds per request; defaults to `__download_timeout__`
+                   [None]
+    @param workers int (optional); maximum number of concurrent downloads;
+                   defaults to `__download_workers__` [None]
+    @return list of `None` or str; for each file the return value of
+            `download_file`
+    """
+    # get function's name
+    my_name = sys._getframe().f_code.co_name
+
+    if len(src_files) != len(dst_files):
+        raise ValueError('util.' + my_name + ':: `src_files` and `dst_files`' +
+                         ' have to be of the same length')
+
+    return _map_concurrently(download_file,
+                             [(src_file, dst_file, overwrite, timeout)
+                              for src_file, dst_file
+                              in zip(src_files, dst_files)],
+                             workers)
+
+
+def download_files_if_modified(src_files, dst_files, manifest_entries,
+                               timeout=None, workers=None):
+    """
+    Downloads the files `src_files` concurrently and saves them as
+    `dst_files` if they were modified since their last download; see
+    `download_file_if_modified`.
+
+    @param src_files list of str download urls of the files to obtain
+    @param dst_files list of str destination paths; same length as
+                     `src_files`
+    @param manifest_entries list of dict or None; manifest entry of each
+                            file; same length as `src_files`
+    @param timeout float or tuple (connect, read) of float (optional); timeout
+                   in seconds per request; defaults to `__download_timeout__`
+                   [None]
+    @param workers int (optional); maximum number of concurrent downloads;
+                   defaults to `__download_workers__` [None]
+    @return list of download_result
+    """
+    # get function's name
+    my_name = sys._getframe().f_code.co_name
+
+    if not (len(src_files) == len(dst_files) == len(manifest_entries)):
+        raise ValueError('util.' + my_name + ':: `src_files`, `dst_files` an' +
+                         'd `manifest_entries` have to be of the same length')
+
+    return _map_concurrently(download_file_if_modified,
+                             [(src_file, dst_file, entry, timeout)
+                              for src_file, dst_file, entry
+                              in zip(src_files, dst_files, manifest_entries)],
+                             workers)
+
+
+def get_file_sha256(file):
+    """
+    Returns the sha256 hex digest of the content of `file`.
+
+    @param file str path of the file
+    @return str
+    """
+    sha256 = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def read_manifest(some_dir):
+    """
+    Reads the download manifest of the directory `some_dir`. The manifest
+    holds for each downloaded CV file (key: file name) a dict with the
+    source `url`, the `etag` and `last_modified` values sent by the server
+    and the `sha256` of the file. A missing or unreadable manifest yields an
+    empty dict.
+
+    @param some_dir str name of the directory holding the manifest
+    @return dict
+    """
+    try:
+        with open(some_dir+'/'+__manifest_file__, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    return {k: v for k, v in manifest.items() if isinstance(v, dict)}
+
+
+def write_manifest(some_dir, manifest):
+    """
+    Writes the download manifest `manifest` (see `read_manifest`) into the
+    directory `some_dir`. The file is replaced atomically.
+
+    @param some_dir str name of the directory holding the manifest
+    @param manifest dict
+    """
+    manifest_path = some_dir+'/'+__manifest_file__
+    tmp_path = manifest_path+'.tmp.'+str(os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def get_valid_manifest_entry(manifest, src_file, dst_file):
+    """
+    Returns the entry of `manifest` for `dst_file` if it is still valid:
+    `dst_file` exists, it was downloaded from `src_file` and its sha256 did
+    not change since. Otherwise, `None` is returned.
+
+    @param manifest dict; see `read_manifest`
+    @param src_file str download url of the file
+    @param dst_file str path of the local file
+    @return dict or None
+    """
+    entry = manifest.get(os.path.basename(dst_file))
+    if (entry is None or entry.get('url') != src_file or
+            not os.path.isfile(dst_file)):
+        return None
+    try:
+        if get_file_sha256(dst_file) != entry.get('sha256'):
+            return None
+    except OSError:
+        return None
+    return entry
+
+
+def get_snapshot_dir(some_dir):
+    """
+    Returns the directory of the current snapshot of the CVs in the data
+    directory `some_dir` (see `publish_snapshot`). If `some_dir` holds no
+    snapshots, `some_dir` itself is returned.
+
+    Readers should resolve the snapshot directory once and read all CV
+    files from it. Snapshots are never modified; hence, the CVs read are
+    consistent even if an update is published in between.
+
+    @param some_dir str name of the data directory
+    @return str
+    """
+    current = some_dir+'/'+__current_snapshot__
+    if os.path.islink(current):
+        return os.path.realpath(current)
+    return some_dir
+
+
+def create_snapshot(some_dir):
+    """
+    Creates a new, empty snapshot directory in the data directory
+    `some_dir`. It is not visible to readers before it is published by
+    `publish_snapshot`.
+
+    @param some_dir str name of the data directory
+    @return str; path of the new snapshot directory
+    """
+    snapshots_dir = some_dir+'/'+__snapshot_dir__
+    os.makedirs(snapshots_dir, exist_ok=True)
+    new_dir = tempfile.mkdtemp(prefix=time.strftime('%Y%m%dT%H%M%S') + '.',
+                               suffix='.tmp', dir=snapshots_dir)
+    # `mkdtemp` creates directories only readable by the owner
+    os.chmod(new_dir, 0o755)
+    return new_dir
+
+
+def publish_snapshot(some_dir, new_snapshot_dir, base_dir=None):
+    """
+    Publishes the snapshot `new_snapshot_dir` (see `create_snapshot`) as
+    current snapshot of the data directory `some_dir`.
+
+    1. JSON files of `base_dir`, which are missing in `new_snapshot_dir`, are
+       hard-linked (or copied) into it.
+    2. The symbolic link `some_dir/current` is atomically replaced by a link
+       to the new snapshot.
+    3. For each JSON file in the new snapshot, `some_dir` holds a symbolic
+       link `some_dir/FILE -> current/FILE`. Hence, files can still be
+       accessed via their old paths.
+
+    The caller has to hold an exclusive lock on `some_dir` (see `dir_lock`).
+
+    @param some_dir str name of the data directory
+    @param new_snapshot_dir str path of the new snapshot directory
+    @param base_dir str (optional); snapshot on which the new one is based;
+                    defaults to the current snapshot [None]
+    @return str; path of the published snapshot directory
+    """
+    if base_dir is None:
+        base_dir = get_snapshot_dir(some_dir)
+
+    # 1. take unchanged files from the base snapshot
+    new_files = set(os.listdir(new_snapshot_dir))
+    for name in os.listdir(base_dir):
+        base_file = base_dir+'/'+name
+        if (name in new_files or not _is_snapshot_file(name) or
+                not os.path.isfile(base_file)):
+            continue
+        try:
+            os.link(os.path.realpath(base_file), new_snapshot_dir+'/'+name)
+        except OSError:
+            shutil.copy2(base_file, new_snapshot_dir+'/'+name)
+
+    # finalize snapshot
+    final_dir = new_snapshot_dir[:-len('.tmp')]
+    os.rename(new_snapshot_dir, final_dir)
+
+    # 2. swap `current`; the old snapshot gets the time at which it was
+    #    superseded (see `collect_snapshots`)
+    old_dir = get_snapshot_dir(some_dir)
+    _replace_by_symlink(os.path.relpath(final_dir, some_dir),
+                        some_dir+'/'+__current_snapshot__)
+    if old_dir != some_dir and os.path.isdir(old_dir):
+        os.utime(old_dir)
+
+    # 3. links to the files of the current snapshot
+    for name in os.listdir(final_dir):
+        link_path = some_dir+'/'+name
+        link_target = __current_snapshot__+'/'+name
+        if not (os.path.islink(link_path) and
+                os.readlink(link_path) == link_target):
+            _replace_by_symlink(link_target, link_path)
+
+    return final_dir
+
+
+def collect_snapshots(some_dir, grace_period=None):
+    """
+    Removes the snapshots of the data directory `some_dir` which were
+    superseded (or left unpublished) more than `grace_period` ago. Readers,
+    which pinned an old snapshot, can finish reading within this period.
+
+    @param some_dir str name of the data directory
+    @param grace_period datetime.timedelta (optional); defaults to
+                        `__snapshot_grace_period__` [None]
+    @return list of str; paths of the removed snapshot directories
+    """
+    if grace_period is None:
+        grace_period = __snapshot_grace_period__
+    snapshots_dir = some_dir+'/'+__snapshot_dir__
+    if not os.path.isdir(snapshots_dir):
+        return []
+
+    current_dir = get_snapshot_dir(some_dir)
+    oldest = time.time() - grace_period.total_seconds()
+    removed = []
+    for name in os.listdir(snapshots_dir):
+        path = snapshots_dir+'/'+name
+        if os.path.realpath(path) == current_dir or not os.path.isdir(path):
+            continue
+        try:
+            if os.stat(path).st_mtime > oldest:
+                continue
+            shutil.rmtree(path)
+            removed.append(path)
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _is_snapshot_file(name):
+    # files which are taken over from one snapshot into the next
+    return (name.endswith('.json') and not name.startswith('.') and
+            not name.startswith('tmp.'))
+
+
+def _replace_by_symlink(target, link_path):
+    # atomically replaces `link_path` by a symbolic link to `target`
+    tmp_link = link_path+'.tmp.'+str(os.getpid())
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, link_path)
 
 
 @accepts((str, list), str, data_directory_collection, bool)
@@ -407,25 +1482,17 @@ def update_json_cv(file_name, src_url, dst_dir_coll, force_update=False):
     # set target diretory
     dst_dir = dst_dir_coll.__data_dir__
 
-    # construct path for input, temp and output
+    # construct path for input and output
     if isinstance(file_name, str):
-        src_files = [src_url+'/'+file_name]
-        tmp_files = [dst_dir+'/'+'tmp.'+file_name]
-        dst_files = [dst_dir+'/'+file_name]
-    if isinstance(file_name, list):
-        if any([not isinstance(n, str) for n in file_name]):
-            raise TypeError('util.'+my_name+':: `file_name` bad type')
-        src_files = [src_url+'/'+n for n in file_name]
-        tmp_files = [dst_dir+'/'+'tmp.'+n for n in file_name]
-        dst_files = [dst_dir+'/'+n for n in file_name]
-
-    # lock directory for other instances of this
-    # try this 20 times and wait 2 seconds after each try
-    for i in range(0, 19):
-        if lock_dir(dst_dir):
-            break
-        time.sleep(2)
-
+        file_name = [file_name]
+    if any([not isinstance(n, str) for n in file_name]):
+        raise TypeError('util.'+my_name+':: `file_name` bad type')
+    src_files = [src_url+'/'+n for n in file_name]
+    dst_files = [dst_dir+'/'+n for n in file_name]
+
+    # First, find out without writing anything whether there is anything to
+    # do at all. If not, we neither lock the directory nor touch the update
+    # status file.
     if force_update:
         do_update = True
     elif not dst_dir_coll.__do_update__:
@@ -435,44 +1502,124 @@ def update_json_cv(file_name, src_url, dst_dir_coll, force_update=False):
         do_update = False
     else:
         do_update = update_needed(dst_dir)
+    files_missing = any([not os.path.isfile(f) for f in dst_files])
+    if not (do_update or files_missing):
+        return dst_files
+
+    # lock directory for other instances of this; readers of the CVs
+    # (`read_cmip6_json_cv`) are not locked out because the update is
+    # written into a new snapshot (see `publish_snapshot`). If another
+    # process is updating, we do not wait for it but go on with the current
+    # snapshot; only if files are missing, we wait for them.
+    lock = dir_lock(dst_dir)
+    if not lock.acquire(blocking=files_missing):
+        warnings.warn('util.'+my_name+':: directory ' + dst_dir + ' is lock' +
+                      'ed by another process; CVs are not updated;',
+                      RuntimeWarning)
+        return dst_files
 
-    for src_file, tmp_file, dst_file in zip(src_files, tmp_files, dst_files):
-        if ((not os.path.isfile(dst_file)) or do_update):
-            # download file
-            if tmp_file == download_file(src_file, tmp_file):
-                # check if existing file actually is a CMIP6 JSON CV file
-                if not is_json_cv(tmp_file):
-                    # if not, remove downloaded file and continue to next file
-                    os.remove(tmp_file)
-                    continue
-                # check if existing file is newer or equal
-                if dst_file == compare_json_cv_versions(dst_file, tmp_file):
-                    # if yes, remove downloaded file and continue to next file
-                    os.remove(tmp_file)
+    try:
+        # Another instance might have performed the update while we were
+        # waiting for the lock. Hence, we check again. If nothing is left
+        # to do, we leave the directory as it is.
+        if do_update and not force_update:
+            do_update = update_needed(dst_dir)
+        if not (do_update or any([not os.path.isfile(f)
+                                  for f in dst_files])):
+            return dst_files
+
+        # snapshot on which the update is based
+        base_dir = get_snapshot_dir(dst_dir)
+
+        # download all needed files concurrently; files which were downloaded
+        # before are only downloaded if they changed on the server (see
+        # `download_file_if_modified`)
+        manifest = read_manifest(dst_dir)
+        files_to_download = [(src_file, os.path.basename(dst_file))
+                             for src_file, dst_file
+                             in zip(src_files, dst_files)
+                             if ((not os.path.isfile(dst_file)) or do_update)]
+        if len(files_to_download) > 0:
+            # the update is written into a new snapshot
+            new_dir = create_snapshot(dst_dir)
+            downloads = download_files_if_modified(
+                [f[0] for f in files_to_download],
+                [new_dir+'/tmp.'+f[1] for f in files_to_download],
+                [get_valid_manifest_entry(manifest, f[0], base_dir+'/'+f[1])
+                 for f in files_to_download])
+
+            snapshot_changed = False
+            for (src_file, name), download in \
+                    zip(files_to_download, downloads):
+                # file did not change on the server => nothing to do
+                if download.not_modified:
                     continue
-                # If we arrive here, the tmp_file has a higher version than
-                # dst_file or the dst_file does not exist.
-                shutil.move(tmp_file, dst_file)
+                base_file = base_dir+'/'+name
+                tmp_file = new_dir+'/tmp.'+name
+                # check downloaded file
+                if tmp_file == download.file:
+                    # remember the version on the server; the local file is
+                    # either replaced by it or newer/equal
+                    manifest_entry = {'url': src_file, 'etag': download.etag,
+                                      'last_modified': download.last_modified}
+                    # check if existing file actually is a CMIP6 JSON CV file;
+                    # it is parsed once and not kept in the CV cache
+                    tmp_content = load_json_cv(tmp_file, cached=False)
+                    if tmp_content is None:
+                        # if not, remove downloaded file and continue to next
+                        # file
+                        os.remove(tmp_file)
+                        manifest.pop(name, None)
+                        continue
+                    # check if existing file is newer or equal; only the
+                    # version of the existing file is read
+                    if is_json_cv(base_file) and 0 == compare_str_cv_versions(
+                            get_cv_collection_version(base_file),
+                            tmp_content.version_metadata[
+                                'CV_collection_version']):
+                        # if yes, remove downloaded file
+                        os.remove(tmp_file)
+                        manifest_entry['sha256'] = get_file_sha256(base_file)
+                    else:
+                        # If we arrive here, the tmp_file has a higher version
+                        # than the current file or the file does not exist.
+                        os.rename(tmp_file, new_dir+'/'+name)
+                        snapshot_changed = True
+                        manifest_entry['sha256'] = \
+                            get_file_sha256(new_dir+'/'+name)
+                    manifest[name] = manifest_entry
+                else:
+                    warnings.warn('util.'+my_name+':: new version of file ' +
+                                  name + ' could not be downloaded; using ol' +
+                                  'd version;', RuntimeWarning)
+
+            # publish the new snapshot if anything changed
+            if snapshot_changed:
+                publish_snapshot(dst_dir, new_dir, base_dir)
             else:
-                warnings.warn('util.'+my_name+':: new version of file ' +
-                              os.path.basename(dst_file) + ' could not be do' +
-                              'wnloaded; using old version;', RuntimeWarning)
+                shutil.rmtree(new_dir)
 
-    # update the update information file
-    update_performed(dst_dir)
+            # update the manifest
+            write_manifest(dst_dir, manifest)
 
-    # unlock dir
-    if not unlock_dir(dst_dir):
-        warnings.warn('util.'+my_name+':: lock could not be removed for ' +
-                      'unknown reason', RuntimeWarning)
+        # remove old snapshots and update the update information file
+        collect_snapshots(dst_dir)
+        update_performed(dst_dir)
+    finally:
+        # unlock dir
+        lock.release()
 
     return dst_files
 
 
-def is_json_cv(file, cv_name="", verbose=False):
+def load_json_cv(file, cv_name="", verbose=False, cached=True, lazy=False):
     """
-    Returns a boolean indicating whether the provided file is a valid
-    JSON Controled Vocabulary file as used in CMIP6.
+    Parses the JSON file `file` once and returns its content together with
+    its version metadata if it is a valid JSON Controled Vocabulary file as
+    used in CMIP6 (see `is_json_cv`). Otherwise, `None` is returned.
+
+    Files which are only checked once (e.g. downloaded files) should be
+    loaded with `cached=False` so that they do not stay in the CV cache.
 
     @param file: string representing the path of a CMIP6 CV json file
     @param cv_name: string or list of strings (optional) containing names of
@@ -480,13 +1627,19 @@ def is_json_cv(file, cv_name="", verbose=False):
                     empty string, no names are tested [""]
     @param verbose: boolean (optional) to switch verbose mode on and off
                     [off/False]
+    @param cached: boolean (optional); parse the file via the process-wide
+                   CV cache (see `load_json_file_cached`) [True]
+    @param lazy: boolean (optional); the CVs in `__lazy_cvs__` are returned
+                 as `lazy_cv`s (see `load_json_file_lazy`); only applies if
+                 `cached` is `True` [False]
+    @return json_cv_content (namedtuple `cv`, `version_metadata`) or None
     """
-    # get function's name
-    my_name = sys._getframe().f_code.co_name
+    # name of the function in messages; `is_json_cv` is the public check
+    my_name = 'is_json_cv'
 
     # NOTE: If we encounter that `file` does not contain a valid
     #       CMIP6 CV, we directly leave this function via
-    #       `return False`. If we did not leave this function
+    #       `return None`. If we did not leave this function
     #       until its end, then everything is fine and we
     #       `return True`.
 
@@ -501,7 +1654,7 @@ def is_json_cv(file, cv_name="", verbose=False):
         if verbose:
             print('util.'+my_name+':: the argument `file` has to be an non-' +
                   'empty string')
-        return False
+        return None
 
     # check if `verbose` has correct variable type
     if (not isinstance(verbose, bool)):
@@ -511,13 +1664,18 @@ def is_json_cv(file, cv_name="", verbose=False):
 
     # try to open the json file
     try:
-        with open(file) as json_file:
-            cv = json.load(json_file)
+        if cached and lazy:
+            cv = load_json_file_lazy(file)
+        elif cached:
+            cv = load_json_file_cached(file)
+        else:
+            with open(file) as json_file:
+                cv = json.load(json_file)
     except FileNotFoundError:
         # file does not exist at all
         if verbose:
             print('util.'+my_name+':: JSON does not exist: '+file)
-        return False
+        return None
     except json.JSONDecodeError:
         # file exists but is not json file
         if verbose:
@@ -525,7 +1683,7 @@ def is_json_cv(file, cv_name="", verbose=False):
                   file+'. Printing first line of the file: ("> " prepended)')
             with open(file) as file:
                 print('> '+file.readline().strip()+'\n')
-        return False
+        return None
 
     # Check if size of content of JSON file is reasonable.
     # We need two keys at least:
@@ -544,7 +1702,7 @@ def is_json_cv(file, cv_name="", verbose=False):
                   '(one CV per top-level')
             print('             key; the name of the key equal to the CV-' +
                   'name).')
-        return False
+        return None
 
     # Check if size of content of JSON file is reasonable.
     # We need two keys at least:
@@ -556,7 +1714,7 @@ def is_json_cv(file, cv_name="", verbose=False):
             print('util.' + my_name + ':: The top-level key "version_metadat' +
                   'a" is missing in the JSON file.')
             print('             File: '+file)
-        return False
+        return None
 
     # Check name(s) of the provided CV(s) if they are provided
     # by the user.
@@ -569,27 +1727,27 @@ def is_json_cv(file, cv_name="", verbose=False):
                       '" has to be of type string or list.')
                 print('             Instead, it is of type ' +
                       type(cv_name).__name__)
-            return False
+            return None
         if (isinstance(cv_name, str)):
             # if we got a CV-name as string ...
             if ('version_metadata' == cv_name):
                 if verbose:
                     print('util.' + my_name + ':: "version_metadata" is not ' +
                           'a valid name for a CV.')
-                return False
+                return None
             if (cv_name not in cv.keys()):
                 if verbose:
                     print('util.' + my_name + ':: The loaded JSON file does ' +
                           'not hold a CV with the user-provided')
                     print('             name. File: '+file)
-                return False
+                return None
         if (isinstance(cv_name, list)):
             # if we got a list of CV-names ...
             if ('version_metadata' in cv_name):
                 if verbose:
                     print('util.' + my_name + ':: "version_metadata" is not ' +
                           'a valid name for a CV.')
-                return False
+                return None
             if (any([not isinstance(x, str) for x in cv_name])):
                 # ... but the list does not contain only strings
                 if verbose:
@@ -599,7 +1757,7 @@ def is_json_cv(file, cv_name="", verbose=False):
                           'lements of "cv_name" have')
                     print('             to be strings, if "cv_name" is a lis' +
                           't.')
-                return False
+                return None
             if (any([x not in cv.keys() for x in cv_name])):
                 # ... but not all values in cv_name exist in cv.keys()
                 # NOTE: keep this for debugging
@@ -617,11 +1775,26 @@ def is_json_cv(file, cv_name="", verbose=False):
                     print('             in the JSON file and, hence, a no va' +
                           'lid CV names of the CV')
                     print('             represented by the JSON file.')
-                return False
+                return None
 
     # If we did not leave this function up till now, the JSON file can
     # be assumed to contain a proper CMIP6 CV.
-    return True
+    return json_cv_content(cv, cv['version_metadata'])
+
+
+def is_json_cv(file, cv_name="", verbose=False):
+    """
+    Returns a boolean indicating whether the provided file is a valid
+    JSON Controled Vocabulary file as used in CMIP6.
+
+    @param file: string representing the path of a CMIP6 CV json file
+    @param cv_name: string or list of strings (optional) containing names of
+                    CVs that schould be checked to exist in the JSON file; if
+                    empty string, no names are tested [""]
+    @param verbose: boolean (optional) to switch verbose mode on and off
+                    [off/False]
+    """
+    return load_json_cv(file, cv_name, verbose) is not None
 
 
 @accepts(str, str, bool)
@@ -738,6 +1911,50 @@ def compare_dict_cv_versions(cv0, cv1, verbose=False):
                                    verbose)
 
 
+def read_cv_collection_version(file):
+    """
+    Returns the `CV_collection_version` of the CMIP6 JSON CV file `file`
+    without parsing the whole file. Only the object `version_metadata` is
+    searched in the raw file and parsed.
+
+    @param file: string representing the path of a CMIP6 CV json file
+    @return str or None if no version was found
+    """
+    with open(file, 'rb') as json_file:
+        content = json_file.read()
+    # search the key; the regex is only applied where it was found
+    position = content.find(__key_version_metadata__)
+    while position >= 0:
+        match = __regex_version_metadata__.match(content, position)
+        # key must not be part of a string (escaped quotation mark)
+        if match is not None and content[position-1:position] != b'\\':
+            try:
+                metadata = json.loads(match.group(1).decode('utf-8'))
+            except ValueError:
+                metadata = None
+            if isinstance(metadata, dict) and \
+                    isinstance(metadata.get('CV_collection_version'), str):
+                return metadata['CV_collection_version']
+        position = content.find(__key_version_metadata__, position + 1)
+    return None
+
+
+def get_cv_collection_version(file):
+    """
+    Returns the `CV_collection_version` of the CMIP6 JSON CV file `file`. It
+    is read by `read_cv_collection_version` if possible. Otherwise, the whole
+    file is parsed.
+
+    @param file: string representing the path of a CMIP6 CV json file
+    @return str
+    """
+    version = read_cv_collection_version(file)
+    if version is None:
+        version = load_json_file_cached(file)['version_metadata'][
+            'CV_collection_version']
+    return version
+
+
 @accepts(str, str, bool)
 def compare_json_cv_versions(file0, file1, verbose=False):
     """
@@ -768,9 +1985,12 @@ def compare_json_cv_versions(file0, file1, verbose=False):
                          ' has to be of type `bool` but is of type ' +
                          type(verbose).__name__)
 
+    # check each file only once
+    is_cv0 = is_json_cv(file0) and len(file0) > 0
+    is_cv1 = is_json_cv(file1) and len(file1) > 0
+
     # if both files are no CVs in JSON files: return empty string
-    if(((not is_json_cv(file0)) or (len(file0) == 0))
-       and ((not is_json_cv(file1)) or (len(file1) == 0))):
+    if((not is_cv0) and (not is_cv1)):
         if verbose:
             print('util.' + my_name + ':: Neither file0 nor file1 are recogn' +
                   'ized as correct CMIP6 CV JSON files:')
@@ -782,7 +2002,7 @@ def compare_json_cv_versions(file0, file1, verbose=False):
         # versions, we test it here.
 
     # if file1 is not a CV in a JSON file: return file0
-    if (is_json_cv(file0) and not is_json_cv(file1)):
+    if (is_cv0 and not is_cv1):
         if verbose:
             print('util.' + my_name + ':: file1 is not recognized as correct' +
                   ' CMIP6 CV JSON file (return file0):')
@@ -790,7 +2010,7 @@ def compare_json_cv_versions(file0, file1, verbose=False):
         return file0
 
     # if file0 is not a CV in a JSON file: return file1
-    if (is_json_cv(file1) and not is_json_cv(file0)):
+    if (is_cv1 and not is_cv0):
         if verbose:
             print('util.' + my_name + ':: file0 is not recognized as correct' +
                   ' CMIP6 CV JSON file (return file1):')
@@ -806,13 +2026,10 @@ def compare_json_cv_versions(file0, file1, verbose=False):
                   'ngs (return file0):'+file0)
         return file0
 
-    # load CVs
-    with open(file0) as json_file:
-        cv0 = json.load(json_file)
-    with open(file1) as json_file:
-        cv1 = json.load(json_file)
-
-    cv_compare = compare_dict_cv_versions(cv0, cv1, verbose)
+    # compare versions; only the version metadata are read
+    cv_compare = compare_str_cv_versions(get_cv_collection_version(file0),
+                                         get_cv_collection_version(file1),
+                                         verbose)
     if (cv_compare == 0):
         return file0
     if (cv_compare == 1):
@@ -831,9 +2048,6 @@ def read_cmip6_json_cv(cv_name, dst_dir_coll):
     """
     TODO: doc for read_cmip6_json_cv
     """
-    # get function's name
-    my_name = sys._getframe().f_code.co_name
-
     # create a list from cv_name is it is not a list yet
     if isinstance(cv_name, list):
         cv_name_list = cv_name
@@ -842,37 +2056,61 @@ def read_cmip6_json_cv(cv_name, dst_dir_coll):
     else:
         return {}
 
-    # construct file name(s)
-    # TODO: consider to remove duplicates
-    # construct file names and ...
-    file_name = [dst_dir_coll.__data_dir__+'/CMIP6_'+n+'.json'
-                 for n in cv_name if isinstance(n, str)]
-    # ... take the CVs for which we need to read files
-    cvs_in_files = [n for n in cv_name_list if isinstance(n, str)]
+    # get the files to read; switch to the fall-back directory for files
+    # which are missing or invalid
+    file_name, fallbacks = find_cmip6_json_cv_files(cv_name_list,
+                                                    dst_dir_coll)
+    warn_cmip6_json_cv_fallbacks(fallbacks)
 
     # if `file_name` is empty, we do not need to do anything; return empty dict
     if (len(file_name) == 0):
         return {}
 
+    # call `read_json_cv` and return the output
+    return read_json_cv(file_name)
+
+
+def find_cmip6_json_cv_files(cv_name, dst_dir_coll):
+    """
+    Returns the JSON files of the CMIP6 CVs `cv_name` in the data directory
+    of `dst_dir_coll` and the CVs for which the fall-back directory is used
+    because their file does not exist or holds no valid CMIP6 json CV. A
+    `RuntimeError` is thrown if the file is not valid in the fall-back
+    directory either.
+
+    @param cv_name list of str; names of the CVs
+    @param dst_dir_coll data_directory_collection
+    @return tuple (list of str: paths of the files,
+                   list of tuples (CV name, file, file in fall-back
+                   directory): CVs read from the fall-back directory)
+    """
+    # get function's name
+    my_name = sys._getframe().f_code.co_name
+
+    # Pin the current snapshot of the data directory; all files are read
+    # from it. No lock is needed because snapshots are not modified (see
+    # `publish_snapshot`).
+    data_dir = get_snapshot_dir(dst_dir_coll.__data_dir__)
+
+    # TODO: consider to remove duplicates
+    # take the CVs for which we need to read files and construct file names
+    cvs_in_files = [n for n in cv_name if isinstance(n, str)]
+    file_name = [data_dir+'/CMIP6_'+n+'.json' for n in cvs_in_files]
+    fallbacks = []
+
     # check for correctness
     for n, c, f in zip(range(0, len(cvs_in_files)), cvs_in_files, file_name):
 
-        if not is_json_cv(f):
+        if load_json_cv(f, lazy=True) is None:
             # If file does not exist or is no proper cv,
             # replace the directory by the fall back directory
-            fnew = f.replace(dst_dir_coll.__data_dir__,
-                             dst_dir_coll.__fallback_dir__)
+            fnew = dst_dir_coll.__fallback_dir__+'/'+os.path.basename(f)
             # Update file path in list
             file_name[n] = fnew
-            # Tell it to the user
-            warnings.warn('until.'+my_name+':: file for CV ' + c + ' (' +
-                          os.path.split(f)[1] + ') does not hold a valid ' +
-                          'CMIP6 json CV or does not exists in directory ' +
-                          os.path.split(f)[0] + '. Switching to fall-back ' +
-                          'directory: ' + os.path.split(fnew)[0],
-                          RuntimeWarning)
+            fallbacks.append((c, f, fnew))
 
-            if(not is_json_cv(fnew)):
+            if load_json_cv(fnew, lazy=True) is None:
+                warn_cmip6_json_cv_fallbacks(fallbacks)
                 raise RuntimeError('until.'+my_name+':: file for CV ' + c +
                                    ' (' + os.path.split(f)[1] + ') does not ' +
                                    ' hold a valid CMIP6 json CV or does not ' +
@@ -880,8 +2118,24 @@ def read_cmip6_json_cv(cv_name, dst_dir_coll):
                                    os.path.split(f)[0] + ' and ' +
                                    os.path.split(fnew)[0] + '.')
 
-    # call `read_json_cv` and return the output
-    return read_json_cv(file_name)
+    return file_name, fallbacks
+
+
+def warn_cmip6_json_cv_fallbacks(fallbacks):
+    """
+    Tells the user for which CVs the fall-back directory is used (see
+    `find_cmip6_json_cv_files`).
+
+    @param fallbacks list of tuples (CV name, file, file in fall-back
+                     directory)
+    """
+    for c, f, fnew in fallbacks:
+        warnings.warn('until.read_cmip6_json_cv:: file for CV ' + c + ' (' +
+                      os.path.split(f)[1] + ') does not hold a valid ' +
+                      'CMIP6 json CV or does not exists in directory ' +
+                      os.path.split(f)[0] + '. Switching to fall-back ' +
+                      'directory: ' + os.path.split(fnew)[0],
+                      RuntimeWarning)
 
 
 @accepts((str, list))
@@ -891,6 +2145,11 @@ def read_json_cv(file_name):
     If we ge a list of file names, we store the version information of
     each file and compare them in the end.
 
+    The JSON files are read via the process-wide CV cache. The returned CV
+    is shared between callers as long as the files do not change and must
+    not be modified. The CVs in `__lazy_cvs__` are `lazy_cv`s whose entries
+    are parsed on first access (see `load_json_file_lazy`).
+
     @param file_name str or list of strings
     """
     # get function's name
@@ -902,25 +2161,42 @@ def read_json_cv(file_name):
         if(any([not isinstance(f, str) for f in file_name])):
             raise TypeError('util.'+my_name+':: need a `str` or a `list` of ' +
                             '`str` but got a list with something different.')
+        # If none of the files changed since the last call, we return the
+        # same merged CV as before.
+        try:
+            collection_key = tuple(get_file_cache_key(f) for f in file_name)
+        except FileNotFoundError:
+            collection_key = None
+        with __cv_cache_lock__:
+            cv = __cv_collection_cache__.get(collection_key)
+        if cv is not None:
+            return cv
+
         cv = {}
         for f in file_name:
-            if(not is_json_cv(f)):
+            content = load_json_cv(f, lazy=True)
+            if(content is None):
                 raise RuntimeError('until.'+my_name+':: file does ' +
                                    'not exists or holds no valid json CV' +
                                    f)
-            with open(f) as json_file:
-                tmp_cv = json.load(json_file)
+            # shallow copy because the cached content must not be modified
+            tmp_cv = dict(content.cv)
             tmp_cv['version_metadata'+f] = tmp_cv.pop('version_metadata')
             cv.update(tmp_cv)
 
+        if collection_key is not None:
+            with __cv_cache_lock__:
+                __cv_collection_cache__.clear()
+                __cv_collection_cache__[collection_key] = cv
+
     else:
         # case: we got one file name
-        if(not is_json_cv(f)):
+        content = load_json_cv(file_name, lazy=True)
+        if(content is None):
             raise RuntimeError('until.'+my_name+':: file does ' +
                                'not exists or holds no valid json CV' +
                                file_name)
-        with open(file_name) as json_file:
-            cv = json.load(json_file)
+        cv = content.cv
 
     # return CV(s)
     return cv
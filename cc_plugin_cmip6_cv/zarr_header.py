@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+cc_plugin_cmip6_cv.zarr_header.py
+
+Reader of the global (root-level) attributes of Zarr stores on a file system
+without zarr or xarray. One JSON file is read:
+  * `.zmetadata`: consolidated metadata (Zarr v2); its key '.zattrs'
+  * `.zattrs`: attributes of the root group (Zarr v2)
+  * `zarr.json`: metadata of the root group (Zarr v3); its key 'attributes'
+The first existing file is used. Arrays and chunks are not touched.
+
+Zarr stores attributes as JSON without their netCDF types. The values are
+converted to the types of the attributes of netCDF files written by CMOR
+(see `_decode_attribute_value`), so that the returned `dict` can be checked
+like the global attributes read from a `netCDF4.Dataset`.
+'''
+
+# ~~~~~~~~~~~~~~ imports ~~~~~~~~~~~~~~
+import json
+import os
+import numpy
+
+
+# ~~~~~~~~~~~~~~ global variables ~~~~~~~~~~~~~~
+# files holding the root attributes; in the order they are tried
+#   value: keys of the attributes in the JSON content
+__zarr_attribute_files__ = (('.zmetadata', ('metadata', '.zattrs')),
+                            ('.zattrs', ()),
+                            ('zarr.json', ('attributes', )))
+# files marking the root of a Zarr store (group or array); see
+# `is_zarr_store`
+#   Zarr v2: metadata of the root group or array
+__zarr_marker_files__ = ('.zgroup', '.zarray')
+#   Zarr v3: metadata file of each node; only with a 'node_type'
+__zarr_v3_marker_file__ = 'zarr.json'
+# range of integers which are converted into numpy.int32
+__int32_info__ = numpy.iinfo(numpy.int32)
+
+
+# ~~~~~~~~~~~~~~ function definitions ~~~~~~~~~~~~~~
+def is_zarr_store(path, names=None):
+    """
+    Returns `True` if `path` is a directory holding the metadata of the root
+    of a Zarr store (group or array): `.zgroup` or `.zarray` (Zarr v2) or
+    `zarr.json` with a 'node_type' (Zarr v3). Other Zarr files alone (e.g. a
+    stray `.zattrs`) do not make a directory a store.
+
+    @param path str; path to test
+    @param names collection of str (optional); names of the entries of the
+                 directory `path` if they are known already [None]
+    @return bool
+    """
+    if names is None:
+        if not os.path.isdir(path):
+            return False
+        names = [name for name in __zarr_marker_files__ +
+                 (__zarr_v3_marker_file__, )
+                 if os.path.isfile(os.path.join(path, name))]
+    if any(name in names for name in __zarr_marker_files__):
+        return True
+    if __zarr_v3_marker_file__ not in names:
+        return False
+    try:
+        with open(os.path.join(path, __zarr_v3_marker_file__), 'rb') as f:
+            content = json.loads(f.read())
+    except (OSError, ValueError):
+        return False
+    return isinstance(content, dict) and 'node_type' in content
+
+
+def read_zarr_global_attributes(path):
+    """
+    Returns the attributes of the root of the Zarr store `path` as `dict`
+    (attribute name -> value). Only one JSON file is read (consolidated
+    metadata, `.zattrs` or `zarr.json`). An empty `dict` is returned if the
+    root has no attributes.
+
+    A `ValueError` is thrown if `path` is no Zarr store or its metadata are
+    damaged.
+
+    @param path str; path of the Zarr store (directory)
+    @return dict
+    """
+    my_name = 'zarr_header.read_zarr_global_attributes'
+
+    for name, keys in __zarr_attribute_files__:
+        try:
+            with open(os.path.join(path, name), 'rb') as f:
+                content = json.loads(f.read())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        except ValueError as e:
+            raise ValueError(my_name+':: file ' + name + ' of Zarr store ' +
+                             path + ' is no valid JSON file: ' + str(e))
+        attributes = content
+        for key in keys:
+            if not isinstance(attributes, dict):
+                break
+            attributes = attributes.get(key, {})
+        if not isinstance(attributes, dict):
+            raise ValueError(my_name+':: bad attributes in file ' + name +
+                             ' of Zarr store ' + path)
+        return {key: _decode_attribute_value(value)
+                for key, value in attributes.items()}
+
+    # store without attributes
+    if is_zarr_store(path):
+        return {}
+    raise ValueError(my_name+':: ' + path + ' is no Zarr store')
+
+
+def _decode_attribute_value(value):
+    # Integers become numpy.int32 (numpy.int64 if they do not fit) and floats
+    # numpy.float64 like netCDF attributes of CMOR; lists of numbers become
+    # numpy arrays and lists of one element scalars (like read by netCDF4);
+    # text and other values stay as they are.
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        if __int32_info__.min <= value <= __int32_info__.max:
+            return numpy.int32(value)
+        return numpy.int64(value)
+    if isinstance(value, float):
+        return numpy.float64(value)
+    if isinstance(value, list) and len(value) > 0:
+        if all(isinstance(v, str) for v in value):
+            return value[0] if len(value) == 1 else value
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool)
+               for v in value):
+            values = numpy.array(value)
+            if values.dtype.kind == 'i' and \
+                    __int32_info__.min <= values.min() and \
+                    values.max() <= __int32_info__.max:
+                values = values.astype(numpy.int32)
+            return values[0] if len(values) == 1 else values
+    return value
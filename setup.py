@@ -43,7 +43,10 @@ setup(
         'Topic :: Scientific/Engineering'
     ],
     entry_points={
-        'compliance_checker.suites': ['cmip6_cv = cc_plugin_cmip6_cv.cmip6_cv:CMIP6CV_1_Check']
+        'compliance_checker.suites': [
+            'cmip6_cv = cc_plugin_cmip6_cv.cmip6_cv:CMIP6CV_1_Check'
+        ],
+        'console_scripts': ['cmip6-cv-check = cc_plugin_cmip6_cv.cli:main']
     },
     cmdclass=versioneer.get_cmdclass(),
 )